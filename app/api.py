@@ -1,75 +1,603 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import math
+import threading
 from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Callable, Literal
 from decimal import Decimal
-from .schema import GetEmpStatusRequest, FlatGetEmpStatusResponse, ErrorOut
-from .data_access import DataAccess
+import time
+from .schema import (
+    GetEmpStatusRequest, FlatGetEmpStatusResponse, ErrorOut,
+    GetEmpStatusBatchRequest, GetEmpStatusBatchResponse,
+    CacheInvalidateRequest, CacheInvalidateResponse,
+)
+from .data_access import AsyncDataAccess, CircuitOpenError, EmployeeSnapshot, request_deadline
 from .validator import Validator
-from .process_status import ProcessStatus
-from .cache import TTLCache
+from .process_status import ProcessStatus, from_cents
+from .cache import TTLCache, SingleFlight, open_backend
+from .limits import ConcurrencyLimiter, Overloaded, open_rate_limiter
 from .logger import DBLogger
+from .models import subscribe_changes
 from .settings import settings
+from .metrics import STAGE_LATENCY, CACHE_LOOKUPS, REQUESTS_SHED
 
-router = APIRouter(prefix="/api", tags=["GetEmpStatus"])
-_cache = TTLCache(ttl_seconds=settings.CACHE_TTL_SECONDS)
+try:
+    import orjson
+
+    def _encode(body: dict) -> bytes:
+        return orjson.dumps(body)
+    _decode = orjson.loads
+except ImportError:                      # orjson is optional; the stdlib gives the same bytes, slower
+    def _encode(body: dict) -> bytes:
+        return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    _decode = json.loads
+
+_rate_limiter = open_rate_limiter(settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST,
+                                  settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_URL)
+# Only DB work is shed: cache hits keep being served while the database is saturated
+_db_limiter = ConcurrencyLimiter(
+    settings.DB_CONCURRENCY_LIMIT,
+    max_limit=settings.DB_CONCURRENCY_MAX,
+    target_latency=settings.DB_LATENCY_TARGET_MS / 1000,
+)
+
+async def _authorize(authorization: str | None = Header(default=None)) -> str:
+    """
+    Token check plus the per-token rate limit (429 over RATE_LIMIT_PER_SECOND).
+    One flat dependency: FastAPI re-parses a sub-dependency's headers even when its
+    result is cached, which costs measurable CPU on every cache hit.
+    """
+    token_id = await Validator.validate_token(authorization)
+    if _rate_limiter is not None:
+        wait = await _rate_limiter.acheck(token_id)
+        if wait:
+            REQUESTS_SHED.inc("rate_limited")
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too Many Requests",
+                                headers={"Retry-After": str(math.ceil(wait))})
+    return token_id
+
+async def _authorize_admin(token_id: str = Depends(_authorize)) -> str:
+    """Admin endpoints: a valid token whose id is listed in ADMIN_TOKEN_IDS, else 403."""
+    if token_id not in {t.strip() for t in settings.ADMIN_TOKEN_IDS.split(",")}:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return token_id
+
+router = APIRouter(prefix="/api", tags=["GetEmpStatus"],
+                   responses={429: {"model": ErrorOut}, 503: {"model": ErrorOut}})
+# With a shared backend (CACHE_BACKEND=sqlite|redis) every worker sees the same entries,
+# so hits and bustCache invalidations are host- or cluster-wide
+_backend = open_backend(
+    settings.CACHE_BACKEND,
+    settings.CACHE_URL,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_BYTES,
+    stripes=settings.CACHE_LOCK_STRIPES,
+    sweep_interval=settings.CACHE_SWEEP_INTERVAL_SECONDS,
+)
+# Entries are (encoded body, ETag, LastUpdated); "ok:" held bare bodies, so shared stores get a new namespace
+_cache = TTLCache(
+    ttl_seconds=settings.CACHE_TTL_SECONDS,
+    stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+    fallback_ttl=settings.CACHE_FALLBACK_TTL_SECONDS,
+    backend=_backend,
+    namespace="ok2:",
+)
+# Remembers 404/406/422 outcomes as (status_code, detail) so scanners do not reach the DB
+_negative_cache = TTLCache(
+    ttl_seconds=settings.NEGATIVE_CACHE_TTL_SECONDS,
+    backend=_backend if settings.CACHE_BACKEND != "memory" else open_backend(
+        "memory",
+        max_entries=settings.CACHE_MAX_ENTRIES,
+        stripes=settings.CACHE_LOCK_STRIPES,
+        sweep_interval=settings.CACHE_SWEEP_INTERVAL_SECONDS,
+    ),
+    namespace="neg:",
+)
+_flight = SingleFlight()
+_background: set[asyncio.Task] = set()
+
+async def _data_access() -> AsyncDataAccess:
+    # async so FastAPI resolves it inline; a sync callable would cost a threadpool hop per request
+    return router.data_access                                           # type: ignore[attr-defined]
 
 def _cache_key(national: str) -> str:
     return f"empstatus:{national}"
 
+def _start_deadline():
+    """Give the DB work of this request DB_REQUEST_DEADLINE_MS; retries stop at the deadline."""
+    if settings.DB_REQUEST_DEADLINE_MS:
+        request_deadline.set(time.monotonic() + settings.DB_REQUEST_DEADLINE_MS / 1000)
+
+# Every invalidation starts a new generation. A load notes the generation before it reads
+# and caches nothing if another one started meanwhile: its rows may predate that write.
+_generation = 0
+_generation_lock = threading.Lock()
+
+def _next_generation():
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+def invalidate(nationals) -> int:
+    """Evict the positive and negative entries of these employees; returns how many keys were given."""
+    _next_generation()
+    n = 0
+    for national in nationals:
+        key = _cache_key(national)
+        _cache.delete(key)
+        _negative_cache.delete(key)
+        n += 1
+    return n
+
+def cached_nationals() -> list[str]:
+    """National numbers with a cached response in this process (or the shared backend)."""
+    prefix = _cache_key("")
+    return [k[len(prefix):] for k in _cache.keys() if k.startswith(prefix)]
+
+# warm-up evaluations are not requests: keep them out of `logs` (and the next top-N)
+_quiet_logger = DBLogger(session_factory=None, enabled=False)
+
+async def preload(nationals: list[str], data: AsyncDataAccess, chunk: int = 500,
+                  progress: Callable[[int], None] | None = None) -> int:
+    """Fetch and cache these employees `chunk` at a time with the batch query; returns how many were cached."""
+    loaded = 0
+    for i in range(0, len(nationals), chunk):
+        part = nationals[i:i + chunk]
+        generation = _generation
+        snaps = await data.get_employee_snapshots(part)
+        bodies, rejected = {}, {}
+        for national in part:
+            try:
+                bodies[national] = _evaluate(national, snaps.get(national), _quiet_logger)
+            except HTTPException as exc:
+                rejected[national] = exc
+        await _negative_cache.run(_remember_rejections, rejected, generation)
+        loaded += len(await _publish(data, bodies, generation))
+        if progress is not None:
+            progress(loaded)
+    return loaded
+
+# Committed ORM writes to users/salaries evict the affected responses of this process right
+# away; other processes see them in salary_changes (invalidation.follow_changes)
+subscribe_changes(invalidate)
+
+async def evict(nationals) -> int:
+    """invalidate() for async callers, off the event loop when the cache backend blocks."""
+    return await _cache.run(invalidate, nationals)
+
 @router.post("/GetEmpStatus", response_model=FlatGetEmpStatusResponse, responses={
+    304: {"description": "Not Modified: If-None-Match matches the current ETag"},
     404: {"model": ErrorOut},
     406: {"model": ErrorOut},
     422: {"model": ErrorOut},
     401: {"model": ErrorOut},
 })
 async def get_emp_status(
+    request: Request,
     payload: GetEmpStatusRequest,
-    data: DataAccess = Depends(lambda: router.data_access),    # type: ignore[attr-defined]
-    _: None = Depends(Validator.validate_token),
-    bustCache: bool = Query(default=False)
+    data: AsyncDataAccess = Depends(_data_access),
+    _: str = Depends(_authorize),
+    bustCache: bool = Query(default=False),
 ):
+    # read directly rather than as a Header() parameter, which FastAPI would parse on every hit
+    if_none_match = request.headers.get("if-none-match")
     national = payload.NationalNumber.strip()
     ctx = {"nationalNumber": national}
     logger: DBLogger = router.db_logger                                 # type: ignore[attr-defined]
+    key = _cache_key(national)
+
+    if bustCache:
+        CACHE_LOOKUPS.inc("bypass")
+        # drop both entries first so other workers on a shared backend stop serving them
+        # even if the reload below fails
+        await _cache.run(invalidate, (national,))
+        _start_deadline()
+        return _raw_json(await _load(national, data, logger), if_none_match)
+
+    with STAGE_LATENCY.time("cache_lookup"):
+        cached, rejected, stale = await _cache.run(_lookup, key)
+    if cached:
+        CACHE_LOOKUPS.inc("hit")
+        logger.log("INFO", "cache_hit", ctx)
+        return _raw_json(cached, if_none_match)
+    if rejected:
+        CACHE_LOOKUPS.inc("negative_hit")
+        code, detail = rejected
+        logger.log("INFO", "negative_cache_hit", {**ctx, "status": code})
+        raise HTTPException(status_code=code, detail=detail)
+    if stale:
+        CACHE_LOOKUPS.inc("stale_hit")
+        _refresh_in_background(national, data, logger)
+        logger.log("INFO", "cache_stale_hit", ctx)
+        return _raw_json(stale, if_none_match)
+
+    CACHE_LOOKUPS.inc("miss")
+    _start_deadline()
+    try:
+        # Concurrent misses for the same national number share one DB round trip + computation
+        return _raw_json(await _flight.do(key, lambda: _load(national, data, logger)), if_none_match)
+    except CircuitOpenError:
+        # the database is failing: an expired response beats a 503
+        fallback = await _cache.run(_cache.get_fallback, key)
+        if fallback is None:
+            raise
+        CACHE_LOOKUPS.inc("fallback")
+        logger.log("WARN", "cache_fallback", ctx)
+        return _raw_json(fallback, if_none_match)
+
+def _lookup(key: str) -> tuple:
+    """(fresh, rejected, stale) entries for `key`; each lookup only runs when the previous one missed."""
+    cached = _cache.get(key)
+    rejected = _negative_cache.get(key) if not cached and _negative_cache.ttl else None
+    stale = _cache.get_stale(key) if not cached and not rejected and _cache.stale_ttl else None
+    return cached, rejected, stale
+
+def _refresh_in_background(national: str, data: AsyncDataAccess, logger: DBLogger):
+    key = _cache_key(national)
+    if _flight.in_flight(key):
+        return
+
+    async def refresh():
+        try:
+            await _flight.do(key, lambda: _load(national, data, logger))
+        except (Overloaded, CircuitOpenError):
+            pass                          # keep serving the stale copy until the DB has room again
+        except HTTPException:
+            # the employee no longer qualifies; stop serving the stale copy
+            await _cache.run(_cache.delete, key)
+        except Exception as exc:
+            logger.log("ERROR", "cache_refresh_failed", {"nationalNumber": national, "error": type(exc).__name__})
+
+    task = asyncio.create_task(refresh())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+def _digest(fields: bytes) -> str:
+    return hashlib.blake2b(fields, digest_size=12).hexdigest()
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+def _raw_json(entry: tuple[bytes, str, str], if_none_match: str | None = None) -> Response:
+    """
+    A cached (FlatGetEmpStatusResponse bytes, ETag, LastUpdated) entry: skips response_model
+    validation and re-encoding. A matching If-None-Match gets a bodiless 304 instead.
+    """
+    body, etag = entry[0], entry[1]
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+def _now() -> datetime:
+    # whole seconds: what LastUpdated shows is exactly what response_versions stores
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+def _utc_text(moment: datetime) -> str:
+    """YYYY-MM-DDTHH:MM:SSZ; naive values (SQLite) are UTC already."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _response(username: str, national: str, highest: Decimal, avg_after_tax: Decimal, status_str: str) -> dict:
+    """The response fields derived from the data; LastUpdated is added by the caller."""
+    return {
+        "EmployeeName": username,
+        "NationalNumber": national,
+        "HighestSalary": float(highest),
+        "AverageSalary": round(float(avg_after_tax), 2),
+        "Status": status_str,
+        "IsActive": True,       # inactive users never reach a success response
+    }
+
+async def _publish(data: AsyncDataAccess, bodies: dict[str, dict],
+                   generation: int) -> dict[str, tuple[bytes, str, str]]:
+    """
+    Stamp each body's LastUpdated with when its content was first produced (the digest's
+    first_seen in response_versions, shared by every worker), then encode and cache it
+    with its ETag: a weak tag of that digest, so the same data has the same ETag on every
+    worker however often it is recomputed. Content whose previous cache entry is still
+    kept with the same ETag reuses that entry's LastUpdated without a database round trip.
+    Nothing is cached when an invalidation ran after `generation` was noted.
+    """
+    if not bodies:
+        return {}
+    now = _now()
+    digests = {n: _digest(_encode(b)) for n, b in bodies.items()}
+    etags = {n: f'W/"{d}"' for n, d in digests.items()}
+    last_updated = await _cache.run(_kept_versions, etags)
+    unknown = {n: d for n, d in digests.items() if n not in last_updated}
+    if unknown:
+        try:
+            first_seen = await data.resolve_versions(unknown, now)
+        except Exception:
+            # the figures are already computed: a request-time LastUpdated beats failing the request
+            first_seen = {}
+        last_updated.update((n, _utc_text(first_seen.get(n, now))) for n in unknown)
+    out = {}
+    for national, body in bodies.items():
+        body["LastUpdated"] = last_updated[national]
+        out[national] = (_encode(body), etags[national], last_updated[national])
+    await _cache.run(_store, out, generation)
+    return out
+
+def _kept_versions(etags: dict[str, str]) -> dict[str, str]:
+    """LastUpdated of cache entries (fresh, or expired but still kept) that carry the same ETag."""
+    out = {}
+    for national, etag in etags.items():
+        entry = _cache.get_fallback(_cache_key(national))
+        if entry is not None and entry[1] == etag:
+            out[national] = entry[2]
+    return out
+
+def _store(entries: dict[str, tuple[bytes, str, str]], generation: int):
+    if generation != _generation:
+        return
+    for national, entry in entries.items():
+        _cache.set(_cache_key(national), entry)
+        _negative_cache.delete(_cache_key(national))
+    if generation != _generation:
+        # an invalidation ran while storing and may have missed these keys
+        for national in entries:
+            _cache.delete(_cache_key(national))
 
-    if not bustCache:
-        cached = _cache.get(_cache_key(national))
-        if cached:
-            logger.log("INFO", "cache_hit", ctx)
-            return cached
+def _remember_rejections(rejected: dict[str, HTTPException], generation: int):
+    """Negative-cache the 404/406/422 outcomes of _evaluate (see _store for `generation`)."""
+    if _negative_cache.ttl and generation == _generation:
+        for national, exc in rejected.items():
+            _negative_cache.set(_cache_key(national), (exc.status_code, exc.detail))
+        if generation != _generation:
+            for national in rejected:
+                _negative_cache.delete(_cache_key(national))
 
-    user = data.get_user_by_national(national)
-    if user is None:
+async def _load(national: str, data: AsyncDataAccess, logger: DBLogger) -> tuple[bytes, str, str]:
+    """Read the employee, apply the business rules and cache the encoded response and its ETag."""
+    generation = _generation
+    if settings.STATUS_TABLE_ENABLED:
+        with STAGE_LATENCY.time("db_materialized"):
+            async with _db_limiter.slot():
+                row = await data.get_materialized_status(national)
+        if row is not None:
+            body = _response(row.username, row.national_number, row.highest, row.average_after_tax, row.status)
+            logger.log("INFO", "success", {"nationalNumber": national, "count": row.count,
+                                           "status": row.status, "materialized": True})
+            return (await _publish(data, {national: body}, generation))[national]
+    with STAGE_LATENCY.time("db_fetch"):
+        async with _db_limiter.slot():
+            snap = await data.get_employee_snapshot(national)
+    try:
+        body = _evaluate(national, snap, logger)
+    except HTTPException as exc:
+        await _negative_cache.run(_remember_rejections, {national: exc}, generation)
+        raise
+    return (await _publish(data, {national: body}, generation))[national]
+
+def _compute(salaries: list[tuple[int, int]]) -> tuple[dict, str]:
+    if settings.METRICS_ENGINE == "cents":
+        metrics = ProcessStatus.compute_metrics_cents(salaries)
+    else:
+        metrics = ProcessStatus.compute_metrics([(m, from_cents(c)) for (m, c) in salaries])
+    return metrics, ProcessStatus.status_from_average(metrics["averageAfterTax"])
+
+def _evaluate(national: str, snap: EmployeeSnapshot | None, logger: DBLogger) -> dict:
+    """Business rules on a fetched snapshot; returns the response fields (see _publish) or raises the 404/406/422."""
+    ctx = {"nationalNumber": national}
+    if snap is None:
         logger.log("WARN", "user_not_found", ctx)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid National Number")
-    if not user.is_active:
+    if not snap.is_active:
         logger.log("WARN", "user_inactive", ctx)
         raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail="User is not Active")
 
-    rows = data.get_salaries_for_user(user.id)
-    if len(rows) < 3:
-        logger.log("WARN", "insufficient_salary_rows", {**ctx, "count": len(rows)})
+    if len(snap.salaries) < 3:
+        logger.log("WARN", "insufficient_salary_rows", {**ctx, "count": len(snap.salaries)})
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="INSUFFICIENT_DATA")
 
-    month_amounts = [(r.month, Decimal(str(r.amount))) for r in rows]
-    metrics = ProcessStatus.compute_metrics(month_amounts)
-    status_str = ProcessStatus.status_from_average(Decimal(str(metrics["averageAfterTax"])))
-
-    avg = float(metrics.get("averageAfterTax", metrics["average"]))
-    last_updated = (
-        datetime.now(timezone.utc)
-        .replace(microsecond=0)
-        .isoformat()
-        .replace("+00:00", "Z")
-    )
-    resp = {
-        "EmployeeName": user.username,
-        "NationalNumber": user.national_number,
-        "HighestSalary": float(metrics["highest"]),
-        "AverageSalary": round(avg, 2),
-        "Status": status_str,
-        "IsActive": bool(user.is_active),
-        "LastUpdated": last_updated,
-    }
-    _cache.set(_cache_key(national), resp)
+    with STAGE_LATENCY.time("compute_metrics"):
+        metrics, status_str = _compute(snap.salaries)
+
     logger.log("INFO", "success", {**ctx, "count": metrics["count"], "status": status_str})
-    return resp
+    return _response(snap.username, snap.national_number, metrics["highest"],
+                     metrics.get("averageAfterTax", metrics["average"]), status_str)
+
+@router.post("/GetEmpStatus/batch", response_model=GetEmpStatusBatchResponse, responses={
+    401: {"model": ErrorOut},
+})
+async def get_emp_status_batch(
+    payload: GetEmpStatusBatchRequest,
+    data: AsyncDataAccess = Depends(_data_access),
+    _: str = Depends(_authorize),
+    bustCache: bool = Query(default=False)
+):
+    """
+    Per-item results for many national numbers. Cached items (positive and negative)
+    are answered from `_cache`; the rest are fetched with set-based queries and cached.
+    """
+    logger: DBLogger = router.db_logger                                 # type: ignore[attr-defined]
+    nationals = [n.strip() for n in payload.NationalNumbers]
+    outcomes: dict[str, dict] = {}
+    missing: list[str] = []
+
+    def lookup_all():
+        for national in dict.fromkeys(nationals):
+            key = _cache_key(national)
+            if not bustCache:
+                cached = _cache.get(key)
+                if cached:
+                    outcomes[national] = {"NationalNumber": national, "StatusCode": 200, "Result": _decode(cached[0])}
+                    continue
+                rejected = _negative_cache.get(key) if _negative_cache.ttl else None
+                if rejected:
+                    code, detail = rejected
+                    outcomes[national] = {"NationalNumber": national, "StatusCode": code, "error": detail}
+                    continue
+            missing.append(national)
+    await _cache.run(lookup_all)
+
+    snaps: dict | None = {}
+    generation = _generation
+    if missing:
+        _start_deadline()
+        try:
+            async with _db_limiter.slot():
+                snaps = await data.get_employee_snapshots(missing)
+        except CircuitOpenError:
+            snaps = None
+    bodies, rejected = {}, {}
+    if snaps is None:
+        outcomes.update(await _cache.run(lambda: {n: _fallback_outcome(n) for n in missing}))
+    else:
+        for national in missing:
+            try:
+                bodies[national] = _evaluate(national, snaps.get(national), logger)
+            except HTTPException as exc:
+                rejected[national] = exc
+                outcomes[national] = {"NationalNumber": national, "StatusCode": exc.status_code, "error": exc.detail}
+    await _negative_cache.run(_remember_rejections, rejected, generation)
+    await _publish(data, bodies, generation)
+    for national, body in bodies.items():
+        outcomes[national] = {"NationalNumber": national, "StatusCode": 200, "Result": body}
+
+    logger.log("INFO", "batch", {"items": len(nationals), "cacheHits": len(outcomes) - len(missing),
+                                 "fetched": len(missing)})
+    return {"Results": [outcomes[n] for n in nationals]}
+
+def _fallback_outcome(national: str) -> dict:
+    """Batch item while the DB circuit is open: the expired cached response if kept, else 503."""
+    cached = _cache.get_fallback(_cache_key(national))
+    if cached:
+        CACHE_LOOKUPS.inc("fallback")
+        return {"NationalNumber": national, "StatusCode": 200, "Result": _decode(cached[0])}
+    return {"NationalNumber": national, "StatusCode": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "error": "Database unavailable"}
+
+@router.post("/admin/cache/invalidate", response_model=CacheInvalidateResponse, responses={
+    401: {"model": ErrorOut},
+    403: {"model": ErrorOut},
+})
+async def invalidate_cache(
+    payload: CacheInvalidateRequest,
+    _: str = Depends(_authorize_admin),
+):
+    """
+    Evict cached responses after out-of-band writes (SQL scripts, other services).
+    With a shared CACHE_BACKEND the eviction applies to every worker, so only the token
+    ids in ADMIN_TOKEN_IDS may call it.
+    """
+    logger: DBLogger = router.db_logger                                 # type: ignore[attr-defined]
+    if payload.All:
+        count = await _cache.run(_invalidate_all)
+    else:
+        count = await _cache.run(invalidate, dict.fromkeys(n.strip() for n in payload.NationalNumbers))
+    logger.log("INFO", "cache_invalidated", {"all": payload.All, "count": count})
+    return {"Invalidated": count}
+
+def _invalidate_all() -> int:
+    # keys(), not len(): a shared backend also holds other namespaces (and Redis counts the whole DB)
+    count = len(_cache.keys())
+    _next_generation()
+    _cache.clear()
+    _negative_cache.clear()
+    return count
+
+_EXPORT_FIELDS = ["UserId", "EmployeeName", "NationalNumber", "HighestSalary", "AverageSalary",
+                  "Status", "IsActive", "LastUpdated"]
+# exports in progress on this worker; each holds a pooled connection for its whole run
+_exports_running = 0
+
+@router.get("/EmpStatus/export", responses={
+    200: {"content": {"application/x-ndjson": {}, "text/csv": {}}},
+    401: {"model": ErrorOut},
+    503: {"model": ErrorOut},
+})
+async def export_emp_status(
+    data: AsyncDataAccess = Depends(_data_access),
+    _: str = Depends(_authorize),
+    format: Literal["ndjson", "csv"] = Query(default="ndjson"),
+    after_user_id: int = Query(default=0, ge=0, description="Resume after this UserId"),
+):
+    """
+    Every employee GetEmpStatus would answer with 200, in UserId order, streamed from one
+    server-side cursor. Each record is the single-endpoint shape plus `UserId`; pass the
+    last UserId received as `after_user_id` to resume an interrupted export. At most
+    EXPORT_MAX_CONCURRENT run at once (503 beyond that).
+    """
+    global _exports_running
+    logger: DBLogger = router.db_logger                                 # type: ignore[attr-defined]
+    if settings.EXPORT_MAX_CONCURRENT and _exports_running >= settings.EXPORT_MAX_CONCURRENT:
+        REQUESTS_SHED.inc("export_limit")
+        raise Overloaded()
+    _exports_running += 1
+    released = False
+
+    def release():
+        global _exports_running
+        nonlocal released
+        if not released:
+            released = True
+            _exports_running -= 1
+
+    batches = data.iter_active_snapshots(after_user_id)
+    try:
+        # fetched before the response starts, so an open circuit is still a clean 503
+        first = await anext(batches, None)
+    except BaseException:
+        release()
+        raise
+
+    async def records():
+        exported = 0
+        last_user_id = after_user_id
+        try:
+            if format == "csv":
+                yield _csv_line(_EXPORT_FIELDS).encode()
+            batch = first
+            while batch is not None:
+                lines = []
+                now = _now()
+                bodies = {}
+                for snap in batch:
+                    if len(snap.salaries) < 3:
+                        continue
+                    metrics, status_str = _compute(snap.salaries)
+                    bodies[snap.user_id] = _response(snap.username, snap.national_number, metrics["highest"],
+                                                     metrics["averageAfterTax"], status_str)
+                try:
+                    stored = await data.get_versions([b["NationalNumber"] for b in bodies.values()])
+                except Exception:
+                    stored = {}
+                for user_id, body in bodies.items():
+                    # read-only: the first-seen time GetEmpStatus recorded, if the figures still match
+                    digest, first_seen = stored.get(body["NationalNumber"], (None, now))
+                    body["LastUpdated"] = _utc_text(first_seen if digest == _digest(_encode(body)) else now)
+                    rec = {"UserId": user_id, **body}
+                    lines.append(_csv_line([rec[f] for f in _EXPORT_FIELDS]).encode() if format == "csv"
+                                 else _encode(rec) + b"\n")
+                exported += len(lines)
+                last_user_id = batch[-1].user_id
+                if lines:
+                    yield b"".join(lines)
+                batch = await anext(batches, None)
+        finally:
+            await batches.aclose()
+            release()
+            logger.log("INFO", "export", {"format": format, "afterUserId": after_user_id,
+                                          "records": exported, "lastUserId": last_user_id})
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    # the background task also frees the slot if the stream never started (client gone)
+    return StreamingResponse(records(), media_type=media_type, background=BackgroundTask(release))
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerow(values)
+    return buf.getvalue()
@@ -1,14 +1,18 @@
 from pathlib import Path
 from sqlalchemy import text
 from .data_access import DataAccess
-from .models import Base
+from .models import Base, Log, Salary
 
 SEED_SQL_PATH = Path(__file__).resolve().parent.parent / "db" / "seed.sql"
 
 def init_database(data_access):
     Base.metadata.create_all(data_access.engine)
+    # create_all skips existing tables, so indexes added later need their own pass
+    for table in (Log.__table__, Salary.__table__):
+        for index in table.indexes:
+            index.create(data_access.engine, checkfirst=True)
 
-    seed_sql = Path("db/seed.sql")
+    seed_sql = SEED_SQL_PATH
     if not seed_sql.exists():
         return
 
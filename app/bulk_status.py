@@ -0,0 +1,149 @@
+"""
+Bulk status engine: metrics and GREEN/ORANGE/RED for every active employee in one pass.
+
+Amounts are integer cents. Month adjustments are integer factors (x110 December,
+x95 June-August, x100 otherwise), so adjusted values are exact in units of 1/10000
+and each rounding step reproduces compute_metrics' ROUND_HALF_UP exactly.
+
+    python -m app.bulk_status --out statuses.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+from sqlalchemy import select
+
+from .data_access import DataAccess, IN_CHUNK, AMOUNT_CENTS
+from .models import User, Salary
+from .process_status import MONTH_FACTORS, from_cents
+
+MONTH_FACTOR = np.array(MONTH_FACTORS, dtype=np.int64)
+
+SCALE = 100                   # adjusted values are cents * SCALE (units of 1/10000)
+TAX_THRESHOLD = 10_000 * 100 * SCALE
+STATUS_LABELS = np.array(["RED", "ORANGE", "GREEN"])
+ORANGE_AVG_CENTS = 2000 * 100
+
+
+def _round_half_up(num: np.ndarray, den) -> np.ndarray:
+    """num / den rounded half away from zero (Decimal ROUND_HALF_UP), for den > 0."""
+    q = (np.abs(num) * 2 + den) // (2 * den)
+    return np.where(num < 0, -q, q)
+
+
+def compute_bulk(user_ids: np.ndarray, months: np.ndarray, cents: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Per-user metrics from flat salary arrays (any order). Money values in the result are
+    int64 cents; `status` holds the GREEN/ORANGE/RED labels.
+    """
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    if user_ids.size == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return {"user_id": empty, "count": empty, "sum": empty, "sumAfterTax": empty, "average": empty,
+                "averageAfterTax": empty, "highest": empty, "status": np.empty(0, dtype=STATUS_LABELS.dtype)}
+
+    order = np.argsort(user_ids, kind="stable")
+    uid = user_ids[order]
+    adjusted = np.asarray(cents, dtype=np.int64)[order] * MONTH_FACTOR[np.asarray(months, dtype=np.int64)[order]]
+
+    starts = np.flatnonzero(np.r_[True, uid[1:] != uid[:-1]])
+    count = np.diff(np.r_[starts, uid.size])
+    total = np.add.reduceat(adjusted, starts)
+    highest = np.maximum.reduceat(adjusted, starts)
+
+    sum_after_tax = np.where(
+        total > TAX_THRESHOLD,
+        _round_half_up(total * 93, 100 * SCALE),       # 7% deduction, then round to cents
+        _round_half_up(total, SCALE),
+    )
+    avg_after_tax = _round_half_up(sum_after_tax, count)
+    status = STATUS_LABELS[np.sign(avg_after_tax - ORANGE_AVG_CENTS) + 1]
+
+    return {
+        "user_id": uid[starts],
+        "count": count,
+        "sum": _round_half_up(total, SCALE),
+        "sumAfterTax": sum_after_tax,
+        "average": _round_half_up(total, SCALE * count),
+        "averageAfterTax": avg_after_tax,
+        "highest": _round_half_up(highest, SCALE),
+        "status": status,
+    }
+
+
+def fetch_active_salaries(conn, user_ids: list[int] | None = None,
+                          chunk_size: int = 200_000) -> tuple[np.ndarray, ...]:
+    """
+    (user_ids, months, cents) for every salary row of an active user, optionally only for
+    `user_ids`; cents are computed in SQL so no Decimal objects are built.
+    """
+    base = (
+        select(Salary.user_id, Salary.month, AMOUNT_CENTS)
+        .join(User, User.id == Salary.user_id)
+        .where(User.is_active.is_(True))
+    )
+    if user_ids is None:
+        stmts = [base]
+    else:
+        stmts = [base.where(Salary.user_id.in_(user_ids[i:i + IN_CHUNK])) for i in range(0, len(user_ids), IN_CHUNK)]
+    parts = []
+    for stmt in stmts:
+        result = conn.execution_options(stream_results=True).execute(stmt)
+        while rows := result.fetchmany(chunk_size):
+            parts.append(np.array(rows, dtype=np.int64))
+    if not parts:
+        return tuple(np.empty(0, dtype=np.int64) for _ in range(3))
+    flat = np.concatenate(parts)
+    return flat[:, 0], flat[:, 1], flat[:, 2]
+
+
+def load_active_salaries(data_access: DataAccess, chunk_size: int = 200_000) -> tuple[np.ndarray, ...]:
+    with data_access.engine.connect() as conn:
+        return fetch_active_salaries(conn, chunk_size=chunk_size)
+
+
+def compute_all(data_access: DataAccess) -> dict[str, np.ndarray]:
+    return compute_bulk(*load_active_salaries(data_access))
+
+
+def to_decimal(cents) -> Decimal:
+    """Cents as a 2-dp Decimal, identical to the quantized values compute_metrics returns."""
+    return from_cents(int(cents))
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Compute GetEmpStatus metrics for every active employee.")
+    ap.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///./local.db"))
+    ap.add_argument("--min-rows", type=int, default=3, help="skip employees with fewer salary rows")
+    ap.add_argument("--out", help="CSV output path (default: stdout)")
+    args = ap.parse_args(argv)
+
+    da = DataAccess(args.database_url)
+    t0 = time.perf_counter()
+    res = compute_all(da)
+    elapsed = time.perf_counter() - t0
+
+    with da.engine.connect() as conn:
+        names = dict(conn.execute(select(User.id, User.national_number).where(User.is_active.is_(True))).all())
+    money = ("highest", "sum", "sumAfterTax", "average", "averageAfterTax")
+    out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    try:
+        w = csv.writer(out)
+        w.writerow(["user_id", "national_number", "count", *money, "status"])
+        keep = np.flatnonzero(res["count"] >= args.min_rows)
+        for i in keep:
+            uid = int(res["user_id"][i])
+            w.writerow([uid, names.get(uid, ""), int(res["count"][i]),
+                        *(to_decimal(res[k][i]) for k in money), res["status"][i]])
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"computed {res['user_id'].size} employees in {elapsed:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
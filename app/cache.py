@@ -1,25 +1,641 @@
+import asyncio
+import base64
+import json
+import socket
+import sqlite3
+import sys
+import threading
 import time
-from typing import Any
-from threading import RLock
- 
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Protocol
+from threading import Lock
+from urllib.parse import urlsplit
+
+
+def _approx_size(value: Any) -> int:
+    """Rough deep size in bytes of a cached value (dicts/lists/tuples of scalars)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_size(v) for v in value)
+    return size
+
+
+def encode_value(value: Any) -> bytes:
+    """JSON encoding for shared backends; bytes survive as {"__b64__": ...}."""
+    return json.dumps(value, separators=(",", ":"), default=_encode_default).encode()
+
+
+def decode_value(raw: bytes) -> Any:
+    return json.loads(raw, object_hook=_decode_hook)
+
+
+def _encode_default(obj):
+    if isinstance(obj, (bytes, bytearray)):
+        return {"__b64__": base64.b64encode(obj).decode("ascii")}
+    raise TypeError(f"cannot cache {type(obj).__name__}")
+
+
+def _decode_hook(obj: dict):
+    if len(obj) == 1 and "__b64__" in obj:
+        return base64.b64decode(obj["__b64__"])
+    return obj
+
+
+class CacheBackend(Protocol):
+    """
+    Storage behind TTLCache. `get` returns the value if it was stored at most `max_age`
+    seconds ago (None otherwise); `stale=True` lookups are counted as stale hits rather
+    than hits/misses. `set` keeps the value for at most `keep_for` seconds. `blocking`
+    backends do I/O (file locks, sockets), so coroutines call them off the event loop
+    (see TTLCache.run).
+    """
+    blocking: bool
+    def get(self, key: str, max_age: float, stale: bool = False) -> Any: ...
+    def set(self, key: str, value: Any, keep_for: float) -> None: ...
+    def delete(self, key: str) -> None: ...
+    def clear(self, prefix: str = "") -> None: ...
+    def keys(self, prefix: str = "") -> list[str]: ...
+    def sweep(self) -> int: ...
+    def stats(self) -> dict: ...
+    def __len__(self) -> int: ...
+
+
+class _Stripe:
+    __slots__ = ("lock", "entries", "bytes", "last_sweep",
+                 "hits", "misses", "stale_hits", "evictions", "expirations")
+
+    def __init__(self):
+        self.lock = Lock()
+        # key -> (stored_at, expires_at, value, size)
+        self.entries: OrderedDict[str, tuple[float, float, Any, int]] = OrderedDict()
+        self.bytes = 0
+        self.last_sweep = time.monotonic()
+        self.hits = self.misses = self.stale_hits = self.evictions = self.expirations = 0
+
+
+class MemoryBackend:
+    """
+    Per-process LRU store.
+
+    - `max_entries` / `max_bytes` cap memory; the least recently used entry is evicted first
+      (0 disables a limit).
+    - Expired entries are dropped on read and by a periodic sweep piggybacked on writes,
+      so keys that are never read again do not linger.
+    - Keys are spread over `stripes` independently locked segments to cut lock contention.
+    """
+    blocking = False
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 0,
+        stripes: int = 1,
+        sweep_interval: float = 60,
+        sizeof: Callable[[Any], int] = _approx_size,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._sizeof = sizeof
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        n = len(self._stripes)
+        self._entries_per_stripe = -(-max_entries // n) if max_entries else 0
+        self._bytes_per_stripe = -(-max_bytes // n) if max_bytes else 0
+
+    def _stripe(self, key: str) -> _Stripe:
+        stripes = self._stripes
+        return stripes[0] if len(stripes) == 1 else stripes[hash(key) % len(stripes)]
+
+    def get(self, key: str, max_age: float, stale: bool = False):
+        s = self._stripe(key)
+        with s.lock:
+            entry = s.entries.get(key)
+            if entry is None:
+                if not stale:
+                    s.misses += 1
+                return None
+            now = time.monotonic()
+            if now - entry[0] > max_age:
+                if now > entry[1]:
+                    self._remove(s, key)
+                    s.expirations += 1
+                if not stale:
+                    s.misses += 1
+                return None
+            if stale:
+                s.stale_hits += 1
+            else:
+                s.entries.move_to_end(key)
+                s.hits += 1
+            return entry[2]
+
+    def set(self, key: str, value: Any, keep_for: float):
+        size = self._sizeof(value) if self.max_bytes else 0
+        s = self._stripe(key)
+        with s.lock:
+            now = time.monotonic()
+            if key in s.entries:
+                self._remove(s, key)
+            s.entries[key] = (now, now + keep_for, value, size)
+            s.bytes += size
+            if self.sweep_interval and now - s.last_sweep >= self.sweep_interval:
+                self._sweep(s, now)
+            self._evict(s)
+
+    def delete(self, key: str):
+        s = self._stripe(key)
+        with s.lock:
+            if key in s.entries:
+                self._remove(s, key)
+
+    def clear(self, prefix: str = ""):
+        for s in self._stripes:
+            with s.lock:
+                if not prefix:
+                    s.entries.clear()
+                    s.bytes = 0
+                    continue
+                for k in [k for k in s.entries if k.startswith(prefix)]:
+                    self._remove(s, k)
+
+    def keys(self, prefix: str = "") -> list[str]:
+        """Unexpired keys under `prefix`, most recently used first within each stripe."""
+        out: list[str] = []
+        now = time.monotonic()
+        for s in self._stripes:
+            with s.lock:
+                out.extend(k for k, entry in reversed(s.entries.items()) if k.startswith(prefix) and now <= entry[1])
+        return out
+
+    def sweep(self) -> int:
+        removed = 0
+        for s in self._stripes:
+            with s.lock:
+                removed += self._sweep(s, time.monotonic())
+        return removed
+
+    def stats(self) -> dict:
+        out = {"hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0, "expirations": 0, "entries": 0, "bytes": 0}
+        for s in self._stripes:
+            with s.lock:
+                out["hits"] += s.hits
+                out["misses"] += s.misses
+                out["stale_hits"] += s.stale_hits
+                out["evictions"] += s.evictions
+                out["expirations"] += s.expirations
+                out["entries"] += len(s.entries)
+                out["bytes"] += s.bytes
+        return out
+
+    def __len__(self) -> int:
+        return sum(len(s.entries) for s in self._stripes)
+
+    # -- internals; caller holds the stripe lock --
+
+    def _remove(self, s: _Stripe, key: str):
+        s.bytes -= s.entries.pop(key)[3]
+
+    def _sweep(self, s: _Stripe, now: float) -> int:
+        expired = [k for k, entry in s.entries.items() if now > entry[1]]
+        for k in expired:
+            self._remove(s, k)
+        s.expirations += len(expired)
+        s.last_sweep = now
+        return len(expired)
+
+    def _evict(self, s: _Stripe):
+        while s.entries and (
+            (self._entries_per_stripe and len(s.entries) > self._entries_per_stripe)
+            or (self._bytes_per_stripe and s.bytes > self._bytes_per_stripe)
+        ):
+            key = next(iter(s.entries))
+            self._remove(s, key)
+            s.evictions += 1
+
+
+class _Counters:
+    """Hit/miss counters for shared backends; per process, like the Prometheus metrics."""
+    def __init__(self):
+        self._lock = Lock()
+        self.values = {"hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0, "expirations": 0, "errors": 0}
+
+    def inc(self, name: str, amount: int = 1):
+        with self._lock:
+            self.values[name] += amount
+
+    def lookup(self, found: bool, stale: bool):
+        if stale:
+            if found:
+                self.inc("stale_hits")
+        else:
+            self.inc("hits" if found else "misses")
+
+
+class SQLiteBackend:
+    """
+    Store shared by every worker on one host, in a WAL-mode SQLite file.
+
+    Timestamps are wall-clock so all processes agree on ages. Reads do not write, so
+    `max_entries` trims the oldest-written entries during the periodic sweep rather
+    than the least recently read ones. Storage errors count as misses.
+    """
+    blocking = True
+
+    def __init__(self, path: str, table: str = "response_cache", max_entries: int = 0,
+                 sweep_interval: float = 60, timeout: float = 5.0):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.timeout = timeout
+        self._local = threading.local()
+        self._last_sweep = time.monotonic()
+        self._counters = _Counters()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires_at ON {self.table} (expires_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, max_age: float, stale: bool = False):
+        try:
+            row = self._conn().execute(
+                f"SELECT stored_at, expires_at, value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            value = None
+            if row is not None:
+                now = time.time()
+                if now > row[1]:
+                    self._conn().execute(f"DELETE FROM {self.table} WHERE key = ? AND expires_at < ?", (key, now))
+                    self._counters.inc("expirations")
+                elif now - row[0] <= max_age:
+                    value = decode_value(row[2])
+        except sqlite3.Error:
+            self._counters.inc("errors")
+            value = None
+        self._counters.lookup(value is not None, stale)
+        return value
+
+    def set(self, key: str, value: Any, keep_for: float):
+        now = time.time()
+        try:
+            self._conn().execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, stored_at, expires_at, value) VALUES (?, ?, ?, ?)",
+                (key, now, now + keep_for, encode_value(value)),
+            )
+            if self.sweep_interval and time.monotonic() - self._last_sweep >= self.sweep_interval:
+                self.sweep()
+        except sqlite3.Error:
+            self._counters.inc("errors")
+
+    def delete(self, key: str):
+        try:
+            self._conn().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except sqlite3.Error:
+            self._counters.inc("errors")
+
+    def clear(self, prefix: str = ""):
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        try:
+            self._conn().execute(f"DELETE FROM {self.table} WHERE key LIKE ? ESCAPE '\\'", (pattern,))
+        except sqlite3.Error:
+            self._counters.inc("errors")
+
+    def keys(self, prefix: str = "") -> list[str]:
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        try:
+            rows = self._conn().execute(
+                f"SELECT key FROM {self.table} WHERE key LIKE ? ESCAPE '\\' AND expires_at >= ? ORDER BY stored_at DESC",
+                (pattern, time.time()),
+            ).fetchall()
+        except sqlite3.Error:
+            self._counters.inc("errors")
+            return []
+        return [k for (k,) in rows]
+
+    def sweep(self) -> int:
+        self._last_sweep = time.monotonic()
+        conn = self._conn()
+        removed = conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),)).rowcount
+        self._counters.inc("expirations", removed)
+        if self.max_entries:
+            over = len(self) - self.max_entries
+            if over > 0:
+                conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY stored_at LIMIT ?)", (over,)
+                )
+                self._counters.inc("evictions", over)
+        return removed
+
+    def stats(self) -> dict:
+        out = dict(self._counters.values)
+        try:
+            out["entries"] = len(self)
+        except sqlite3.Error:
+            out["entries"] = 0
+        out["bytes"] = 0
+        return out
+
+    def __len__(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend:
+    """
+    Store in Redis (or anything speaking RESP), shared by every worker and host.
+
+    A minimal client over one socket per thread: values are `[stored_at, value]` JSON with
+    a PX expiry, so Redis itself reclaims expired keys and `sweep()` is a no-op. Connection
+    errors count as misses and the socket is reopened on the next call.
+    """
+    blocking = True
+
+    def __init__(self, url: str = "redis://localhost:6379/0", socket_timeout: float = 1.0):
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"unsupported cache URL scheme: {parts.scheme!r}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.password = parts.password
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+        self._counters = _Counters()
+
+    # -- RESP plumbing --
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock, self._local.reader = sock, sock.makefile("rb")
+        try:
+            if self.password:
+                self._roundtrip("AUTH", self.password)
+            if self.db:
+                self._roundtrip("SELECT", str(self.db))
+        except BaseException:
+            self._close()                 # never keep a socket that is not authenticated / on the right DB
+            raise
+
+    def execute(self, *args: str | bytes):
+        if getattr(self._local, "sock", None) is None:
+            self._connect()
+        try:
+            return self._roundtrip(*args)
+        except (OSError, EOFError):
+            self._close()
+            raise
+
+    def _roundtrip(self, *args: str | bytes):
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else a.encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        self._local.sock.sendall(b"".join(out))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise EOFError("connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            return None if n < 0 else self._local.reader.read(n + 2)[:-2]
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read_reply() for _ in range(n)]
+        raise RedisError(f"unexpected reply: {line!r}")
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = self._local.reader = None
+        if sock is not None:
+            sock.close()
+
+    # -- backend API --
+
+    def get(self, key: str, max_age: float, stale: bool = False):
+        value = None
+        try:
+            raw = self.execute("GET", key)
+            if raw is not None:
+                stored_at, cached = decode_value(raw)
+                if time.time() - stored_at <= max_age:
+                    value = cached
+        except (OSError, EOFError, RedisError):
+            self._counters.inc("errors")
+        self._counters.lookup(value is not None, stale)
+        return value
+
+    def set(self, key: str, value: Any, keep_for: float):
+        try:
+            self.execute("SET", key, encode_value([time.time(), value]), "PX", str(max(1, int(keep_for * 1000))))
+        except (OSError, EOFError, RedisError):
+            self._counters.inc("errors")
+
+    def delete(self, key: str):
+        try:
+            self.execute("DEL", key)
+        except (OSError, EOFError, RedisError):
+            self._counters.inc("errors")
+
+    def clear(self, prefix: str = ""):
+        cursor = "0"
+        try:
+            while True:
+                cursor, keys = self.execute("SCAN", cursor, "MATCH", prefix + "*", "COUNT", "1000")
+                if keys:
+                    self.execute("DEL", *keys)
+                if cursor in (b"0", "0"):
+                    break
+        except (OSError, EOFError, RedisError):
+            self._counters.inc("errors")
+
+    def keys(self, prefix: str = "") -> list[str]:
+        out: list[str] = []
+        cursor = "0"
+        try:
+            while True:
+                cursor, keys = self.execute("SCAN", cursor, "MATCH", prefix + "*", "COUNT", "1000")
+                out.extend(k.decode() for k in keys)
+                if cursor in (b"0", "0"):
+                    return out
+        except (OSError, EOFError, RedisError):
+            self._counters.inc("errors")
+            return []
+
+    def sweep(self) -> int:
+        return 0
+
+    def stats(self) -> dict:
+        out = dict(self._counters.values)
+        try:
+            out["entries"] = len(self)
+        except (OSError, EOFError, RedisError):
+            out["entries"] = 0
+        out["bytes"] = 0
+        return out
+
+    def __len__(self) -> int:
+        return self.execute("DBSIZE")
+
+
+def open_backend(kind: str, url: str = "", **memory_options) -> CacheBackend:
+    """Backend named by CACHE_BACKEND; `url` is the SQLite file path or the redis:// URL."""
+    if kind == "memory":
+        return MemoryBackend(**memory_options)
+    if kind == "sqlite":
+        return SQLiteBackend(url or "response_cache.db", max_entries=memory_options.get("max_entries", 0),
+                             sweep_interval=memory_options.get("sweep_interval", 60))
+    if kind == "redis":
+        return RedisBackend(url or "redis://localhost:6379/0")
+    raise ValueError(f"unknown cache backend: {kind!r}")
+
+
 class TTLCache:
-    def __init__(self, ttl_seconds: int = 60):
+    """
+    TTL cache over a pluggable `CacheBackend` (default: a per-process `MemoryBackend`
+    built from the size options).
+
+    - With `stale_ttl`, entries outlive their TTL by that many seconds; `get` treats them as
+      misses but `get_stale` still returns them (stale-while-revalidate).
+    - With `fallback_ttl`, entries are kept that long past their TTL for `get_fallback`,
+      the last resort when the database cannot be reached.
+    - `namespace` prefixes every key so several caches can share one backend.
+    """
+    def __init__(
+        self,
+        ttl_seconds: int = 60,
+        stale_ttl: float = 0,
+        fallback_ttl: float = 0,
+        max_entries: int = 10_000,
+        max_bytes: int = 0,
+        stripes: int = 1,
+        sweep_interval: float | None = None,
+        sizeof: Callable[[Any], int] = _approx_size,
+        backend: CacheBackend | None = None,
+        namespace: str = "",
+    ):
         self.ttl = ttl_seconds
-        self.store: dict[str, tuple[float, Any]] = {}
-        self._lock = RLock()
+        self.stale_ttl = stale_ttl
+        self.fallback_ttl = fallback_ttl
+        # how long an entry stays in the backend after it is set
+        self._keep_for = ttl_seconds + max(stale_ttl, fallback_ttl)
+        self.namespace = namespace
+        self.backend = backend if backend is not None else MemoryBackend(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            stripes=stripes,
+            sweep_interval=ttl_seconds if sweep_interval is None else sweep_interval,
+            sizeof=sizeof,
+        )
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        `fn(*args)` from a coroutine, usually a few calls on this cache: inline for an
+        in-process backend, on a worker thread for a blocking one, so a locked SQLite file
+        or a slow Redis stalls only the request that waits for it, not the event loop.
+        """
+        if not self.backend.blocking:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
 
     def get(self, key: str):
-        with self._lock:
-            val = self.store.get(key)
-            if not val:
-                return None
-            t, data = val
-            if time.time() - t > self.ttl:
-                self.store.pop(key, None)
-                return None
-            return data
- 
+        return self.backend.get(self.namespace + key, self.ttl)
+
+    def get_stale(self, key: str):
+        """Value for `key` even if past its TTL, as long as it is inside the stale window."""
+        return self.backend.get(self.namespace + key, self.ttl + self.stale_ttl, stale=True)
+
+    def get_fallback(self, key: str):
+        """Value for `key` if it is still kept at all (TTL plus the stale or fallback window)."""
+        return self.backend.get(self.namespace + key, self._keep_for, stale=True)
 
     def set(self, key: str, value: Any):
-        with self._lock:
-            self.store[key] = (time.time(), value)
+        self.backend.set(self.namespace + key, value, self._keep_for)
+
+    def delete(self, key: str):
+        self.backend.delete(self.namespace + key)
+
+    def clear(self):
+        self.backend.clear(self.namespace)
+
+    def keys(self) -> list[str]:
+        """Keys currently cached in this namespace (without the namespace prefix)."""
+        n = len(self.namespace)
+        return [k[n:] for k in self.backend.keys(self.namespace)]
+
+    def sweep(self) -> int:
+        """Drop every expired entry now; returns how many were removed."""
+        return self.backend.sweep()
+
+    def stats(self) -> dict:
+        out = self.backend.stats()
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        return out
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+
+class SingleFlight:
+    """
+    Request coalescing for async loaders: while a computation for a key is running,
+    later callers for the same key await its result (or exception) instead of
+    starting their own.
+    """
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            fut.exception()         # mark retrieved: followers are optional
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
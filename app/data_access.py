@@ -1,14 +1,365 @@
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import sessionmaker
-from tenacity import retry, stop_after_attempt, wait_exponential
-from .models import Base, User, Salary
-from typing import List
+import asyncio
+import contextvars
+import functools
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from datetime import datetime
+from sqlalchemy import create_engine, event, select, exists, insert, update, cast, func, text, type_coerce, Integer, JSON
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+from .models import Base, User, Salary, EmployeeStatus, SalaryChange, Log, ResponseVersion
+from .metrics import DB_READS, DB_RETRIES, POOL_CHECKOUT
+from typing import Any, AsyncIterator, Callable, Iterator, List, NamedTuple
+
+class EmployeeSnapshot(NamedTuple):
+    """Plain-tuple view of a user and their salary rows (no ORM identity map)."""
+    user_id: int
+    username: str
+    national_number: str
+    is_active: bool
+    salaries: list[tuple[int, int]]   # (month, amount in cents)
+
+class MaterializedStatus(NamedTuple):
+    """A fresh employee_status row joined to its user."""
+    username: str
+    national_number: str
+    highest: Decimal
+    average_after_tax: Decimal
+    status: str
+    count: int
+
+def _as_decimal(amount) -> Decimal:
+    # Numeric columns already come back as Decimal; only other drivers need the str() hop
+    return amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+# amount is NUMERIC(12,2): whole cents, computed by the DB so no Decimal is built per row
+AMOUNT_CENTS = cast(func.round(Salary.amount * 100), Integer)
+
+class CircuitOpenError(Exception):
+    """Raised instead of querying while the circuit breaker is open."""
+    def __init__(self, retry_after: float):
+        super().__init__(f"database circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Fails reads fast while the database is failing, instead of letting every request
+    queue up and sleep through its retries.
+
+    Closed: outcomes are counted in one-second buckets over `window` seconds. Once at
+    least `min_calls` were seen and the failed share reaches `failure_ratio`, the breaker
+    opens and calls raise CircuitOpenError for `open_seconds`. Then it is half-open: a
+    single probe call goes through; success closes the breaker, failure re-opens it.
+    Only SQLAlchemy errors count as failures. `failure_ratio=0` disables the breaker.
+    """
+    def __init__(self, failure_ratio: float = 0.5, min_calls: int = 20, window: float = 10.0,
+                 open_seconds: float = 5.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.clock = clock
+        self.state = "closed"
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._buckets: deque[list] = deque()        # [second, calls, failures]
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_ratio > 0
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go to the database now."""
+        if self.state == "closed" or not self.enabled:
+            return
+        with self._lock:
+            if self.state == "open":
+                wait = self._opened_at + self.open_seconds - self.clock()
+                if wait > 0:
+                    raise CircuitOpenError(wait)
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    raise CircuitOpenError(self.open_seconds)
+                self._probing = True
+
+    def record(self, ok: bool):
+        if not self.enabled:
+            return
+        with self._lock:
+            now = self.clock()
+            if self.state == "half_open":
+                self._probing = False
+                if ok:
+                    self.state = "closed"
+                    self._buckets.clear()
+                else:
+                    self._open(now)
+                return
+            if self.state == "open":
+                return                     # a call admitted before the breaker opened
+            second = int(now)
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append([second, 0, 0])
+            self._buckets[-1][1] += 1
+            self._buckets[-1][2] += not ok
+            while self._buckets[0][0] <= now - self.window:
+                self._buckets.popleft()
+            if not ok:
+                calls = sum(b[1] for b in self._buckets)
+                failures = sum(b[2] for b in self._buckets)
+                if calls >= self.min_calls and failures >= self.failure_ratio * calls:
+                    self._open(now)
+
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened += 1
+        self._opened_at = now
+        self._buckets.clear()
+
+def _count_retry(retry_state):
+    DB_RETRIES.inc(retry_state.fn.__name__)
+
+# Absolute time.monotonic() by which the current request wants its answer. The API sets it
+# per request and AsyncDataAccess copies it to the worker thread; None means no budget.
+request_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("request_deadline", default=None)
+
+def _past_deadline(retry_state) -> bool:
+    # tenacity computes the backoff before asking stop, so a retry that would only
+    # wake up after the deadline is not attempted
+    deadline = request_deadline.get()
+    return deadline is not None and time.monotonic() + retry_state.upcoming_sleep >= deadline
+
+# 3 attempts with exponential backoff, cut short by the request deadline; an open circuit
+# is never retried. Every retry is counted in empstatus_db_retries_total
+_RETRY = dict(stop=stop_after_attempt(3) | _past_deadline,
+              wait=wait_exponential(multiplier=0.2, min=0.2, max=2),
+              retry=retry_if_not_exception_type(CircuitOpenError),
+              reraise=True, before_sleep=_count_retry)
+
+# Bound for IN (...) lists; keeps every statement under SQLite's host-parameter limit
+IN_CHUNK = 500
+
+def _insert_ignore(dialect: str, model):
+    """INSERT that skips rows whose key already exists (ON CONFLICT DO NOTHING / INSERT IGNORE)."""
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return insert(model).prefix_with("IGNORE")           # MySQL / MariaDB
+
+def _apply_sqlite_pragmas(engine, busy_timeout_ms: int, mmap_size: int, wal: bool):
+    """WAL lets the log writer and readers proceed concurrently; NORMAL sync is safe under WAL."""
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        if wal:
+            cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cur.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        cur.close()
+
+def _apply_statement_timeout(engine, timeout_ms: int):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"SET SESSION max_execution_time = {int(timeout_ms)}")
+        cur.close()
+
+def _make_engine(db_url: str, pool_size: int, max_overflow: int, pool_timeout: float, pool_recycle: int,
+                 pool_pre_ping: bool, statement_timeout_ms: int, sqlite_busy_timeout_ms: int,
+                 sqlite_mmap_size: int):
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+    memory_sqlite = backend == "sqlite" and url.database in (None, "", ":memory:")
+    connect_args: dict[str, Any] = {}
+    engine_args: dict[str, Any] = {"pool_pre_ping": pool_pre_ping, "pool_recycle": pool_recycle}
+    if backend == "sqlite":
+        connect_args["check_same_thread"] = False
+    elif backend == "postgresql" and statement_timeout_ms:
+        connect_args["options"] = f"-c statement_timeout={int(statement_timeout_ms)}"
+    if not memory_sqlite:
+        engine_args.update(poolclass=QueuePool, pool_size=pool_size, max_overflow=max_overflow,
+                           pool_timeout=pool_timeout)
+    engine = create_engine(db_url, echo=False, future=True, connect_args=connect_args, **engine_args)
+    if backend == "sqlite":
+        _apply_sqlite_pragmas(engine, sqlite_busy_timeout_ms, sqlite_mmap_size, wal=not memory_sqlite)
+    elif backend in ("mysql", "mariadb") and statement_timeout_ms:
+        _apply_statement_timeout(engine, statement_timeout_ms)
+    return engine
+
+class _Replica:
+    """A read replica; after a failure it is skipped for `retry_after` seconds, then re-probed."""
+    def __init__(self, name: str, engine, retry_after: float):
+        self.name = name
+        self.engine = engine
+        self.retry_after = retry_after
+        self.healthy = True
+        self.down_until = 0.0
+
+    def mark_down(self):
+        self.healthy = False
+        self.down_until = time.monotonic() + self.retry_after
+
+    def probe(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except DBAPIError:
+            self.mark_down()
+            return False
+        self.healthy = True
+        return True
+
+    def available(self) -> bool:
+        if self.healthy:
+            return True
+        return time.monotonic() >= self.down_until and self.probe()
 
 class DataAccess:
-    def __init__(self, db_url: str):
-        connect_args = {"check_same_thread": False} if db_url.startswith("sqlite") else {}
-        self.engine = create_engine(db_url, echo=False, future=True, connect_args=connect_args)
+    """
+    Engine, sessions and the read queries behind the API.
+
+    Pool options only apply to pooled (QueuePool) engines; in-memory SQLite keeps its
+    per-thread pool. `statement_timeout_ms` is enforced server-side on Postgres and MySQL;
+    SQLite has no statement timeout and gets `busy_timeout_ms` plus WAL instead.
+
+    `engine`/`SessionLocal` always point at the primary, so writes (logs, seeding, the
+    status refresh) stay there. The read methods are spread round-robin over
+    `replica_urls`; a replica that fails is skipped for `replica_retry_seconds` and the
+    read is answered by the primary instead.
+
+    Every read goes through `breaker` (off unless given one): while it is open, reads
+    raise CircuitOpenError at once instead of reaching the database.
+    """
+    def __init__(
+        self,
+        db_url: str,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_timeout_ms: int = 0,
+        sqlite_busy_timeout_ms: int = 5000,
+        sqlite_mmap_size: int = 256 * 1024 * 1024,
+        replica_urls: list[str] | tuple[str, ...] = (),
+        replica_retry_seconds: float = 5.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        engine_options = dict(
+            pool_size=pool_size, max_overflow=max_overflow, pool_timeout=pool_timeout, pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping, statement_timeout_ms=statement_timeout_ms,
+            sqlite_busy_timeout_ms=sqlite_busy_timeout_ms, sqlite_mmap_size=sqlite_mmap_size,
+        )
+        self.engine = _make_engine(db_url, **engine_options)
         self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False, autocommit=False, future=True)
+        self.replicas = [
+            _Replica(f"replica{i}", _make_engine(url, **engine_options), replica_retry_seconds)
+            for i, url in enumerate(replica_urls)
+        ]
+        self._next_replica = itertools.count()
+        self.breaker = breaker or CircuitBreaker(failure_ratio=0)
+
+    @classmethod
+    def from_settings(cls, settings) -> "DataAccess":
+        return cls(
+            settings.DATABASE_URL,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            statement_timeout_ms=settings.DB_STATEMENT_TIMEOUT_MS,
+            sqlite_busy_timeout_ms=settings.SQLITE_BUSY_TIMEOUT_MS,
+            sqlite_mmap_size=settings.SQLITE_MMAP_SIZE,
+            replica_urls=[u.strip() for u in settings.DATABASE_REPLICA_URLS.split(",") if u.strip()],
+            replica_retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+            breaker=CircuitBreaker(
+                failure_ratio=settings.DB_BREAKER_FAILURE_RATIO,
+                min_calls=settings.DB_BREAKER_MIN_CALLS,
+                window=settings.DB_BREAKER_WINDOW_SECONDS,
+                open_seconds=settings.DB_BREAKER_OPEN_SECONDS,
+            ),
+        )
+
+    def pool_stats(self) -> dict:
+        """Checked-out/idle/overflow connection counts (zeros for non-queue pools)."""
+        pool = self.engine.pool
+        if not isinstance(pool, QueuePool):
+            return {"size": 0, "checked_out": 0, "checked_in": 0, "overflow": 0}
+        return {"size": pool.size(), "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(), "overflow": max(0, pool.overflow())}
+
+    def replica_health(self) -> dict[str, bool]:
+        return {r.name: r.healthy for r in self.replicas}
+
+    def check_replicas(self) -> dict[str, bool]:
+        """Probe every replica now (e.g. from a health endpoint)."""
+        for r in self.replicas:
+            r.probe()
+        return self.replica_health()
+
+    def _pick_replica(self) -> _Replica | None:
+        n = len(self.replicas)
+        if not n:
+            return None
+        start = next(self._next_replica)
+        for i in range(n):
+            replica = self.replicas[(start + i) % n]
+            if replica.available():
+                return replica
+        return None
+
+    def _read(self, query: Callable[[Any], Any]) -> Any:
+        """Run `query(engine)` on a replica or the primary, through the circuit breaker."""
+        return self._guarded(self._route, query)
+
+    def _write(self, work: Callable[[Any], Any]) -> Any:
+        """Run `work(conn)` in one transaction on the primary, through the circuit breaker."""
+        def run():
+            with self.engine.begin() as conn:
+                return work(conn)
+        return self._guarded(run)
+
+    def _guarded(self, fn: Callable[..., Any], *args) -> Any:
+        self.breaker.allow()
+        try:
+            result = fn(*args)
+        except SQLAlchemyError:
+            self.breaker.record(False)
+            raise
+        except BaseException:
+            self.breaker.record(True)         # not a database failure, but frees a half-open probe
+            raise
+        self.breaker.record(True)
+        return result
+
+    def _route(self, query: Callable[[Any], Any]) -> Any:
+        """Run `query(engine)` on a healthy replica, falling back to the primary."""
+        replica = self._pick_replica()
+        if replica is not None:
+            try:
+                result = query(replica.engine)
+                DB_READS.inc(replica.name)
+                return result
+            except DBAPIError:
+                replica.mark_down()
+                DB_READS.inc("fallback")
+        result = query(self.engine)
+        DB_READS.inc("primary")
+        return result
 
     def create_all(self):
         Base.metadata.create_all(self.engine)
@@ -16,14 +367,336 @@ class DataAccess:
     def get_session_factory(self):
         return self.SessionLocal
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.2, min=0.2, max=2), reraise=True)
+    def connect(self, engine=None):
+        """Pooled connection (primary by default); the wait for it is recorded as pool checkout time."""
+        t0 = time.perf_counter()
+        conn = (engine or self.engine).connect()
+        POOL_CHECKOUT.observe(time.perf_counter() - t0)
+        return conn
+
+    @retry(**_RETRY)
     def get_user_by_national(self, national_number: str) -> User | None:
-        with self.SessionLocal() as session:
-            stmt = select(User).where(User.national_number == national_number)
-            return session.execute(stmt).scalar_one_or_none()
+        stmt = select(User).where(User.national_number == national_number)
+
+        def query(engine):
+            with Session(engine) as session:
+                return session.execute(stmt).scalar_one_or_none()
+        return self._read(query)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.2, min=0.2, max=2), reraise=True)
+    @retry(**_RETRY)
     def get_salaries_for_user(self, user_id: int) -> List[Salary]:
-        with self.SessionLocal() as session:
-            stmt = select(Salary).where(Salary.user_id == user_id)
-            return session.execute(stmt).scalars().all()
+        stmt = select(Salary).where(Salary.user_id == user_id)
+
+        def query(engine):
+            with Session(engine) as session:
+                return session.execute(stmt).scalars().all()
+        return self._read(query)
+
+    @retry(**_RETRY)
+    def get_employee_snapshot(self, national_number: str) -> EmployeeSnapshot | None:
+        """User + salaries in one round trip, selecting only the columns the endpoint needs."""
+        stmt = (
+            select(User.id, User.username, User.national_number, User.is_active, Salary.month, AMOUNT_CENTS)
+            .outerjoin(Salary, Salary.user_id == User.id)
+            .where(User.national_number == national_number)
+        )
+        def query(engine):
+            with self.connect(engine) as conn:
+                return conn.execute(stmt).all()
+        rows = self._read(query)
+        if not rows:
+            return None
+        user_id, username, national, is_active = rows[0][:4]
+        salaries = [(month, cents) for (*_, month, cents) in rows if month is not None]
+        return EmployeeSnapshot(user_id, username, national, bool(is_active), salaries)
+
+    @retry(**_RETRY)
+    def get_materialized_status(self, national_number: str) -> MaterializedStatus | None:
+        """
+        The precomputed employee_status row, or None when there is none or the user has
+        unprocessed salary/user changes (the caller then computes from raw rows).
+        """
+        pending = exists().where(SalaryChange.user_id == EmployeeStatus.user_id)
+        stmt = (
+            select(User.username, User.national_number, EmployeeStatus.highest,
+                   EmployeeStatus.average_after_tax, EmployeeStatus.status, EmployeeStatus.count)
+            .join(EmployeeStatus, EmployeeStatus.user_id == User.id)
+            .where(User.national_number == national_number, User.is_active.is_(True), ~pending)
+        )
+        def query(engine):
+            with self.connect(engine) as conn:
+                return conn.execute(stmt).first()
+        row = self._read(query)
+        if row is None:
+            return None
+        username, national, highest, avg_after_tax, status_str, count = row
+        return MaterializedStatus(username, national, _as_decimal(highest), _as_decimal(avg_after_tax),
+                                  status_str, count)
+
+    def latest_change_id(self) -> int:
+        """Highest salary_changes id on the primary, 0 when the log is empty."""
+        def query():
+            with self.connect() as conn:
+                return conn.execute(select(func.max(SalaryChange.id))).scalar() or 0
+        return self._guarded(query)
+
+    def changes_after(self, after_id: int, also: list[int] = ()) -> list[tuple[int, str | None]]:
+        """
+        (id, national number) of the salary_changes rows past `after_id` or among the ids
+        `also`, read on the primary so a lagging replica cannot hide them. The national
+        number is None when the user no longer exists.
+        """
+        def fetch(conn, where):
+            return conn.execute(
+                select(SalaryChange.id, User.national_number)
+                .join(User, User.id == SalaryChange.user_id, isouter=True)
+                .where(where)
+            ).all()
+        def query():
+            with self.connect() as conn:
+                rows = fetch(conn, SalaryChange.id > after_id)
+                ids = list(also)
+                for i in range(0, len(ids), IN_CHUNK):
+                    rows += fetch(conn, SalaryChange.id.in_(ids[i:i + IN_CHUNK]))
+                return [(cid, national) for cid, national in rows]
+        return self._guarded(query)
+
+    @retry(**_RETRY)
+    def get_employee_snapshots(self, national_numbers: list[str]) -> dict[str, EmployeeSnapshot]:
+        """
+        Set-based variant of get_employee_snapshot: one users query and one salaries
+        query per IN_CHUNK national numbers. Unknown numbers are absent from the result.
+        """
+        wanted = list(dict.fromkeys(national_numbers))
+        return self._read(lambda engine: self._fetch_snapshots(engine, wanted))
+
+    def _fetch_snapshots(self, engine, wanted: list[str]) -> dict[str, EmployeeSnapshot]:
+        out: dict[str, EmployeeSnapshot] = {}
+        with self.connect(engine) as conn:
+            for i in range(0, len(wanted), IN_CHUNK):
+                chunk = wanted[i:i + IN_CHUNK]
+                users = conn.execute(
+                    select(User.id, User.username, User.national_number, User.is_active)
+                    .where(User.national_number.in_(chunk))
+                ).all()
+                if not users:
+                    continue
+                by_id: dict[int, EmployeeSnapshot] = {}
+                for user_id, username, national, is_active in users:
+                    by_id[user_id] = out[national] = EmployeeSnapshot(user_id, username, national, bool(is_active), [])
+                salaries = conn.execute(
+                    select(Salary.user_id, Salary.month, AMOUNT_CENTS).where(Salary.user_id.in_(list(by_id)))
+                )
+                for user_id, month, cents in salaries:
+                    by_id[user_id].salaries.append((month, cents))
+        return out
+
+
+    @retry(**_RETRY)
+    def top_requested_nationals(self, limit: int, since: datetime) -> list[str]:
+        """National numbers with the most successful lookups in `logs` since `since`, busiest first."""
+        def query(engine):
+            # context_json is plain text: Postgres needs a real cast for ->>, while SQLite's
+            # CAST(... AS JSON) would turn it into a number, so there it is only re-typed
+            coerce = cast if engine.dialect.name == "postgresql" else type_coerce
+            national = coerce(Log.context_json, JSON)["nationalNumber"].as_string()
+            stmt = (
+                select(national)
+                .where(Log.created_at >= since, Log.message.in_(("success", "cache_hit", "cache_stale_hit")))
+                .group_by(national)
+                .having(national.is_not(None))
+                .order_by(func.count().desc())
+                .limit(limit)
+            )
+            with self.connect(engine) as conn:
+                return [n for (n,) in conn.execute(stmt)]
+        return self._read(query)
+
+    @retry(**_RETRY)
+    def get_versions(self, national_numbers: list[str]) -> dict[str, tuple[str, datetime]]:
+        """Stored (digest, first_seen) per national number."""
+        return self._read_versions(list(national_numbers))
+
+    @retry(**_RETRY)
+    def resolve_versions(self, digests: dict[str, str], now: datetime) -> dict[str, datetime]:
+        """
+        First-seen time of each national number's content `digest`. An unchanged digest
+        keeps its stored time; a new or changed one is recorded at `now`. When processes
+        race on the same change, the first writer's time wins and is returned to all.
+        Set-based: one read, then at most one write transaction with a single bulk insert.
+        """
+        stored = self._read_versions(list(digests))
+        out = {n: stored[n][1] for n, d in digests.items() if n in stored and stored[n][0] == d}
+        if len(out) < len(digests):
+            out.update(self._write(lambda conn: self._record_versions(conn, digests, stored, now)))
+        return out
+
+    def _read_versions(self, wanted: list[str]) -> dict[str, tuple[str, datetime]]:
+        def query(engine):
+            with self.connect(engine) as conn:
+                return self._fetch_versions(conn, wanted)
+        return self._read(query)
+
+    def _fetch_versions(self, conn, wanted: list[str]) -> dict[str, tuple[str, datetime]]:
+        out: dict[str, tuple[str, datetime]] = {}
+        for i in range(0, len(wanted), IN_CHUNK):
+            rows = conn.execute(
+                select(ResponseVersion.national_number, ResponseVersion.digest, ResponseVersion.first_seen)
+                .where(ResponseVersion.national_number.in_(wanted[i:i + IN_CHUNK]))
+            )
+            out.update((n, (d, t)) for n, d, t in rows)
+        return out
+
+    def _record_versions(self, conn, digests: dict[str, str], stored: dict[str, tuple[str, datetime]],
+                         now: datetime) -> dict[str, datetime]:
+        out: dict[str, datetime] = {}
+        contested: list[str] = []
+        new = [n for n in digests if n not in stored]
+        if new:
+            inserted = conn.execute(_insert_ignore(conn.dialect.name, ResponseVersion),
+                                    [{"national_number": n, "digest": digests[n], "first_seen": now} for n in new])
+            if inserted.rowcount == len(new):
+                out.update(dict.fromkeys(new, now))
+            else:
+                contested += new             # some rows existed already (or the driver cannot tell)
+        for national, (old, _) in stored.items():
+            if old == digests[national]:
+                continue
+            # compare-and-set: only replace the version this process saw (changes are rare)
+            if conn.execute(
+                update(ResponseVersion)
+                .where(ResponseVersion.national_number == national, ResponseVersion.digest == old)
+                .values(digest=digests[national], first_seen=now)
+            ).rowcount:
+                out[national] = now
+            else:
+                contested.append(national)
+        # read back what won: our insert, or another process's row for the same content
+        current = self._fetch_versions(conn, contested)
+        for national in contested:
+            digest, first_seen = current.get(national, (None, now))
+            out[national] = first_seen if digest == digests[national] else now
+        return out
+
+    def iter_active_snapshots(self, after_user_id: int = 0, batch_size: int = 500,
+                              fetch_size: int = 10_000) -> Iterator[list[EmployeeSnapshot]]:
+        """
+        Every active employee with id > `after_user_id`, in user_id order, as batches of
+        snapshots. One streamed (server-side cursor) query; memory is bounded by
+        `fetch_size` rows plus one batch however large the tables are. Goes through the
+        circuit breaker: the first batch raises CircuitOpenError while it is open.
+        """
+        stmt = (
+            select(User.id, User.username, User.national_number, Salary.month, AMOUNT_CENTS)
+            .join(Salary, Salary.user_id == User.id)
+            .where(User.id > after_user_id, User.is_active.is_(True))
+            .order_by(User.id)
+        )
+        # the whole stream counts as one breaker call, like a _read
+        self.breaker.allow()
+        replica = self._pick_replica()
+        try:
+            with self.connect(replica.engine if replica else None) as conn:
+                result = conn.execution_options(stream_results=True, yield_per=fetch_size).execute(stmt)
+                rows = itertools.chain.from_iterable(iter(lambda: result.fetchmany(fetch_size), []))
+                batch: list[EmployeeSnapshot] = []
+                for (user_id, username, national), group in itertools.groupby(rows, key=lambda r: r[:3]):
+                    batch.append(EmployeeSnapshot(user_id, username, national, True,
+                                                  [(month, cents) for *_, month, cents in group]))
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+        except SQLAlchemyError:
+            self.breaker.record(False)
+            raise
+        except BaseException:
+            self.breaker.record(True)             # consumer stopped early (GeneratorExit): not a DB failure
+            raise
+        self.breaker.record(True)
+
+
+# A list here collects the perf_counter() at which each offloaded call finished on its worker
+# thread, so callers can time DB work without the event-loop delay before they resume
+db_call_finished: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+    "db_call_finished", default=None)
+
+
+class AsyncDataAccess:
+    """
+    Awaitable facade over DataAccess.
+    Every call runs on a bounded worker pool so blocking SQLAlchemy round trips
+    never stall the event loop; at most `max_workers` queries are in flight.
+    """
+    def __init__(self, data_access: DataAccess, max_workers: int = 16):
+        self.sync = data_access
+        self.engine = data_access.engine
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db")
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        marks = db_call_finished.get()
+        if marks is not None:
+            def timed(*a, **kw):
+                try:
+                    return fn(*a, **kw)
+                finally:
+                    marks.append(time.perf_counter())
+            call = functools.partial(ctx.run, timed, *args, **kwargs)
+        else:
+            call = functools.partial(ctx.run, fn, *args, **kwargs)
+        return await loop.run_in_executor(self._pool(), call)
+
+    async def get_user_by_national(self, national_number: str) -> User | None:
+        return await self.run(self.sync.get_user_by_national, national_number)
+
+    async def get_salaries_for_user(self, user_id: int) -> List[Salary]:
+        return await self.run(self.sync.get_salaries_for_user, user_id)
+
+    async def get_employee_snapshot(self, national_number: str) -> EmployeeSnapshot | None:
+        return await self.run(self.sync.get_employee_snapshot, national_number)
+
+    async def get_employee_snapshots(self, national_numbers: list[str]) -> dict[str, EmployeeSnapshot]:
+        return await self.run(self.sync.get_employee_snapshots, national_numbers)
+
+    async def get_materialized_status(self, national_number: str) -> MaterializedStatus | None:
+        return await self.run(self.sync.get_materialized_status, national_number)
+
+    async def latest_change_id(self) -> int:
+        return await self.run(self.sync.latest_change_id)
+
+    async def changes_after(self, after_id: int, also: list[int] = ()) -> list[tuple[int, str | None]]:
+        return await self.run(self.sync.changes_after, after_id, also)
+
+    async def top_requested_nationals(self, limit: int, since: datetime) -> list[str]:
+        return await self.run(self.sync.top_requested_nationals, limit, since)
+
+    async def get_versions(self, national_numbers: list[str]) -> dict[str, tuple[str, datetime]]:
+        return await self.run(self.sync.get_versions, national_numbers)
+
+    async def resolve_versions(self, digests: dict[str, str], now: datetime) -> dict[str, datetime]:
+        return await self.run(self.sync.resolve_versions, digests, now)
+
+    async def iter_active_snapshots(self, after_user_id: int = 0,
+                                    batch_size: int = 500) -> AsyncIterator[list[EmployeeSnapshot]]:
+        """Batches from DataAccess.iter_active_snapshots, each fetched on the worker pool."""
+        it = self.sync.iter_active_snapshots(after_user_id, batch_size)
+        try:
+            while (batch := await self.run(next, it, None)) is not None:
+                yield batch
+        finally:
+            # releases the connection even when the consumer stops early
+            await self.run(it.close)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
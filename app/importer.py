@@ -0,0 +1,250 @@
+"""
+Streaming import of users/salaries from CSV or JSONL (optionally .gz).
+
+Rows are read lazily and inserted `--chunk-size` at a time, one transaction per
+chunk (executemany; COPY on psycopg2). Non-unique secondary indexes of the target
+table are dropped first and rebuilt at the end. Each chunk commits together with
+its row count in import_checkpoints, so an interrupted job re-run with the same
+--job skips exactly the rows already committed.
+
+    python -m app.importer users roster.csv
+    python -m app.importer salaries salaries.jsonl.gz --chunk-size 100000
+
+Salary rows reference their employee by `user_id` or `national_number`. Core
+inserts bypass the ORM change tracking: run `python -m app.status_refresh --full`
+afterwards when the employee_status table is in use.
+"""
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import insert, select, update
+
+from .data_access import DataAccess, IN_CHUNK
+from .models import ImportCheckpoint, Salary, User
+
+_TRUE = {"1", "true", "t", "yes", "y"}
+_FALSE = {"0", "false", "f", "no", "n"}
+
+
+def read_records(path: str | Path) -> Iterator[dict]:
+    """Yield one dict per CSV row / JSON line without loading the file."""
+    path = Path(path)
+    suffixes = [s.lower() for s in path.suffixes]
+    compressed = suffixes[-1:] == [".gz"]
+    kind = suffixes[-2] if compressed and len(suffixes) > 1 else suffixes[-1] if suffixes else ""
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if kind == ".csv":
+            yield from csv.DictReader(f)
+        elif kind in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"unsupported input format: {path.name} (expected .csv or .jsonl)")
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _bool(value) -> bool:
+    if isinstance(value, bool) or value is None:
+        return value is not False
+    text = str(value).strip().lower()
+    if text in _TRUE or text == "":
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def _user_row(rec: dict) -> dict:
+    row = {
+        "username": _text(rec.get("username")),
+        "national_number": _text(rec.get("national_number")),
+        "email": _text(rec.get("email")),
+        "phone": _text(rec.get("phone")),
+        "is_active": _bool(rec.get("is_active")),
+    }
+    missing = [k for k in ("username", "national_number", "email") if not row[k]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if _text(rec.get("id")):
+        row["id"] = int(rec["id"])
+    return row
+
+
+def _salary_row(rec: dict) -> dict:
+    try:
+        amount = Decimal(str(rec["amount"]).strip())
+    except (KeyError, InvalidOperation):
+        raise ValueError(f"bad amount: {rec.get('amount')!r}") from None
+    row = {"year": int(rec["year"]), "month": int(rec["month"]), "amount": amount}
+    if not 1 <= row["month"] <= 12:
+        raise ValueError(f"month out of range: {row['month']}")
+    if _text(rec.get("user_id")):
+        row["user_id"] = int(rec["user_id"])
+    elif _text(rec.get("national_number")):
+        row["national_number"] = _text(rec["national_number"])
+    else:
+        raise ValueError("missing user_id or national_number")
+    if _text(rec.get("id")):
+        row["id"] = int(rec["id"])
+    return row
+
+
+TABLES: dict[str, tuple[type, Callable[[dict], dict]]] = {
+    "users": (User, _user_row),
+    "salaries": (Salary, _salary_row),
+}
+
+
+def _resolve_user_ids(conn, rows: list[dict]):
+    """Replace `national_number` with `user_id` on salary rows that reference users that way."""
+    nationals = list({r["national_number"] for r in rows if "national_number" in r})
+    ids: dict[str, int] = {}
+    for i in range(0, len(nationals), IN_CHUNK):
+        chunk = nationals[i:i + IN_CHUNK]
+        ids.update((n, uid) for uid, n in conn.execute(
+            select(User.id, User.national_number).where(User.national_number.in_(chunk))))
+    for r in rows:
+        if "national_number" in r:
+            national = r.pop("national_number")
+            if national not in ids:
+                raise ValueError(f"unknown national_number: {national}")
+            r["user_id"] = ids[national]
+
+
+def _copy_rows(conn, table, rows: list[dict]) -> bool:
+    """COPY FROM STDIN on psycopg2; returns False when the driver has no COPY support."""
+    if conn.dialect.driver != "psycopg2":
+        return False
+    cols = list(rows[0])
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    for r in rows:
+        w.writerow(["" if r.get(c) is None else r.get(c) for c in cols])
+    buf.seek(0)
+    cursor = conn.connection.driver_connection.cursor()
+    cursor.copy_expert(f"COPY {table.name} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)", buf)
+    return True
+
+
+def _parse(records: Iterable[dict], to_row: Callable[[dict], dict], first_line: int) -> Iterator[dict]:
+    for line, rec in enumerate(records, start=first_line):
+        try:
+            yield to_row(rec)
+        except (ValueError, TypeError, KeyError) as exc:
+            raise ValueError(f"record {line}: {exc}") from None
+
+
+def import_file(
+    data_access: DataAccess,
+    table_name: str,
+    path: str | Path,
+    chunk_size: int = 50_000,
+    job: str | None = None,
+    defer_indexes: bool = True,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Stream `path` into `table_name` ("users" or "salaries"); returns counts and rows/sec.
+    Re-running a job that did not finish resumes after its last committed chunk.
+    """
+    model, to_row = TABLES[table_name]
+    table = model.__table__
+    job = job or f"{table_name}:{Path(path).resolve()}"
+    engine = data_access.engine
+
+    with engine.begin() as conn:
+        ImportCheckpoint.__table__.create(conn, checkfirst=True)
+        done = conn.execute(select(ImportCheckpoint.rows_done, ImportCheckpoint.finished)
+                            .where(ImportCheckpoint.job == job)).first()
+        if done is None:
+            conn.execute(insert(ImportCheckpoint).values(job=job, rows_done=0, finished=False,
+                                                         updated_at=datetime.now(timezone.utc)))
+            skip = 0
+        elif done.finished:
+            return {"job": job, "rows": 0, "skipped": done.rows_done, "seconds": 0.0, "rows_per_sec": 0.0,
+                    "already_finished": True}
+        else:
+            skip = done.rows_done
+
+    deferred = [ix for ix in table.indexes if not ix.unique] if defer_indexes else []
+    if deferred:
+        with engine.begin() as conn:
+            for ix in deferred:
+                ix.drop(conn, checkfirst=True)
+
+    rows_done = skip
+    imported = 0
+    t0 = time.perf_counter()
+    rows = _parse(itertools.islice(read_records(path), skip, None), to_row, first_line=skip + 1)
+    try:
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            with engine.begin() as conn:
+                if table_name == "salaries":
+                    _resolve_user_ids(conn, chunk)
+                if not _copy_rows(conn, table, chunk):
+                    conn.execute(insert(table), chunk)
+                rows_done += len(chunk)
+                conn.execute(update(ImportCheckpoint).where(ImportCheckpoint.job == job)
+                             .values(rows_done=rows_done, updated_at=datetime.now(timezone.utc)))
+            imported += len(chunk)
+            if progress is not None:
+                elapsed = time.perf_counter() - t0
+                progress({"job": job, "rows": imported, "total": rows_done,
+                          "rows_per_sec": round(imported / elapsed, 1) if elapsed else 0.0})
+    finally:
+        # rebuild even after a failure so an interrupted import does not leave reads unindexed
+        if deferred:
+            with engine.begin() as conn:
+                for ix in deferred:
+                    ix.create(conn, checkfirst=True)
+
+    with engine.begin() as conn:
+        conn.execute(update(ImportCheckpoint).where(ImportCheckpoint.job == job)
+                     .values(finished=True, updated_at=datetime.now(timezone.utc)))
+    elapsed = time.perf_counter() - t0
+    return {"job": job, "rows": imported, "skipped": skip, "seconds": round(elapsed, 3),
+            "rows_per_sec": round(imported / elapsed, 1) if elapsed else 0.0}
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Stream CSV/JSONL rows into the users or salaries table.")
+    ap.add_argument("table", choices=sorted(TABLES))
+    ap.add_argument("path", help=".csv, .jsonl or .ndjson, optionally .gz")
+    ap.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///./local.db"))
+    ap.add_argument("--chunk-size", type=int, default=50_000, help="rows per transaction")
+    ap.add_argument("--job", help="checkpoint name (default: table + absolute path)")
+    ap.add_argument("--keep-indexes", action="store_true", help="do not drop secondary indexes during the load")
+    args = ap.parse_args(argv)
+
+    da = DataAccess(args.database_url)
+    da.create_all()
+
+    def report(p: dict):
+        print(f"{p['total']} rows committed ({p['rows_per_sec']:.0f} rows/s)", file=sys.stderr)
+
+    stats = import_file(da, args.table, args.path, chunk_size=args.chunk_size, job=args.job,
+                        defer_indexes=not args.keep_indexes, progress=report)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Cache invalidation from the shared salary_changes log.
+
+ORM writes to users/salaries in any process append the affected user ids to
+salary_changes (see models.py). Every worker follows that log and evicts those
+employees, so a write made through another worker, a script or a service using these
+models leaves this worker's cache within CACHE_INVALIDATION_POLL_SECONDS. Rows stay
+in the log for at least status_refresh.CONSUME_AFTER_SECONDS, long enough for every
+follower to read them. Writes that bypass the ORM (raw SQL, the seed loader) are not
+logged: evict those with POST /api/admin/cache/invalidate.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from .data_access import AsyncDataAccess
+
+# Ids are handed out before commit, so a row below the highest id seen may still
+# appear; each such gap is re-read for this long, and at most MAX_GAPS are kept.
+GAP_SECONDS = 10.0
+MAX_GAPS = 1000
+
+
+class ChangeFeed:
+    """Reads the salary_changes rows this worker has not seen and evicts their employees."""
+
+    def __init__(self, data: AsyncDataAccess, evict: Callable[[list[str]], Awaitable[int]]):
+        self.data = data
+        self.evict = evict
+        self.after_id: int | None = None
+        self.gaps: dict[int, float] = {}
+
+    async def poll(self) -> int:
+        """One round; returns how many employees were evicted."""
+        if self.after_id is None:
+            # earlier changes were evicted by the workers running then
+            self.after_id = await self.data.latest_change_id()
+            return 0
+        rows = await self.data.changes_after(self.after_id, list(self.gaps))
+        now = time.monotonic()
+        seen = {cid for cid, _ in rows}
+        top = max(seen, default=self.after_id)
+        if top - self.after_id - len(seen) <= MAX_GAPS:
+            self.gaps.update((cid, now) for cid in range(self.after_id + 1, top) if cid not in seen)
+        self.gaps = {cid: t for cid, t in self.gaps.items() if cid not in seen and now - t < GAP_SECONDS}
+        self.after_id = max(self.after_id, top)
+        nationals = sorted({national for _, national in rows if national is not None})
+        return await self.evict(nationals) if nationals else 0
+
+
+async def follow_changes(data: AsyncDataAccess, interval: float, logger=None):
+    """Lifespan task: poll salary_changes every `interval` seconds and evict what changed."""
+    from .api import evict
+    feed = ChangeFeed(data, evict)
+    while True:
+        try:
+            await feed.poll()
+        except Exception as exc:
+            if logger is not None:
+                logger.log("ERROR", "cache_invalidation_failed", {"error": type(exc).__name__})
+        await asyncio.sleep(interval)
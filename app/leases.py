@@ -0,0 +1,63 @@
+"""
+Single-runner leases for background jobs.
+
+Every uvicorn worker starts the same lifespan tasks. Jobs that rewrite shared tables
+(the employee_status refresh, the logs rollup) first take the job's row in `job_leases`,
+so one process on any host runs them at a time. A lease expires after `ttl` seconds, so
+a crashed holder blocks the job for at most that long; a holder extends its lease by
+acquiring again. Works the same on SQLite and Postgres.
+"""
+import os
+import socket
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from .models import JobLease
+
+
+def new_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire(engine, job: str, holder: str, ttl: float) -> bool:
+    """Take or extend the lease on `job`; False while another holder's lease has not expired."""
+    now = datetime.now(timezone.utc)
+    values = {"holder": holder, "expires_at": now + timedelta(seconds=ttl)}
+    with engine.begin() as conn:
+        # the row lock makes a concurrent taker re-check the WHERE and find the new expiry
+        taken = conn.execute(
+            update(JobLease)
+            .where(JobLease.job == job, or_(JobLease.holder == holder, JobLease.expires_at < now))
+            .values(**values)
+        ).rowcount
+    if taken:
+        return True
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(JobLease).values(job=job, **values))
+    except IntegrityError:
+        return False                      # the row exists and is held by someone else
+    return True
+
+
+def release(engine, job: str, holder: str):
+    with engine.begin() as conn:
+        conn.execute(delete(JobLease).where(JobLease.job == job, JobLease.holder == holder))
+
+
+@contextmanager
+def lease(engine, job: str, ttl: float, holder: str | None = None) -> Iterator[str | None]:
+    """Yields the holder id when this call got the lease (released on exit), else None."""
+    holder = holder or new_holder()
+    if not acquire(engine, job, holder, ttl):
+        yield None
+        return
+    try:
+        yield holder
+    finally:
+        release(engine, job, holder)
@@ -0,0 +1,229 @@
+"""
+Admission control: per-token rate limits and load shedding in front of the database.
+
+`RateLimiter` is a token bucket per key (the bearer token id), implemented as GCRA so
+a bucket is a single timestamp: the "theoretical arrival time" of the next request.
+That makes it easy to share between workers, either in a SQLite file (one host) or in
+Redis (many hosts). Shared stores fail open: a storage error admits the request.
+
+`ConcurrencyLimiter` caps in-flight DB work with an AIMD limit: it grows by one per
+limit's worth of fast completions while the limit is in use, and shrinks by `backoff`
+when completions are slower than the latency target or fail. Work beyond the limit is
+rejected right away instead of queueing on the DB worker pool.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Protocol
+
+from fastapi import HTTPException, status
+
+from .cache import RedisBackend, RedisError
+from .data_access import db_call_finished
+from .metrics import REQUESTS_SHED
+
+
+class Overloaded(HTTPException):
+    """503 raised when in-flight DB work is at the concurrency limit."""
+    def __init__(self, retry_after: int = 1):
+        super().__init__(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Service overloaded",
+                         headers={"Retry-After": str(retry_after)})
+
+
+class BucketStore(Protocol):
+    blocking: bool            # admit does I/O (a file lock, a network round trip)
+
+    def admit(self, key: str, now: float, interval: float, capacity: float) -> float:
+        """Record one request unless the bucket is empty; returns 0 or the seconds to wait."""
+        ...
+
+
+def _gcra(tat: float | None, now: float, interval: float, capacity: float) -> tuple[float, float]:
+    """(new tat, wait) for one request; the tat only advances when the request is admitted."""
+    new_tat = max(tat or now, now) + interval
+    wait = new_tat - now - capacity
+    return (tat or now, wait) if wait > 0 else (new_tat, 0.0)
+
+
+class MemoryBucketStore:
+    """Buckets of this worker only; keys are token ids, so the dict stays small."""
+    blocking = False
+
+    def __init__(self):
+        self._tat: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def admit(self, key: str, now: float, interval: float, capacity: float) -> float:
+        with self._lock:
+            self._tat[key], wait = _gcra(self._tat.get(key), now, interval, capacity)
+        return wait
+
+
+class SQLiteBucketStore:
+    """Buckets shared by every worker on one host; each admit is one IMMEDIATE transaction."""
+    blocking = True
+
+    def __init__(self, path: str, table: str = "rate_limits", timeout: float = 1.0):
+        self.path = path
+        self.table = table
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def admit(self, key: str, now: float, interval: float, capacity: float) -> float:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(f"SELECT tat FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            tat, wait = _gcra(row[0] if row else None, now, interval, capacity)
+            if not wait:
+                conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, tat) VALUES (?, ?)", (key, tat))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+# GCRA in one atomic step; times in integer microseconds so Lua number precision is not an issue
+_GCRA_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local wait = new_tat - now - capacity
+if wait > 0 then return wait end
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil((new_tat - now) / 1000) + 1)
+return 0
+"""
+
+
+class RedisBucketStore:
+    """Buckets shared by every worker and host; keys expire once their bucket is full again."""
+    blocking = True
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        self.prefix = prefix
+        self._redis = RedisBackend(url)
+
+    def admit(self, key: str, now: float, interval: float, capacity: float) -> float:
+        us = self._redis.execute("EVAL", _GCRA_LUA, "1", self.prefix + key,
+                                 str(int(now * 1e6)), str(int(interval * 1e6)), str(int(capacity * 1e6)))
+        return us / 1e6
+
+
+class RateLimiter:
+    """
+    Token bucket per key: `rate` requests/second sustained, bursts of up to `burst`.
+    `check(key)` returns 0 when the request is admitted, else seconds until it would be.
+    """
+    def __init__(self, rate: float, burst: int, store: BucketStore | None = None,
+                 clock: Callable[[], float] = time.time):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.store = store or MemoryBucketStore()
+        self.clock = clock
+        self.errors = 0
+
+    def check(self, key: str) -> float:
+        interval = 1.0 / self.rate
+        try:
+            return self.store.admit(key, self.clock(), interval, self.burst * interval)
+        except (sqlite3.Error, OSError, EOFError, RedisError):
+            self.errors += 1                       # fail open: a broken shared store must not take the API down
+            return 0.0
+
+    async def acheck(self, key: str) -> float:
+        """check() from a coroutine: on a worker thread when the store blocks, so a locked
+        SQLite file or a slow Redis delays only this request, not the event loop."""
+        if not self.store.blocking:
+            return self.check(key)
+        return await asyncio.to_thread(self.check, key)
+
+
+def open_rate_limiter(rate: float, burst: int, kind: str = "memory", url: str = "") -> RateLimiter | None:
+    """RateLimiter for RATE_LIMIT_* settings, or None when rate limiting is off."""
+    if rate <= 0:
+        return None
+    if kind == "sqlite":
+        if not url:
+            raise ValueError("RATE_LIMIT_BACKEND=sqlite needs RATE_LIMIT_URL (a file path)")
+        return RateLimiter(rate, burst, SQLiteBucketStore(url))
+    if kind == "redis":
+        return RateLimiter(rate, burst, RedisBucketStore(url or "redis://localhost:6379/0"))
+    return RateLimiter(rate, burst)
+
+
+class ConcurrencyLimiter:
+    """
+    Adaptive cap on concurrent DB work (`initial` = 0 disables it).
+
+    Latency runs from entering `slot()` to the last AsyncDataAccess call in it finishing on
+    its worker thread, so it covers queueing for a worker but not event-loop lag. Single
+    event loop only: state is touched from coroutines, never from worker threads.
+    """
+    def __init__(self, initial: int, max_limit: int = 64, min_limit: int = 1,
+                 target_latency: float = 0.25, backoff: float = 0.9,
+                 clock: Callable[[], float] = time.perf_counter):
+        self.enabled = initial > 0
+        self.limit = float(max(min_limit, min(initial, max_limit))) if self.enabled else 0.0
+        self.min_limit, self.max_limit = min_limit, max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.clock = clock
+        self.in_flight = 0
+        self.rejected = 0
+        self._last_decrease = float("-inf")
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float, ok: bool = True):
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        now = self.clock()
+        if not ok or latency > self.target_latency:
+            # at most one decrease per target window, so one slow burst does not collapse the limit
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one unit of DB concurrency for the block; raises Overloaded when none is free."""
+        if not self.enabled:
+            yield
+            return
+        if not self.try_acquire():
+            REQUESTS_SHED.inc("overloaded")
+            raise Overloaded()
+        t0 = self.clock()
+        marks: list[float] = []
+        token = db_call_finished.set(marks)
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            db_call_finished.reset(token)
+            # time to the worker-side finish: a busy event loop must not read as a slow database
+            self.release((marks[-1] if marks else self.clock()) - t0, ok)
@@ -0,0 +1,143 @@
+"""
+Retention for the `logs` table.
+
+Raw rows older than the raw retention are folded into per-minute counts in log_rollups
+(by level, message and context "status") and deleted. Each batch of rows is rolled up
+and deleted in one transaction, so an interrupted run never counts a row twice. Runs
+hold the "logs_rollup" lease (see leases.py), so when every worker schedules the job
+only one pass runs at a time; on Postgres the batch is also claimed with
+FOR UPDATE SKIP LOCKED, so even an overlapping pass cannot count the same rows.
+Sampled records (see DBLogger `sample_rates`) count with their weight, so rollups
+estimate the real volume. Rollups older than the rollup retention are dropped.
+
+    python -m app.log_retention [--raw-hours 24] [--rollup-days 90]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, update
+
+from .data_access import DataAccess, IN_CHUNK
+from .leases import acquire, lease
+from .models import Log, LogRollup
+
+
+def _rollup_key(created_at: datetime, level: str, message: str, context_json: str | None) -> tuple[tuple, int]:
+    status, weight = "", 1
+    if context_json:
+        try:
+            ctx = json.loads(context_json)
+        except ValueError:
+            ctx = None
+        if isinstance(ctx, dict):
+            if ctx.get("status") is not None:
+                status = str(ctx["status"])[:16]
+            rate = ctx.get("sampleRate")
+            if isinstance(rate, (int, float)) and 0 < rate < 1:
+                weight = round(1 / rate)
+    return (created_at.replace(second=0, microsecond=0), level, message, status), weight
+
+
+def _merge(conn, counts: Counter):
+    """Add `counts` to log_rollups: update the existing minute row or insert a new one."""
+    for (minute, level, message, status), n in counts.items():
+        updated = conn.execute(
+            update(LogRollup)
+            .where(LogRollup.minute == minute, LogRollup.level == level,
+                   LogRollup.message == message, LogRollup.status == status)
+            .values(count=LogRollup.count + n)
+        ).rowcount
+        if not updated:
+            conn.execute(insert(LogRollup).values(minute=minute, level=level, message=message,
+                                                  status=status, count=n))
+
+
+def rollup_and_prune(data_access: DataAccess, raw_retention_hours: float = 24, rollup_retention_days: int = 90,
+                     batch_size: int = 5000, now: datetime | None = None, lease_seconds: float = 300) -> dict:
+    """
+    Roll up and delete raw logs past retention, then drop expired rollups; returns counts,
+    plus `skipped` when another process holds the lease.
+    """
+    with lease(data_access.engine, "logs_rollup", lease_seconds) as holder:
+        if holder is None:
+            return {"rolled_up": 0, "rollups_expired": 0, "skipped": True}
+        return _rollup_and_prune(data_access, raw_retention_hours, rollup_retention_days, batch_size,
+                                 now or datetime.now(timezone.utc), holder, lease_seconds)
+
+
+def _rollup_and_prune(data_access: DataAccess, raw_retention_hours: float, rollup_retention_days: int,
+                      batch_size: int, now: datetime, holder: str, lease_seconds: float) -> dict:
+    # whole minutes only, so a minute is never split between a rollup and raw rows
+    cutoff = (now - timedelta(hours=raw_retention_hours)).replace(second=0, microsecond=0)
+    rolled = 0
+    while True:
+        # extend the lease per batch; stop if it expired and another process took over
+        if not acquire(data_access.engine, "logs_rollup", holder, lease_seconds):
+            break
+        with data_access.engine.begin() as conn:
+            rows = conn.execute(
+                select(Log.id, Log.created_at, Log.level, Log.message, Log.context_json)
+                .where(Log.created_at < cutoff)
+                .order_by(Log.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)          # no-op on SQLite, which locks the whole file
+            ).all()
+            if not rows:
+                break
+            counts: Counter = Counter()
+            for _, created_at, level, message, context_json in rows:
+                key, weight = _rollup_key(created_at, level, message, context_json)
+                counts[key] += weight
+            _merge(conn, counts)
+            ids = [r[0] for r in rows]
+            for i in range(0, len(ids), IN_CHUNK):
+                conn.execute(delete(Log).where(Log.id.in_(ids[i:i + IN_CHUNK])))
+        rolled += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    expired = 0
+    if rollup_retention_days:
+        with data_access.engine.begin() as conn:
+            expired = conn.execute(
+                delete(LogRollup).where(LogRollup.minute < now - timedelta(days=rollup_retention_days))
+            ).rowcount
+    return {"rolled_up": rolled, "rollups_expired": expired}
+
+
+async def retain_periodically(async_data_access, interval: float, logger=None, **policy):
+    """Lifespan task: run rollup_and_prune every `interval` seconds with `policy` kwargs."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await async_data_access.run(rollup_and_prune, async_data_access.sync, **policy)
+            if logger is not None and (stats["rolled_up"] or stats["rollups_expired"]):
+                logger.log("INFO", "logs_rolled_up", stats)
+        except Exception as exc:
+            if logger is not None:
+                logger.log("ERROR", "logs_rollup_failed", {"error": type(exc).__name__})
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Roll up and prune old rows of the logs table.")
+    ap.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///./local.db"))
+    ap.add_argument("--raw-hours", type=float, default=24, help="keep raw rows this long")
+    ap.add_argument("--rollup-days", type=int, default=90, help="keep per-minute rollups this long (0 = forever)")
+    ap.add_argument("--batch-size", type=int, default=5000, help="rows per transaction")
+    args = ap.parse_args(argv)
+
+    da = DataAccess(args.database_url)
+    da.create_all()
+    t0 = time.perf_counter()
+    stats = rollup_and_prune(da, args.raw_hours, args.rollup_days, args.batch_size)
+    print(f"{stats} in {time.perf_counter() - t0:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
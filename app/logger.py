@@ -1,19 +1,165 @@
 from .models import Log
+from .metrics import STAGE_LATENCY
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from threading import Lock, Thread
+import asyncio
 import json
+import queue
+import random
+import time
+
+_STOP = object()
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
 
 class DBLogger:
-    def __init__(self, session_factory, enabled: bool = True):
+    """
+    Buffered writer for the `logs` table.
+
+    `log()` only enqueues; a background thread bulk-inserts records once `batch_size`
+    are waiting or `flush_interval` seconds have passed, so requests never wait on a
+    log commit. The queue is bounded: when full, `overflow="drop"` discards the new
+    record and `overflow="block"` waits up to `block_timeout` seconds before dropping.
+    Calls on an event loop thread never wait: they drop under either policy, so only
+    scripts and worker threads block.
+
+    `sample_rates` maps a message to the fraction of its records to keep (e.g.
+    `{"cache_hit": 0.1}`); kept records carry `sampleRate` in their context so counts
+    can be scaled back up (see app/log_retention.py).
+    """
+    def __init__(
+        self,
+        session_factory,
+        enabled: bool = True,
+        queue_size: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = "drop",
+        block_timeout: float = 0.05,
+        sample_rates: dict[str, float] | None = None,
+    ):
         self.session_factory = session_factory
         self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.sample_rates = {m: r for m, r in (sample_rates or {}).items() if r < 1}
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Thread | None = None
+        self._start_lock = Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.sampled_out = 0
 
     def log(self, level: str, message: str, context: dict | None = None):
         if not self.enabled:
             return
-        with self.session_factory() as session:
-            rec = Log(
-                level=level.upper()[:10],
-                message=message[:255],
-                context_json=json.dumps(context) if context else None
-            )
-            session.add(rec)
-            session.commit()
+        rate = self.sample_rates.get(message)
+        if rate is not None:
+            if random.random() >= rate:
+                self.sampled_out += 1
+                return
+            context = {**(context or {}), "sampleRate": rate}
+        t0 = time.perf_counter()
+        rec = {
+            "created_at": datetime.now(timezone.utc),
+            "level": level.upper()[:10],
+            "message": message[:255],
+            "context_json": json.dumps(context, separators=(",", ":")) if context else None,
+        }
+        self._ensure_worker()
+        try:
+            if self.overflow == "block" and not _on_event_loop():
+                self._queue.put(rec, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(rec)
+        except queue.Full:
+            self.dropped += 1
+        STAGE_LATENCY.observe(time.perf_counter() - t0, "log")
+
+    def flush(self):
+        """Block until every record enqueued so far has been written."""
+        if self._thread is None:
+            self._drain()
+        else:
+            self._queue.join()
+
+    def close(self):
+        """Stop the worker after writing everything still queued."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+        self._drain()
+
+    def stats(self) -> dict:
+        return {"queued": self._queue.qsize(), "written": self.written,
+                "dropped": self.dropped, "failed": self.failed, "sampled_out": self.sampled_out}
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="db-logger", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            if item is _STOP:
+                stop = True
+            else:
+                batch.append(item)
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            self._queue.task_done()
+        self._write(batch)
+
+    def _write(self, batch: list[dict]):
+        if not batch:
+            return
+        try:
+            with self.session_factory() as session:
+                session.execute(insert(Log), batch)
+                session.commit()
+            self.written += len(batch)
+        except Exception:
+            # logging must never take the service down; the loss is visible in stats()
+            self.failed += len(batch)
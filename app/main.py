@@ -1,31 +1,148 @@
-from contextlib import asynccontextmanager
+import asyncio
+import math
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from .data_access import DataAccess
+from .data_access import DataAccess, AsyncDataAccess, CircuitOpenError
 from .settings import settings
 from .api import router as emp_router
 from .logger import DBLogger
 from .bootstrap import init_database
-from fastapi.responses import JSONResponse
+from .status_refresh import prune_periodically, refresh_employee_status, refresh_periodically
+from .log_retention import retain_periodically
+from .invalidation import follow_changes
+from . import warmup
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .metrics import REGISTRY, REQUESTS_SHED, MetricsMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-data_access = DataAccess(settings.DATABASE_URL)
+data_access = DataAccess.from_settings(settings)
+async_data_access = AsyncDataAccess(data_access, max_workers=settings.DB_MAX_WORKERS)
+db_logger = DBLogger(
+    session_factory=data_access.get_session_factory(),
+    enabled=settings.LOG_TO_DB,
+    queue_size=settings.LOG_QUEUE_SIZE,
+    batch_size=settings.LOG_BATCH_SIZE,
+    flush_interval=settings.LOG_FLUSH_INTERVAL_SECONDS,
+    overflow=settings.LOG_OVERFLOW_POLICY,
+    sample_rates={"cache_hit": settings.LOG_CACHE_HIT_SAMPLE_RATE},
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_database(data_access) 
+    refresher = None
+    if settings.STATUS_TABLE_ENABLED:
+        await async_data_access.run(refresh_employee_status, data_access)
+        if settings.STATUS_REFRESH_INTERVAL_SECONDS:
+            refresher = asyncio.create_task(
+                refresh_periodically(async_data_access, settings.STATUS_REFRESH_INTERVAL_SECONDS, db_logger))
+    else:
+        # no refresh consumes salary_changes: drop the rows once the cache followers read them
+        refresher = asyncio.create_task(prune_periodically(async_data_access, 60, db_logger))
+    retention = None
+    if settings.LOG_RETENTION_INTERVAL_SECONDS:
+        retention = asyncio.create_task(retain_periodically(
+            async_data_access, settings.LOG_RETENTION_INTERVAL_SECONDS, db_logger,
+            raw_retention_hours=settings.LOG_RAW_RETENTION_HOURS,
+            rollup_retention_days=settings.LOG_ROLLUP_RETENTION_DAYS,
+            batch_size=settings.LOG_RETENTION_BATCH_SIZE,
+        ))
+    following = None
+    if settings.CACHE_INVALIDATION_POLL_SECONDS:
+        following = asyncio.create_task(
+            follow_changes(async_data_access, settings.CACHE_INVALIDATION_POLL_SECONDS, db_logger))
+    warming = None
+    if settings.CACHE_WARMUP_TOP_N or settings.CACHE_SNAPSHOT_PATH:
+        # runs while the server accepts traffic; /healthz reports not-ready until it is done
+        warmup.state.ready = False
+        warming = asyncio.create_task(warmup.warm_up(
+            async_data_access, db_logger,
+            top_n=settings.CACHE_WARMUP_TOP_N,
+            lookback_hours=settings.CACHE_WARMUP_LOOKBACK_HOURS,
+            snapshot_path=settings.CACHE_SNAPSHOT_PATH,
+            timeout=settings.CACHE_WARMUP_TIMEOUT_SECONDS,
+        ))
     yield
+    try:
+        for task in (refresher, retention, following, warming):
+            if task is not None and not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+        if settings.CACHE_SNAPSHOT_PATH:
+            await _save_snapshot(settings.CACHE_SNAPSHOT_PATH)
+    finally:
+        db_logger.close()
+        async_data_access.shutdown()
+
+async def _save_snapshot(path: str):
+    """Shutdown: record the cached national numbers for the next warm-up; failures are only logged."""
+    from .api import _cache, cached_nationals
+    try:
+        nationals = await _cache.run(cached_nationals)
+        await asyncio.to_thread(warmup.dump_snapshot, path, nationals)
+    except Exception as exc:
+        db_logger.log("ERROR", "cache_snapshot_failed", {"error": type(exc).__name__})
 
 app = FastAPI(title="GetEmpStatus Service", version="1.0.0", lifespan=lifespan)
 
 # Wire router + logger
-emp_router.data_access = data_access    
-emp_router.db_logger = DBLogger(session_factory=data_access.get_session_factory(), enabled=settings.LOG_TO_DB)  
+emp_router.data_access = async_data_access
+emp_router.db_logger = db_logger
 app.include_router(emp_router)
+app.add_middleware(MetricsMiddleware)
+
+_CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _runtime_gauges() -> dict[str, float]:
+    from .api import _cache, _negative_cache, _flight, _db_limiter
+    cache, negative = _cache.stats(), _negative_cache.stats()
+    log = db_logger.stats()
+    pool = data_access.pool_stats()
+    return {
+        "empstatus_cache_entries": cache["entries"],
+        "empstatus_cache_bytes": cache["bytes"],
+        "empstatus_cache_hits": cache["hits"],
+        "empstatus_cache_misses": cache["misses"],
+        "empstatus_cache_evictions": cache["evictions"],
+        "empstatus_cache_expirations": cache["expirations"],
+        "empstatus_negative_cache_entries": negative["entries"],
+        "empstatus_singleflight_coalesced": _flight.coalesced,
+        "empstatus_db_pool_size": pool["size"],
+        "empstatus_db_pool_checked_out": pool["checked_out"],
+        "empstatus_db_pool_checked_in": pool["checked_in"],
+        "empstatus_db_pool_overflow": pool["overflow"],
+        "empstatus_db_replicas_healthy": sum(data_access.replica_health().values()),
+        "empstatus_db_concurrency_limit": _db_limiter.limit,
+        "empstatus_db_in_flight": _db_limiter.in_flight,
+        "empstatus_db_circuit_state": _CIRCUIT_STATES[data_access.breaker.state],
+        "empstatus_db_circuit_opened": data_access.breaker.opened,
+        "empstatus_log_queue_depth": log["queued"],
+        "empstatus_log_written": log["written"],
+        "empstatus_log_dropped": log["dropped"],
+        "empstatus_log_failed": log["failed"],
+        "empstatus_log_sampled_out": log["sampled_out"],
+    }
+
+REGISTRY.register_gauges(_runtime_gauges)
 
 @app.get("/healthz")
 async def healthz():
-    return {"ok": True}
+    # readiness: 503 while the startup cache warm-up is still running
+    if not warmup.state.ready:
+        return JSONResponse(status_code=503, content=warmup.state.as_dict())
+    if not data_access.replicas:
+        return {"ok": True}
+    # probing here also brings a recovered replica back before a request has to wait on it;
+    # a down replica does not make the worker unready, reads fall back to the primary
+    return {"ok": True, "replicas": await async_data_access.run(data_access.check_replicas)}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    from .api import _cache
+    # the cache gauges count entries, which is I/O on a shared backend
+    return PlainTextResponse(await _cache.run(REGISTRY.render), media_type="text/plain; version=0.0.4")
 
 @app.exception_handler(StarletteHTTPException)
 async def _map_http_exceptions(request, exc: StarletteHTTPException):
@@ -33,7 +150,16 @@ async def _map_http_exceptions(request, exc: StarletteHTTPException):
     Standardize all HTTP errors to: {"error": "<message>"} to match the spec.
     """
     detail = exc.detail if isinstance(exc.detail, str) else "Error"
-    return JSONResponse(status_code=exc.status_code, content={"error": detail})
+    # keep headers such as Retry-After on 429/503
+    return JSONResponse(status_code=exc.status_code, content={"error": detail},
+                        headers=getattr(exc, "headers", None))
+
+@app.exception_handler(CircuitOpenError)
+async def _circuit_open(request, exc: CircuitOpenError):
+    """The DB circuit breaker is open and no cached response could stand in: 503."""
+    REQUESTS_SHED.inc("circuit_open")
+    return JSONResponse(status_code=503, content={"error": "Database unavailable"},
+                        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))})
 
 @app.exception_handler(RequestValidationError)
 async def _validation_error(request, exc: RequestValidationError):
@@ -0,0 +1,160 @@
+"""
+In-process Prometheus-style metrics.
+
+Counters and histograms are plain dicts behind a lock, cheap enough to leave on in
+production; `render()` produces the text exposition format served at /metrics.
+Gauges are read at scrape time from registered collector callbacks.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _fmt_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for lv, v in items:
+            yield f"{self.name}{_fmt_labels(self.labels, lv)} {v}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple[str, ...], list] = {}     # labels -> [bucket counts..., sum, count]
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values: str):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(label_values)
+            if s is None:
+                s = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        s = self._series.get(label_values)
+        return s[-1] if s else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(lv, list(s)) for lv, s in self._series.items()]
+        for lv, s in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, s):
+                cumulative += n
+                le = _fmt_labels(self.labels, lv, 'le="%s"' % bound)
+                yield f"{self.name}_bucket{le} {cumulative}"
+            le = _fmt_labels(self.labels, lv, 'le="+Inf"')
+            yield f"{self.name}_bucket{le} {s[-1]}"
+            yield f"{self.name}_sum{_fmt_labels(self.labels, lv)} {s[-2]}"
+            yield f"{self.name}_count{_fmt_labels(self.labels, lv)} {s[-1]}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Callable[[], dict[str, float]]] = []
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        m = Counter(name, help, labels)
+        self._metrics.append(m)
+        return m
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        m = Histogram(name, help, labels, buckets)
+        self._metrics.append(m)
+        return m
+
+    def register_gauges(self, collect: Callable[[], dict[str, float]]):
+        """`collect()` returns {metric_name: value}; it is called on every scrape."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        for collect in self._collectors:
+            for name, value in collect().items():
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter("empstatus_http_requests_total", "HTTP responses by route and status code", ("route", "code"))
+HTTP_LATENCY = REGISTRY.histogram("empstatus_http_request_seconds", "End-to-end request latency incl. serialization", ("route",))
+STAGE_LATENCY = REGISTRY.histogram("empstatus_stage_seconds", "Latency of GetEmpStatus processing stages", ("stage",))
+CACHE_LOOKUPS = REGISTRY.counter("empstatus_cache_lookups_total", "Response cache lookups by result", ("result",))
+AUTH_REQUESTS = REGISTRY.counter("empstatus_auth_requests_total", "Authenticated requests per token id (or rejected)", ("token",))
+REQUESTS_SHED = REGISTRY.counter("empstatus_requests_shed_total", "Requests refused by admission control", ("reason",))
+DB_RETRIES = REGISTRY.counter("empstatus_db_retries_total", "Tenacity retry attempts in DataAccess", ("operation",))
+DB_READS = REGISTRY.counter("empstatus_db_reads_total", "Read queries by target (primary, replicaN, fallback)", ("target",))
+POOL_CHECKOUT = REGISTRY.histogram("empstatus_db_pool_checkout_seconds", "Time waiting for a pooled DB connection")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and status codes."""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        code = 500
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal code
+            if message["type"] == "http.response.start":
+                code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # label by route template only, so unknown paths cannot blow up cardinality
+            label = getattr(route, "path", "unmatched")
+            HTTP_LATENCY.observe(time.perf_counter() - t0, label)
+            HTTP_REQUESTS.inc(label, str(code))
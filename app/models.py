@@ -1,6 +1,8 @@
-from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
-from sqlalchemy import Integer, String, Boolean, ForeignKey, DateTime, Numeric
+from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column, Session
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy import Integer, String, Boolean, ForeignKey, DateTime, Numeric, Index, event, insert, select
 from datetime import datetime, timezone
+from typing import Callable
 
 Base = declarative_base()
 
@@ -16,8 +18,12 @@ class User(Base):
 
 class Salary(Base):
     __tablename__ = "salaries"
+    # (user_id, year, month) serves the per-user lookup; Postgres also carries amount in the leaf
+    __table_args__ = (
+        Index("idx_salaries_user_year_month", "user_id", "year", "month", postgresql_include=["amount"]),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     year: Mapped[int] = mapped_column(Integer, nullable=False)
     month: Mapped[int] = mapped_column(Integer, nullable=False)  # 1-12
     amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False)
@@ -25,6 +31,8 @@ class Salary(Base):
 
 class Log(Base):
     __tablename__ = "logs"
+    # retention and the warm-up top-N scan by age
+    __table_args__ = (Index("idx_logs_created_at", "created_at"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -33,4 +41,133 @@ class Log(Base):
     )
     level: Mapped[str] = mapped_column(String(10), nullable=False)
     message: Mapped[str] = mapped_column(String(255), nullable=False)
-    context_json: Mapped[str | None] = mapped_column(String(2000), nullable=True)
\ No newline at end of file
+    context_json: Mapped[str | None] = mapped_column(String(2000), nullable=True)
+
+class LogRollup(Base):
+    """Per-minute counts of `logs` rows that aged out of raw retention."""
+    __tablename__ = "log_rollups"
+    minute: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    level: Mapped[str] = mapped_column(String(10), primary_key=True)
+    message: Mapped[str] = mapped_column(String(255), primary_key=True)
+    # the record's context "status" (employee status or HTTP code), "" when absent
+    status: Mapped[str] = mapped_column(String(16), primary_key=True, default="")
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+class EmployeeStatus(Base):
+    """Materialized GetEmpStatus metrics for active users with >= 3 salary rows."""
+    __tablename__ = "employee_status"
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    highest: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    sum: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    sum_after_tax: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    average_after_tax: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False)
+    status: Mapped[str] = mapped_column(String(10), nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+class SalaryChange(Base):
+    """Change log of users whose status inputs changed; read by the employee_status refresh and the cache followers."""
+    __tablename__ = "salary_changes"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+class ImportCheckpoint(Base):
+    """Rows committed so far by `python -m app.importer` per job, for resuming."""
+    __tablename__ = "import_checkpoints"
+    job: Mapped[str] = mapped_column(String(255), primary_key=True)
+    rows_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    finished: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+class ResponseVersion(Base):
+    """Digest of an employee's current GetEmpStatus content and when it was first produced."""
+    __tablename__ = "response_versions"
+    national_number: Mapped[str] = mapped_column(String(50), primary_key=True)
+    digest: Mapped[str] = mapped_column(String(32), nullable=False)
+    first_seen: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+class JobLease(Base):
+    """Which process currently runs a background job that writes shared tables (see leases.py)."""
+    __tablename__ = "job_leases"
+    job: Mapped[str] = mapped_column(String(64), primary_key=True)
+    holder: Mapped[str] = mapped_column(String(128), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+# ---- change tracking: every ORM write to users/salaries records the affected user ids ----
+
+_CHANGED_NATIONALS = "empstatus_changed_nationals"
+_change_listeners: list[Callable[[set[str]], None]] = []
+
+def subscribe_changes(listener: Callable[[set[str]], None]):
+    """
+    Call `listener(national_numbers)` after every commit that wrote users/salaries rows of
+    those employees (rolled-back writes are not reported).
+    """
+    _change_listeners.append(listener)
+
+def _record_changes(session: Session, user_ids: set[int], nationals: set[str] = frozenset()):
+    if user_ids:
+        now = datetime.now(timezone.utc)
+        session.connection().execute(
+            insert(SalaryChange), [{"user_id": uid, "changed_at": now} for uid in sorted(user_ids)]
+        )
+    if _change_listeners and (user_ids or nationals):
+        pending = session.info.setdefault(_CHANGED_NATIONALS, set())
+        pending.update(nationals)
+        if user_ids:
+            pending.update(session.connection().execute(
+                select(User.national_number).where(User.id.in_(sorted(user_ids)))
+            ).scalars())
+
+@event.listens_for(Session, "after_flush")
+def _track_flushed_changes(session: Session, flush_context):
+    affected: set[int] = set()
+    nationals: set[str] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            if obj.id is not None:
+                affected.add(obj.id)
+            # deleted users and renamed national numbers are gone from the table by now
+            hist = get_history(obj, "national_number")
+            nationals.update(n for n in (*hist.unchanged, *hist.added, *hist.deleted) if n)
+        elif isinstance(obj, Salary):
+            affected.update(uid for uid in (obj.user_id, *get_history(obj, "user_id").deleted) if uid is not None)
+    _record_changes(session, affected, nationals)
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_changes(state):
+    # query(...).update()/.delete() and update()/delete() statements bypass the flush
+    if not (state.is_update or state.is_delete) or state.bind_mapper is None:
+        return
+    target = state.bind_mapper.class_
+    if target not in (User, Salary):
+        return
+    col = User.id if target is User else Salary.user_id
+    where = state.statement.whereclause
+    stmt = select(col) if where is None else select(col).where(where)
+    # collected before the statement runs, so deleted users still resolve to their nationals
+    _record_changes(state.session, set(state.session.execute(stmt).scalars()))
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session: Session):
+    nationals = session.info.pop(_CHANGED_NATIONALS, None)
+    if nationals:
+        for listener in _change_listeners:
+            listener(nationals)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session):
+    session.info.pop(_CHANGED_NATIONALS, None)
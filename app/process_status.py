@@ -2,32 +2,38 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Iterable, Any, Dict, Literal
 
 q2 = Decimal("0.01")
+_ZERO = Decimal("0")
+_DECEMBER = Decimal("1.10")
+_SUMMER = Decimal("0.95")
+_AFTER_TAX = Decimal("0.93")
+_TAX_THRESHOLD = Decimal("10000")
+_ORANGE_AVG = Decimal("2000")
 
 def adjust_by_month(month: int, amount: Decimal) -> Decimal:
     if month == 12:
-        return amount * Decimal("1.10")
+        return amount * _DECEMBER
     if month in (6, 7, 8):
-        return amount * Decimal("0.95")
+        return amount * _SUMMER
     return amount
 
 def _apply_tax(total: Decimal) -> Decimal:
     # 7% deduction if total > 10,000; round to 2 decimals
-    return (total * Decimal("0.93")).quantize(q2, rounding=ROUND_HALF_UP) \
-           if total > Decimal("10000") else total.quantize(q2, rounding=ROUND_HALF_UP)
+    return (total * _AFTER_TAX).quantize(q2, rounding=ROUND_HALF_UP) \
+           if total > _TAX_THRESHOLD else total.quantize(q2, rounding=ROUND_HALF_UP)
 
 def compute_metrics(month_amounts: Iterable[tuple[int, Decimal]]) -> dict:
     adjusted = [adjust_by_month(m, a) for (m, a) in month_amounts]
     if not adjusted:
         return {
             "count": 0,
-            "sum": Decimal("0"),
-            "sumAfterTax": Decimal("0"),
-            "average": Decimal("0"),
-            "averageAfterTax": Decimal("0"),
-            "highest": Decimal("0"),
+            "sum": _ZERO,
+            "sumAfterTax": _ZERO,
+            "average": _ZERO,
+            "averageAfterTax": _ZERO,
+            "highest": _ZERO,
         }
 
-    total = sum(adjusted, start=Decimal("0"))
+    total = sum(adjusted, start=_ZERO)
     highest = max(adjusted)
     total_after_tax = _apply_tax(total)
 
@@ -45,12 +51,45 @@ def compute_metrics(month_amounts: Iterable[tuple[int, Decimal]]) -> dict:
     }
 
 def status_from_average(avg: Decimal) -> str:
-    if avg > Decimal("2000"):
+    if avg > _ORANGE_AVG:
         return "GREEN"
-    if avg == Decimal("2000"):
+    if avg == _ORANGE_AVG:
         return "ORANGE"
     return "RED"
 
+# ---- integer-cents path ----
+# Adjusted amounts are cents * MONTH_FACTORS[month], i.e. exact integers in units of
+# 1/10000; every rounding below is ROUND_HALF_UP, so results equal compute_metrics'.
+
+MONTH_FACTORS = tuple(110 if m == 12 else 95 if m in (6, 7, 8) else 100 for m in range(13))
+_ADJUSTED_MONTHS = {m: f for m, f in enumerate(MONTH_FACTORS) if f != 100}
+_TAX_THRESHOLD_SCALED = 10_000 * 100 * 100
+
+def _round_half_up(num: int, den: int) -> int:
+    q = (abs(num) * 2 + den) // (2 * den)
+    return -q if num < 0 else q
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+def compute_metrics_cents(month_cents: Iterable[tuple[int, int]]) -> dict:
+    """compute_metrics over (month, amount_in_cents) pairs, using integer arithmetic only."""
+    factor = _ADJUSTED_MONTHS.get
+    scaled = [c * factor(m, 100) for (m, c) in month_cents]
+    if not scaled:
+        return compute_metrics(())
+    n = len(scaled)
+    total = sum(scaled)
+    after_tax = _round_half_up(total * 93, 10_000) if total > _TAX_THRESHOLD_SCALED else _round_half_up(total, 100)
+    return {
+        "count": n,
+        "sum": from_cents(_round_half_up(total, 100)),
+        "sumAfterTax": from_cents(after_tax),
+        "average": from_cents(_round_half_up(total, 100 * n)),
+        "averageAfterTax": from_cents(_round_half_up(after_tax, n)),
+        "highest": from_cents(_round_half_up(max(scaled), 100)),
+    }
+
 class ProcessStatus:
     """
     Facade exposing the existing process-status functions as class/static methods.
@@ -59,11 +98,7 @@ class ProcessStatus:
     @staticmethod
     def adjust_by_month(year: int, month: int, amount: Decimal) -> Decimal:
         amt = amount if isinstance(amount, Decimal) else Decimal(str(amount))
-        if month == 12:
-            return amt * Decimal("1.10")
-        if month in (6, 7, 8):
-            return amt * Decimal("0.95")
-        return amt
+        return adjust_by_month(month, amt)
 
     @staticmethod
     def status_from_average(avg: Decimal) -> Literal["GREEN", "ORANGE", "RED"]:
@@ -73,6 +108,10 @@ class ProcessStatus:
     def compute_metrics(salaries: list[Dict[str, Any]]) -> Any:
         return compute_metrics(salaries)
 
+    @staticmethod
+    def compute_metrics_cents(month_cents: list[tuple[int, int]]) -> Any:
+        return compute_metrics_cents(month_cents)
+
     @classmethod
     def compute_for_national_number(cls, national_number: str):
         return compute_for_national_number(national_number)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field,  ConfigDict
 from decimal import Decimal
-from typing import Literal, Optional
+from typing import Annotated, Literal, Optional
 
 class GetEmpStatusRequest(BaseModel):
     NationalNumber: str = Field(min_length=1)
@@ -49,4 +49,25 @@ class FlatGetEmpStatusResponse(BaseModel):
     AverageSalary: float
     Status: Literal["GREEN", "ORANGE", "RED"]
     IsActive: bool
-    LastUpdated: str  # "YYYY-MM-DDTHH:MM:SSZ"
\ No newline at end of file
+    LastUpdated: str  # "YYYY-MM-DDTHH:MM:SSZ"
+
+class GetEmpStatusBatchRequest(BaseModel):
+    NationalNumbers: list[Annotated[str, Field(min_length=1)]] = Field(min_length=1, max_length=10_000)
+
+class BatchItemOut(BaseModel):
+    # Either Result (StatusCode 200) or error (404/406/422, or 503 while the DB circuit is open), mirroring the single endpoint
+    NationalNumber: str
+    StatusCode: int
+    Result: Optional[FlatGetEmpStatusResponse] = None
+    error: Optional[str] = None
+
+class GetEmpStatusBatchResponse(BaseModel):
+    Results: list[BatchItemOut]
+
+class CacheInvalidateRequest(BaseModel):
+    # Either specific national numbers or All=true to drop every cached response
+    NationalNumbers: list[Annotated[str, Field(min_length=1)]] = Field(default_factory=list, max_length=10_000)
+    All: bool = False
+
+class CacheInvalidateResponse(BaseModel):
+    Invalidated: int
@@ -2,12 +2,66 @@
 
 from pydantic_settings import BaseSettings, SettingsConfigDict  
 from pydantic import Field  
+from typing import Literal
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(default="sqlite:///./local.db")
+    DATABASE_REPLICA_URLS: str = Field(default="", description="Comma-separated read replica URLs (empty = read from the primary)")
+    DB_REPLICA_RETRY_SECONDS: float = Field(default=5, gt=0, description="How long a failed replica is skipped before it is re-probed")
     API_TOKEN: str = Field(..., min_length=1, description="Bearer token required by the API")
+    API_TOKEN_HASHES: str = Field(default="", description="Extra accepted tokens as comma-separated name:sha256hex")
+    API_TOKENS_FILE: str = Field(default="", description="File of name:sha256hex lines, re-read when it changes")
+    ADMIN_TOKEN_IDS: str = Field(default="default", description="Comma-separated token ids allowed to call /api/admin/* endpoints")
     CACHE_TTL_SECONDS: int = Field(default=60)
+    CACHE_STALE_TTL_SECONDS: int = Field(default=0, ge=0, description="Serve expired entries this long while refreshing in the background (0 = off)")
+    CACHE_FALLBACK_TTL_SECONDS: int = Field(default=300, ge=0, description="Keep expired entries this long to serve while the DB circuit breaker is open")
+    NEGATIVE_CACHE_TTL_SECONDS: int = Field(default=30, ge=0, description="How long 404/406/422 outcomes are replayed from cache (0 = off)")
+    CACHE_MAX_ENTRIES: int = Field(default=100_000, ge=0, description="LRU entry cap per worker (0 = unbounded)")
+    CACHE_MAX_BYTES: int = Field(default=0, ge=0, description="Approximate byte cap per worker (0 = unbounded)")
+    CACHE_LOCK_STRIPES: int = Field(default=1, ge=1)
+    CACHE_SWEEP_INTERVAL_SECONDS: float = Field(default=30, ge=0, description="Expired-entry sweep period (0 = off)")
+    CACHE_BACKEND: Literal["memory", "sqlite", "redis"] = Field(default="memory", description="Per-worker memory, host-wide SQLite file, or Redis")
+    CACHE_URL: str = Field(default="", description="SQLite cache file path or redis:// URL for shared backends")
+    CACHE_INVALIDATION_POLL_SECONDS: float = Field(default=1, ge=0, description="How often each worker reads new salary_changes rows and evicts those employees (0 = off)")
+    CACHE_WARMUP_TOP_N: int = Field(default=0, ge=0, description="Preload this many most-requested employees at startup (0 = off)")
+    CACHE_WARMUP_LOOKBACK_HOURS: float = Field(default=24, gt=0, description="How far back `logs` are scanned for the top-N")
+    CACHE_WARMUP_TIMEOUT_SECONDS: float = Field(default=60, gt=0, description="Give up warming and report ready after this long")
+    CACHE_SNAPSHOT_PATH: str = Field(default="", description="Cached keys are written here on shutdown and preloaded on start")
     LOG_TO_DB: bool = Field(default=True)
+    LOG_QUEUE_SIZE: int = Field(default=10_000, ge=1, description="Max log records buffered in memory")
+    LOG_BATCH_SIZE: int = Field(default=500, ge=1)
+    LOG_FLUSH_INTERVAL_SECONDS: float = Field(default=1.0, gt=0)
+    LOG_OVERFLOW_POLICY: Literal["drop", "block"] = Field(default="drop", description="What log() does when the queue is full; calls on the event loop always drop")
+    LOG_CACHE_HIT_SAMPLE_RATE: float = Field(default=1.0, ge=0, le=1, description="Fraction of INFO cache_hit records written")
+    LOG_RETENTION_INTERVAL_SECONDS: float = Field(default=0, ge=0, description="Logs rollup/prune period (0 = off)")
+    LOG_RAW_RETENTION_HOURS: float = Field(default=24, gt=0, description="Raw logs rows older than this are rolled up and deleted")
+    LOG_ROLLUP_RETENTION_DAYS: int = Field(default=90, ge=0, description="Per-minute rollups older than this are deleted (0 = keep)")
+    LOG_RETENTION_BATCH_SIZE: int = Field(default=5000, ge=1, description="Raw rows rolled up per transaction")
+    METRICS_ENGINE: Literal["cents", "decimal"] = Field(default="cents", description="Integer-cents or Decimal metrics arithmetic")
+    STATUS_TABLE_ENABLED: bool = Field(default=False, description="Serve fresh employee_status rows instead of recomputing")
+    STATUS_REFRESH_INTERVAL_SECONDS: float = Field(default=60, ge=0, description="Incremental employee_status refresh period (0 = startup only)")
+    EXPORT_MAX_CONCURRENT: int = Field(default=2, ge=0, description="Exports streamed at once per worker; more get 503 (0 = unlimited)")
+    DB_MAX_WORKERS: int = Field(default=16, ge=1, description="Worker threads running blocking DB calls")
+    DB_POOL_SIZE: int = Field(default=16, ge=1, description="Persistent pooled connections; keep >= DB_MAX_WORKERS")
+    DB_MAX_OVERFLOW: int = Field(default=8, ge=0, description="Extra connections opened under bursts (logger, refresher)")
+    DB_POOL_TIMEOUT_SECONDS: float = Field(default=10, gt=0, description="Max wait for a pooled connection")
+    DB_POOL_RECYCLE_SECONDS: int = Field(default=1800, ge=-1, description="Reopen connections older than this (-1 = never)")
+    DB_POOL_PRE_PING: bool = Field(default=True, description="Test connections on checkout and replace dead ones")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=0, ge=0, description="Server-side statement timeout on Postgres/MySQL (0 = off)")
+    SQLITE_BUSY_TIMEOUT_MS: int = Field(default=5000, ge=0, description="How long SQLite waits on a locked database")
+    SQLITE_MMAP_SIZE: int = Field(default=256 * 1024 * 1024, ge=0, description="SQLite memory-mapped I/O size in bytes")
+    RATE_LIMIT_PER_SECOND: float = Field(default=0, ge=0, description="Sustained requests/second per token (0 = off)")
+    RATE_LIMIT_BURST: int = Field(default=20, ge=1, description="Requests a token may send at once before being limited")
+    RATE_LIMIT_BACKEND: Literal["memory", "sqlite", "redis"] = Field(default="memory", description="Where token buckets live")
+    RATE_LIMIT_URL: str = Field(default="", description="SQLite file path or redis:// URL for shared token buckets")
+    DB_CONCURRENCY_LIMIT: int = Field(default=0, ge=0, description="Initial adaptive cap on in-flight DB work (0 = off)")
+    DB_CONCURRENCY_MAX: int = Field(default=64, ge=1, description="Upper bound for the adaptive DB concurrency cap")
+    DB_LATENCY_TARGET_MS: float = Field(default=250, gt=0, description="DB call latency above which the cap shrinks")
+    DB_BREAKER_FAILURE_RATIO: float = Field(default=0.5, ge=0, le=1, description="Failed share of DB reads that opens the circuit breaker (0 = off)")
+    DB_BREAKER_MIN_CALLS: int = Field(default=20, ge=1, description="Reads needed in the window before the breaker can open")
+    DB_BREAKER_WINDOW_SECONDS: float = Field(default=10, gt=0, description="Window over which the failure ratio is measured")
+    DB_BREAKER_OPEN_SECONDS: float = Field(default=5, gt=0, description="How long an open breaker fails fast before a half-open probe")
+    DB_REQUEST_DEADLINE_MS: int = Field(default=2000, ge=0, description="Per-request budget; DB retries that would exceed it are skipped (0 = off)")
 
    
     model_config = SettingsConfigDict(
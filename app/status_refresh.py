@@ -0,0 +1,148 @@
+"""
+Incremental refresh of the employee_status table.
+
+ORM writes to users/salaries append the affected user ids to salary_changes (see
+models.py). A refresh recomputes only those users with the bulk engine, replaces
+their employee_status rows and consumes the processed change rows in one
+transaction. Rows younger than CONSUME_AFTER_SECONDS wait for a later run: the cache
+followers (invalidation.py) read them too. Writes that bypass the ORM (raw SQL, the
+seed loader) need --full.
+Runs hold the "employee_status_refresh" lease, so when every worker schedules a
+refresh only one of them runs it; the others skip that round. The lease is extended
+between the read and the write phase; a run whose lease was taken over writes nothing.
+With the status table off nothing consumes the change rows: prune_changes drops them
+once the followers have had time to read them.
+
+    python -m app.status_refresh [--full]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select
+
+from .bulk_status import compute_bulk, fetch_active_salaries, to_decimal
+from .data_access import DataAccess, IN_CHUNK
+from .leases import acquire, lease
+from .models import EmployeeStatus, SalaryChange
+
+MIN_SALARY_ROWS = 3
+INSERT_CHUNK = 10_000
+CONSUME_AFTER_SECONDS = 30
+
+
+def refresh_employee_status(data_access: DataAccess, full: bool = False, lease_seconds: float = 600) -> dict:
+    """
+    Bring employee_status up to date; rebuilds everything when `full` or the table is empty.
+    Returns `{"skipped": True, ...}` without touching the table while another process runs one.
+    """
+    with lease(data_access.engine, "employee_status_refresh", lease_seconds) as holder:
+        if holder is None:
+            return {"full": full, "changes": 0, "recomputed": 0, "materialized": 0, "skipped": True}
+        return _refresh(data_access, full, holder, lease_seconds)
+
+
+def _refresh(data_access: DataAccess, full: bool, holder: str, lease_seconds: float) -> dict:
+    with data_access.engine.connect() as conn:
+        if not full:
+            full = conn.execute(select(EmployeeStatus.user_id).limit(1)).first() is None
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=CONSUME_AFTER_SECONDS)
+        changes = conn.execute(
+            select(SalaryChange.id, SalaryChange.user_id).where(SalaryChange.changed_at <= cutoff)
+        ).all()
+        user_ids = None if full else sorted({uid for _, uid in changes})
+        if user_ids == []:
+            return {"full": False, "changes": 0, "recomputed": 0, "materialized": 0}
+        res = compute_bulk(*fetch_active_salaries(conn, user_ids))
+
+    # extend the lease for the write phase; give up if it expired and another process took over
+    if not acquire(data_access.engine, "employee_status_refresh", holder, lease_seconds):
+        return {"full": full, "changes": 0, "recomputed": 0, "materialized": 0, "skipped": True}
+
+    # changes committed since the read keep their rows, so those users stay pending
+    with data_access.engine.begin() as conn:
+        if full:
+            conn.execute(delete(EmployeeStatus))
+        else:
+            for i in range(0, len(user_ids), IN_CHUNK):
+                conn.execute(delete(EmployeeStatus).where(EmployeeStatus.user_id.in_(user_ids[i:i + IN_CHUNK])))
+
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "user_id": int(res["user_id"][i]),
+                "count": int(res["count"][i]),
+                "highest": to_decimal(res["highest"][i]),
+                "sum": to_decimal(res["sum"][i]),
+                "sum_after_tax": to_decimal(res["sumAfterTax"][i]),
+                "average_after_tax": to_decimal(res["averageAfterTax"][i]),
+                "status": str(res["status"][i]),
+                "computed_at": now,
+            }
+            for i in range(res["user_id"].size) if res["count"][i] >= MIN_SALARY_ROWS
+        ]
+        for i in range(0, len(rows), INSERT_CHUNK):
+            conn.execute(insert(EmployeeStatus), rows[i:i + INSERT_CHUNK])
+
+        # consume exactly the change rows read above; ones committed since wait for the next run
+        change_ids = [cid for cid, _ in changes]
+        for i in range(0, len(change_ids), IN_CHUNK):
+            conn.execute(delete(SalaryChange).where(SalaryChange.id.in_(change_ids[i:i + IN_CHUNK])))
+
+    return {"full": full, "changes": len(changes),
+            "recomputed": int(res["user_id"].size), "materialized": len(rows)}
+
+
+def prune_changes(data_access: DataAccess, older_than: float = CONSUME_AFTER_SECONDS,
+                  lease_seconds: float = 60) -> int:
+    """Delete change rows older than `older_than` seconds; for when no refresh consumes them."""
+    with lease(data_access.engine, "salary_changes_prune", lease_seconds) as holder:
+        if holder is None:
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than)
+        with data_access.engine.begin() as conn:
+            return conn.execute(delete(SalaryChange).where(SalaryChange.changed_at <= cutoff)).rowcount
+
+
+async def refresh_periodically(async_data_access, interval: float, logger=None):
+    """Lifespan task: run an incremental refresh every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            stats = await async_data_access.run(refresh_employee_status, async_data_access.sync)
+            if logger is not None and stats["recomputed"]:
+                logger.log("INFO", "employee_status_refreshed", stats)
+        except Exception as exc:
+            if logger is not None:
+                logger.log("ERROR", "employee_status_refresh_failed", {"error": type(exc).__name__})
+
+
+async def prune_periodically(async_data_access, interval: float, logger=None):
+    """Lifespan task while the status table is off: prune_changes every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await async_data_access.run(prune_changes, async_data_access.sync)
+        except Exception as exc:
+            if logger is not None:
+                logger.log("ERROR", "salary_changes_prune_failed", {"error": type(exc).__name__})
+
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(description="Refresh the materialized employee_status table.")
+    ap.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///./local.db"))
+    ap.add_argument("--full", action="store_true", help="recompute every employee, not just changed ones")
+    args = ap.parse_args(argv)
+
+    da = DataAccess(args.database_url)
+    da.create_all()
+    t0 = time.perf_counter()
+    stats = refresh_employee_status(da, full=args.full)
+    print(f"{stats} in {time.perf_counter() - t0:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,163 @@
+import hashlib
+import hmac
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from threading import Lock
 from fastapi import Header, HTTPException, status
+from .metrics import AUTH_REQUESTS
 from .settings import settings
 
+_log = logging.getLogger(__name__)
+
 def _unauth():
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
-async def validate_token(authorization: str | None = Header(default=None)) -> None:
-    if not settings.API_TOKEN or not settings.API_TOKEN.strip():
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Server misconfiguration: API token not set"
-        )
+def hash_token(token: str) -> str:
+    """Hex SHA-256 of a token, the form stored in API_TOKEN_HASHES / API_TOKENS_FILE."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def _parse_hashes(text: str, source: str) -> list[tuple[str, bytes]]:
+    """
+    `name:hexdigest` entries separated by commas or newlines; `#` starts a comment.
+    Entries that are not a 64-character hex SHA-256 are skipped with a warning, so one
+    typo cannot lock out every other token.
+    """
+    out = []
+    for n, raw in enumerate(text.replace(",", "\n").splitlines(), 1):
+        entry = raw.split("#", 1)[0].strip()
+        if not entry:
+            continue
+        name, _, digest = entry.rpartition(":")
+        digest = digest.strip()
+        try:
+            value = bytes.fromhex(digest)
+        except ValueError:
+            value = b""
+        if len(value) != hashlib.sha256().digest_size:
+            _log.warning("ignoring malformed token entry %d in %s: expected name:<64 hex chars>", n, source)
+            continue
+        out.append((name.strip() or digest[:8], value))
+    return out
+
+class TokenVerifier:
+    """
+    Bearer-token check for every request.
+
+    Accepted tokens are the plain `settings.API_TOKEN` (id "default") plus SHA-256 hashes
+    from API_TOKEN_HASHES and API_TOKENS_FILE. The file is re-read when its mtime changes
+    (checked every `reload_interval` seconds) and changed API_TOKEN / API_TOKEN_HASHES
+    settings are picked up on the next request, so tokens rotate without a restart.
+    Presented tokens are hashed and compared to every known digest with
+    hmac.compare_digest; header values that passed are remembered in a small LRU so
+    repeat callers skip the hash. Requests are counted per token id.
+    """
+    def __init__(self, lru_size: int = 1024, reload_interval: float = 5.0):
+        self.lru_size = lru_size
+        self.reload_interval = reload_interval
+        self._lock = Lock()
+        self._validated: OrderedDict[str, str] = OrderedDict()   # header value -> token id
+        self._digests: list[tuple[str, bytes]] = []
+        self._file_digests: list[tuple[str, bytes]] = []    # last good read of API_TOKENS_FILE
+        self._plain: str | None = None
+        self._hashes: str | None = None
+        self._file_mtime: float | None = None
+        self._next_file_check = 0.0
+        self._loaded = False
+        self.requests: dict[str, int] = {}
+
+    def _reload(self):
+        digests: list[tuple[str, bytes]] = []
+        token = (self._plain or "").strip()
+        if token:
+            digests.append(("default", bytes.fromhex(hash_token(self._plain))))
+        digests.extend(_parse_hashes(self._hashes or "", "API_TOKEN_HASHES"))
+        path = settings.API_TOKENS_FILE
+        if path:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._file_digests = _parse_hashes(f.read(), path)
+            except FileNotFoundError:
+                self._file_digests = []
+            except (OSError, UnicodeDecodeError) as exc:
+                # e.g. caught mid-write: keep serving the tokens from the last good read
+                _log.warning("keeping previous tokens, cannot read %s: %s", path, exc)
+            digests.extend(self._file_digests)
+        self._digests = digests
+        self._validated.clear()
+        self._loaded = True
+
+    def _file_changed(self) -> bool:
+        path = settings.API_TOKENS_FILE
+        now = time.monotonic()
+        if not path or now < self._next_file_check:
+            return False
+        self._next_file_check = now + self.reload_interval
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        changed = mtime != self._file_mtime
+        self._file_mtime = mtime
+        return changed
+
+    def _refresh(self):
+        # identity checks keep the hot path cheap while honouring runtime settings changes
+        if (settings.API_TOKEN is not self._plain or settings.API_TOKEN_HASHES is not self._hashes
+                or self._file_changed() or not self._loaded):
+            with self._lock:
+                self._plain, self._hashes = settings.API_TOKEN, settings.API_TOKEN_HASHES
+                self._reload()
 
-    if not authorization:
-        _unauth()
+    def verify(self, authorization: str | None) -> str:
+        """Token id for a valid `Authorization` header; raises 401 (or 500 if none configured)."""
+        self._refresh()
+        if not self._digests:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Server misconfiguration: API token not set"
+            )
+        if not authorization:
+            AUTH_REQUESTS.inc("rejected")
+            _unauth()
 
-    scheme, _, token = authorization.partition(" ")
-    if scheme.lower() != "bearer" or not token:
-        _unauth()
+        token_id = self._validated.get(authorization)
+        if token_id is None:
+            token_id = self._check(authorization)
+            if token_id is None:
+                AUTH_REQUESTS.inc("rejected")
+                _unauth()
+            with self._lock:
+                self._validated[authorization] = token_id
+                if len(self._validated) > self.lru_size:
+                    self._validated.popitem(last=False)
+        else:
+            try:
+                self._validated.move_to_end(authorization)
+            except KeyError:                 # evicted or cleared by a reload meanwhile
+                pass
+        self.requests[token_id] = self.requests.get(token_id, 0) + 1
+        AUTH_REQUESTS.inc(token_id)
+        return token_id
 
-    if token.strip() != settings.API_TOKEN:
-        _unauth()
+    def _check(self, authorization: str) -> str | None:
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            return None
+        presented = hashlib.sha256(token.strip().encode("utf-8")).digest()
+        match = None
+        for token_id, digest in self._digests:
+            # no early exit: the time taken does not depend on which digest matched
+            if hmac.compare_digest(presented, digest) and match is None:
+                match = token_id
+        return match
+
+verifier = TokenVerifier()
+
+async def validate_token(authorization: str | None = Header(default=None)) -> str:
+    return verifier.verify(authorization)
 
 class Validator:
     """
@@ -27,5 +165,10 @@ class Validator:
     Mirrors the existing dependency function.
     """
     @staticmethod
-    async def validate_token(authorization: str | None = Header(default=None)) -> None:
-        return await validate_token(authorization)
\ No newline at end of file
+    async def validate_token(authorization: str | None = Header(default=None)) -> str:
+        return verifier.verify(authorization)
+
+if __name__ == "__main__":
+    # python -m app.validator <name> <token>  ->  line for API_TOKEN_HASHES / API_TOKENS_FILE
+    name, token = sys.argv[1], sys.argv[2]
+    print(f"{name}:{hash_token(token)}")
@@ -0,0 +1,91 @@
+"""
+Cache warm-up at startup and cache snapshots at shutdown.
+
+On start, the national numbers from the snapshot file (the keys the previous process had
+cached) and the CACHE_WARMUP_TOP_N most looked-up ones in recent `logs` rows are loaded
+with the set-based batch query, so the first requests after a deploy are hits instead
+of a burst of single-row reads. Only keys are snapshotted: values are always recomputed
+from the database, so a snapshot can never resurrect stale data.
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from .data_access import AsyncDataAccess
+from .logger import DBLogger
+
+
+class WarmupState:
+    """Readiness as reported by /healthz; ready from the start unless a warm-up is scheduled."""
+    def __init__(self):
+        self.ready = True
+        self.loaded = 0
+
+    def as_dict(self) -> dict:
+        return {"ok": self.ready, "warming": not self.ready, "loaded": self.loaded}
+
+
+state = WarmupState()
+
+
+def load_snapshot(path: str | Path) -> list[str]:
+    """National numbers from a snapshot file; a missing or unreadable file yields []."""
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    return [n for n in data.get("nationals", []) if isinstance(n, str)]
+
+
+def dump_snapshot(path: str | Path, nationals: list[str]) -> int:
+    """Write the snapshot atomically (temp file + rename), so a crash never leaves half a file."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({
+        "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "nationals": nationals,
+    }), encoding="utf-8")
+    os.replace(tmp, path)
+    return len(nationals)
+
+
+async def warm_up(data: AsyncDataAccess, logger: DBLogger, top_n: int = 0, lookback_hours: float = 24,
+                  snapshot_path: str = "", timeout: float = 60) -> dict:
+    """
+    Preload the response cache; `state.ready` flips to True when done, failed or timed out.
+    Returns what was loaded, for the startup log line.
+    """
+    from .api import preload
+
+    t0 = time.perf_counter()
+    state.ready, state.loaded = False, 0
+    result = {"snapshot": 0, "top": 0, "loaded": 0}
+    try:
+        async def run():
+            nationals = load_snapshot(snapshot_path) if snapshot_path else []
+            result["snapshot"] = len(nationals)
+            if top_n:
+                since = datetime.now(timezone.utc) - timedelta(hours=lookback_hours)
+                top = await data.top_requested_nationals(top_n, since)
+                result["top"] = len(top)
+                nationals += top
+            await preload(list(dict.fromkeys(nationals)), data, progress=_progress)
+
+        await asyncio.wait_for(run(), timeout)
+    except asyncio.TimeoutError:
+        result["timed_out"] = True
+    except Exception as exc:                 # best effort: a failed warm-up must not keep the worker unready
+        result["error"] = type(exc).__name__
+    finally:
+        state.ready = True
+    result["loaded"] = state.loaded
+    result["seconds"] = round(time.perf_counter() - t0, 3)
+    logger.log("ERROR" if "error" in result else "INFO", "cache_warmup", result)
+    return result
+
+
+def _progress(loaded: int):
+    state.loaded = loaded
@@ -0,0 +1,59 @@
+"""
+Throughput benchmark: N single /api/GetEmpStatus calls vs /api/GetEmpStatus/batch.
+
+  python -m bench.batch_bench --lookups 10000 --batch-size 1000
+
+Runs in-process against a fresh SQLite file seeded with synthetic employees;
+every request uses bustCache=true so both paths hit the database.
+"""
+import argparse
+import asyncio
+import time
+
+from .common import AUTH, configure_env, seed_synthetic
+
+
+async def main_async(args):
+    configure_env(LOG_TO_DB=0)
+
+    import httpx
+    from app.main import app, data_access, async_data_access
+    from app.bootstrap import init_database
+
+    init_database(data_access)
+    nationals = seed_synthetic(data_access.engine, args.lookups)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        t0 = time.perf_counter()
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one(nat):
+            async with sem:
+                await client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": nat}, headers=AUTH)
+        await asyncio.gather(*(one(n) for n in nationals))
+        single = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for i in range(0, len(nationals), args.batch_size):
+            r = await client.post("/api/GetEmpStatus/batch?bustCache=true",
+                                  json={"NationalNumbers": nationals[i:i + args.batch_size]}, headers=AUTH)
+            assert r.status_code == 200, r.text
+        batch = time.perf_counter() - t0
+    async_data_access.shutdown()
+
+    print(f"lookups={args.lookups}")
+    print(f"single calls : {single:8.2f}s  {args.lookups / single:10,.0f} lookups/s")
+    print(f"batch/{args.batch_size:<6}: {batch:8.2f}s  {args.lookups / batch:10,.0f} lookups/s  ({single / batch:.1f}x)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lookups", type=int, default=10_000)
+    ap.add_argument("--batch-size", type=int, default=1_000)
+    ap.add_argument("--concurrency", type=int, default=16, help="in-flight single calls")
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+pytest-benchmark suite: Decimal vs integer-cents metrics.
+
+    python -m pytest bench/bench_metrics.py --benchmark-group-by=param:case
+
+Not collected by the regular test run (file name does not match test_*.py).
+"""
+import random
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.bulk_status import compute_bulk
+from app.process_status import compute_metrics, compute_metrics_cents, status_from_average
+
+pytest.importorskip("pytest_benchmark")
+
+_rnd = random.Random(42)
+REQUEST = [(m, Decimal(_rnd.randint(50_000, 900_000)).scaleb(-2)) for m in range(1, 13)]
+REQUEST_CENTS = [(m, int(a.scaleb(2))) for m, a in REQUEST]      # what get_employee_snapshot returns
+BULK_EMPLOYEES = 20_000
+BULK = [[(m, Decimal(_rnd.randint(50_000, 900_000)).scaleb(-2)) for m in range(1, 13)]
+        for _ in range(BULK_EMPLOYEES)]
+
+
+@pytest.mark.parametrize("case", ["per_request"])
+@pytest.mark.parametrize("engine", ["decimal", "cents"])
+def test_per_request(benchmark, case, engine):
+    if engine == "decimal":
+        run = lambda: compute_metrics(REQUEST)
+    else:
+        run = lambda: compute_metrics_cents(REQUEST_CENTS)
+    m = benchmark(lambda: status_from_average(run()["averageAfterTax"]))
+    assert m in ("GREEN", "ORANGE", "RED")
+
+
+@pytest.mark.parametrize("case", ["bulk"])
+@pytest.mark.parametrize("engine", ["decimal", "cents", "numpy"])
+def test_bulk(benchmark, case, engine):
+    if engine == "numpy":
+        uids = np.repeat(np.arange(BULK_EMPLOYEES), 12)
+        months = np.tile(np.arange(1, 13), BULK_EMPLOYEES)
+        cents = np.array([int(a.scaleb(2)) for rows in BULK for _, a in rows], dtype=np.int64)
+        res = benchmark(compute_bulk, uids, months, cents)
+        assert res["user_id"].size == BULK_EMPLOYEES
+        return
+    if engine == "cents":
+        data = [[(m, int(a.scaleb(2))) for m, a in rows] for rows in BULK]
+        run = lambda: [compute_metrics_cents(rows) for rows in data]
+    else:
+        run = lambda: [compute_metrics(rows) for rows in BULK]
+    assert len(benchmark.pedantic(run, rounds=3)) == BULK_EMPLOYEES
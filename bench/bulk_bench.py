@@ -0,0 +1,54 @@
+"""
+Bulk status engine vs per-employee compute_metrics on a synthetic dataset.
+
+  python -m bench.bulk_bench --employees 1000000 --months 12
+
+The data is generated directly as NumPy arrays (no database), so this measures the
+computation only. The Decimal path is timed on --decimal-sample employees and
+extrapolated to the full population.
+"""
+import argparse
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from app.bulk_status import compute_bulk
+from app.process_status import compute_metrics, status_from_average
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--employees", type=int, default=1_000_000)
+    ap.add_argument("--months", type=int, default=12)
+    ap.add_argument("--decimal-sample", type=int, default=20_000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n, m = args.employees, args.months
+    user_ids = np.repeat(np.arange(1, n + 1, dtype=np.int64), m)
+    months = np.tile(np.arange(1, m + 1, dtype=np.int64), n)
+    cents = np.round(rng.lognormal(7.4, 0.5, n * m) * 100).astype(np.int64)
+
+    t0 = time.perf_counter()
+    res = compute_bulk(user_ids, months, cents)
+    bulk = time.perf_counter() - t0
+
+    sample = min(args.decimal_sample, n)
+    rows = [[(int(months[i]), Decimal(int(cents[i])).scaleb(-2)) for i in range(u * m, (u + 1) * m)]
+            for u in range(sample)]
+    t0 = time.perf_counter()
+    for r in rows:
+        status_from_average(compute_metrics(r)["averageAfterTax"])
+    per_emp = (time.perf_counter() - t0) / sample
+
+    print(f"employees={n:,} rows={n * m:,}")
+    print(f"bulk engine        : {bulk:8.2f}s  ({n / bulk:12,.0f} employees/s)")
+    print(f"compute_metrics    : {per_emp * n:8.2f}s  ({1 / per_emp:12,.0f} employees/s, extrapolated from {sample:,})")
+    print(f"speedup            : {per_emp * n / bulk:8.1f}x")
+    print("status counts      :", {s: int((res['status'] == s).sum()) for s in ("GREEN", "ORANGE", "RED")})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Microbenchmark: bounded LRU TTLCache vs the original unbounded dict cache.
+
+  python -m bench.cache_bench --keys 200000 --ops 500000 --threads 1 4
+
+Reports ops/sec for a mixed get/set workload over a key space larger than the
+cache budget, plus the final entry count (memory proxy) of each implementation.
+"""
+import argparse
+import random
+import threading
+import time
+from threading import RLock
+from typing import Any
+
+from app.cache import TTLCache
+
+
+class LegacyTTLCache:
+    """The pre-LRU implementation, kept verbatim for comparison."""
+    def __init__(self, ttl_seconds: int = 60):
+        self.ttl = ttl_seconds
+        self.store: dict[str, tuple[float, Any]] = {}
+        self._lock = RLock()
+
+    def get(self, key: str):
+        with self._lock:
+            val = self.store.get(key)
+            if not val:
+                return None
+            t, data = val
+            if time.time() - t > self.ttl:
+                self.store.pop(key, None)
+                return None
+            return data
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self.store[key] = (time.time(), value)
+
+    def __len__(self):
+        return len(self.store)
+
+
+VALUE = {
+    "EmployeeName": "jdoe", "NationalNumber": "NAT1001", "HighestSalary": 1600.0,
+    "AverageSalary": 1392.0, "Status": "RED", "IsActive": True, "LastUpdated": "2025-01-01T00:00:00Z",
+}
+
+
+def _run(cache, keys: list[str], ops: int, threads: int, set_ratio: float) -> float:
+    per_thread = ops // threads
+    hot = max(1, len(keys) // 100)
+
+    def work(seed: int):
+        rnd = random.Random(seed)
+        for _ in range(per_thread):
+            # 80% of traffic on the hottest 1% of keys, the rest spread over the whole key space
+            k = keys[rnd.randrange(hot) if rnd.random() < 0.8 else rnd.randrange(len(keys))]
+            if cache.get(k) is None or rnd.random() < set_ratio:
+                cache.set(k, VALUE)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--keys", type=int, default=200_000)
+    ap.add_argument("--ops", type=int, default=500_000)
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--max-entries", type=int, default=50_000)
+    ap.add_argument("--stripes", type=int, default=8)
+    ap.add_argument("--set-ratio", type=float, default=0.05)
+    args = ap.parse_args()
+
+    keys = [f"empstatus:NAT{i}" for i in range(args.keys)]
+    impls = {
+        "legacy": lambda: LegacyTTLCache(ttl_seconds=600),
+        "lru": lambda: TTLCache(ttl_seconds=600, max_entries=args.max_entries),
+        f"lru-striped/{args.stripes}": lambda: TTLCache(ttl_seconds=600, max_entries=args.max_entries,
+                                                        stripes=args.stripes),
+    }
+    print(f"{'impl':<16} {'threads':>7} {'ops/s':>12} {'entries':>9}")
+    for name, make in impls.items():
+        for threads in args.threads:
+            cache = make()
+            rate = _run(cache, keys, args.ops, threads, args.set_ratio)
+            print(f"{name:<16} {threads:>7} {rate:>12,.0f} {len(cache):>9}")
+
+
+if __name__ == "__main__":
+    main()
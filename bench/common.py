@@ -0,0 +1,160 @@
+"""Shared helpers for the benchmark scripts in this folder."""
+import os
+import statistics
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+AUTH = {"Authorization": "Bearer bench-token"}
+
+
+def configure_env(db_path: Path | None = None, **overrides) -> Path:
+    """
+    Point the app at a throwaway SQLite file. Must run before importing `app.*`
+    because settings are read at import time.
+    """
+    if db_path is None:
+        db_path = Path(tempfile.mkdtemp(prefix="empstatus-bench-")) / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["API_TOKEN"] = AUTH["Authorization"].split(" ", 1)[1]
+    for k, v in overrides.items():
+        os.environ[k] = str(v)
+    return db_path
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(samples_ms: list[float]) -> dict:
+    return {
+        "n": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+def seed_synthetic(engine, n_users: int, months: int = 6, seed: int = 7, inactive_ratio: float = 0.05) -> list[str]:
+    """
+    Bulk-insert `n_users` employees with `months` salary rows each (log-normal amounts)
+    and return their national numbers. Tables must already exist.
+    """
+    import random
+    from sqlalchemy import insert
+    from app.models import User, Salary
+
+    rnd = random.Random(seed)
+    nationals = [f"SYN{i:08d}" for i in range(n_users)]
+    with engine.begin() as conn:
+        start = (conn.exec_driver_sql("SELECT COALESCE(MAX(id), 0) FROM users").scalar() or 0) + 1
+        users, salaries = [], []
+        for i, nat in enumerate(nationals):
+            uid = start + i
+            users.append({"id": uid, "username": f"syn{uid}", "national_number": nat,
+                          "email": f"syn{uid}@example.com", "phone": None,
+                          "is_active": rnd.random() >= inactive_ratio})
+            for m in range(1, months + 1):
+                salaries.append({"user_id": uid, "year": 2025, "month": m,
+                                 "amount": round(rnd.lognormvariate(7.4, 0.5), 2)})
+            if len(salaries) >= 50_000:
+                conn.execute(insert(User), users)
+                conn.execute(insert(Salary), salaries)
+                users, salaries = [], []
+        if users:
+            conn.execute(insert(User), users)
+        if salaries:
+            conn.execute(insert(Salary), salaries)
+    return nationals
+
+
+def synthetic_national(i: int) -> str:
+    """National number of the i-th employee written by `generate_dataset` / `seed_synthetic`."""
+    return f"SYN{i:08d}"
+
+
+def generate_dataset(engine, n_users: int, months: int = 12, seed: int = 7, inactive_ratio: float = 0.03,
+                     short_history_ratio: float = 0.02, chunk_users: int = 20_000,
+                     progress: Callable[[int], None] | None = None) -> int:
+    """
+    Stream `n_users` employees into an empty database, `chunk_users` per transaction, so
+    10M employees never sit in memory. Salaries are realistic rather than i.i.d.: a
+    log-normal base per employee (a few pay bands), +-3% monthly noise, a raise of 3-12%
+    for a third of them part-way through the year, and `short_history_ratio` of employees
+    with fewer than 3 months (the 422 path). Returns the number of salary rows written.
+    """
+    import numpy as np
+    from sqlalchemy import insert
+    from app.models import Base, Salary, User
+
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(seed)
+    band_mu = np.log([600.0, 1100.0, 1900.0, 3500.0])
+    band_p = [0.35, 0.40, 0.20, 0.05]
+    month_idx = np.arange(1, months + 1)
+    written = 0
+    with engine.connect() as conn:
+        for start in range(0, n_users, chunk_users):
+            n = min(chunk_users, n_users - start)
+            ids = np.arange(start + 1, start + n + 1)
+            base = np.exp(rng.choice(band_mu, n, p=band_p) + rng.normal(0, 0.25, n))
+            raise_at = np.where(rng.random(n) < 1 / 3, rng.integers(2, months + 1, n), months + 1)
+            raise_pct = rng.uniform(0.03, 0.12, n)
+            history = np.where(rng.random(n) < short_history_ratio, rng.integers(0, 3, n), months)
+            active = rng.random(n) >= inactive_ratio
+
+            amounts = base[:, None] * rng.normal(1.0, 0.03, (n, months))
+            amounts *= np.where(month_idx[None, :] >= raise_at[:, None], 1 + raise_pct[:, None], 1.0)
+            keep = month_idx[None, :] > months - history[:, None]          # most recent `history` months
+
+            users = [{"id": int(uid), "username": f"syn{uid}", "national_number": synthetic_national(int(uid) - 1),
+                      "email": f"syn{uid}@example.com", "phone": None, "is_active": bool(a)}
+                     for uid, a in zip(ids, active)]
+            rows, cols = np.nonzero(keep)
+            salaries = [{"user_id": int(ids[r]), "year": 2025, "month": int(c) + 1,
+                         "amount": round(float(amounts[r, c]), 2)} for r, c in zip(rows, cols)]
+            with conn.begin():
+                conn.execute(insert(User), users)
+                if salaries:
+                    conn.execute(insert(Salary), salaries)
+            written += len(salaries)
+            if progress is not None:
+                progress(start + n)
+    return written
+
+
+async def asgi_request(app, method: str, path: str, body: bytes = b"",
+                       headers: dict[str, str] | None = None) -> tuple[int, bytes]:
+    """Minimal in-process ASGI call, so client-side HTTP overhead stays out of the numbers."""
+    raw_path, _, query = path.partition("?")
+    hdrs = [(b"content-type", b"application/json")]
+    hdrs += [(k.lower().encode(), v.encode()) for k, v in (headers or AUTH).items()]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": raw_path, "raw_path": raw_path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": hdrs, "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    sent = False
+    status, chunks = 0, []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
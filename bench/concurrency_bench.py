@@ -0,0 +1,119 @@
+"""
+Concurrency benchmark for POST /api/GetEmpStatus.
+
+Drives the ASGI app in-process with N concurrent clients while every SQL
+statement is slowed down by --query-ms (simulating a remote database), and
+reports p50/p99 latency for the API and for /healthz probes issued alongside.
+
+  python -m bench.concurrency_bench                      # offloaded (current)
+  python -m bench.concurrency_bench --mode blocking      # old inline behaviour
+
+With the worker-pool offload the /healthz p99 stays flat as clients grow and
+API latency only rises once DB_MAX_WORKERS is saturated; in blocking mode
+every request queues behind every query on the event loop.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from .common import AUTH, configure_env, summarize
+
+
+class _InlineDataAccess:
+    """Reproduces the pre-offload behaviour: DB calls run on the event loop."""
+    def __init__(self, sync):
+        self.sync = sync
+
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def __getattr__(self, name):
+        fn = getattr(self.sync, name)
+
+        async def call(*args, **kwargs):
+            return fn(*args, **kwargs)
+        return call
+
+
+async def _level(client, clients: int, requests_per_client: int) -> dict:
+    api_ms: list[float] = []
+    probe_ms: list[float] = []
+    nationals = ["NAT1001", "NAT1002", "NAT1004", "NAT1005", "NAT1008"]
+
+    async def worker(i: int):
+        for j in range(requests_per_client):
+            t0 = time.perf_counter()
+            r = await client.post(
+                "/api/GetEmpStatus?bustCache=true",
+                json={"NationalNumber": nationals[(i + j) % len(nationals)]},
+                headers=AUTH,
+            )
+            api_ms.append((time.perf_counter() - t0) * 1000)
+            assert r.status_code == 200, r.text
+
+    async def prober(stop: asyncio.Event):
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await client.get("/healthz")
+            probe_ms.append((time.perf_counter() - t0) * 1000)
+            await asyncio.sleep(0.005)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(prober(stop))
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    stop.set()
+    await probe
+    return {"clients": clients, "api": summarize(api_ms), "healthz": summarize(probe_ms)}
+
+
+async def main_async(args) -> list[dict]:
+    configure_env(DB_MAX_WORKERS=args.workers, LOG_TO_DB=args.log_to_db)
+
+    import httpx
+    from sqlalchemy import event
+    from app.main import app, data_access, async_data_access
+    from app.api import router
+    from app.bootstrap import init_database
+
+    init_database(data_access)
+    delay = args.query_ms / 1000
+
+    @event.listens_for(data_access.engine, "before_cursor_execute")
+    def _slow(*_):
+        time.sleep(delay)
+
+    router.data_access = async_data_access if args.mode == "offload" else _InlineDataAccess(data_access)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for clients in args.clients:
+            results.append(await _level(client, clients, args.requests))
+    async_data_access.shutdown()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mode", choices=("offload", "blocking"), default="offload")
+    ap.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--requests", type=int, default=20, help="requests per client")
+    ap.add_argument("--query-ms", type=float, default=5.0, help="artificial latency per SQL statement")
+    ap.add_argument("--workers", type=int, default=16, help="DB_MAX_WORKERS")
+    ap.add_argument("--log-to-db", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = ap.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps({"mode": args.mode, "results": results}, indent=2))
+        return
+    print(f"mode={args.mode} query_ms={args.query_ms} workers={args.workers}")
+    print(f"{'clients':>8} {'api p50':>10} {'api p99':>10} {'healthz p99':>12}")
+    for r in results:
+        print(f"{r['clients']:>8} {r['api']['p50_ms']:>10.2f} {r['api']['p99_ms']:>10.2f} {r['healthz']['p99_ms']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Overload benchmark: goodput of POST /api/GetEmpStatus past DB saturation.
+
+Closed-loop clients send cache-missing requests (bustCache) for distinct employees
+while every SQL statement is slowed by --query-ms. A response only counts towards
+goodput if it is a 200 within --slo-ms. Each client level runs twice: with the DB
+concurrency limiter off (everything queues on the worker pool) and adaptive.
+
+  python -m bench.overload_bench --clients 16 64 256 512
+
+Clients honour Retry-After on a 503. Without shedding, latency grows with the queue
+until almost nothing meets the SLO; with it, excess requests get an immediate 503 and
+goodput stays close to capacity (e.g. 339 vs 17 req/s at 256 clients, 20 ms queries).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from .common import AUTH, configure_env, seed_synthetic, summarize
+
+
+async def _level(client, nationals: list[str], clients: int, seconds: float, slo_ms: float,
+                 backoff: float) -> dict:
+    ok_ms: list[float] = []
+    codes: dict[int, int] = {}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(i: int):
+        j = i
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            r = await client.post("/api/GetEmpStatus?bustCache=true",
+                                  json={"NationalNumber": nationals[j % len(nationals)]}, headers=AUTH)
+            codes[r.status_code] = codes.get(r.status_code, 0) + 1
+            if r.status_code == 200:
+                ok_ms.append((time.perf_counter() - t0) * 1000)
+            elif r.status_code == 503:
+                # a polite client honours Retry-After (or --backoff-ms when given)
+                await asyncio.sleep(backoff if backoff else float(r.headers.get("Retry-After", 1)))
+            j += clients
+
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    good = sum(1 for ms in ok_ms if ms <= slo_ms)
+    return {"clients": clients, "codes": {str(k): v for k, v in sorted(codes.items())},
+            "goodput_rps": round(good / seconds, 1), "ok": summarize(ok_ms)}
+
+
+async def main_async(args) -> list[dict]:
+    configure_env(DB_MAX_WORKERS=args.workers, DB_POOL_SIZE=args.workers, LOG_TO_DB=0,
+                  NEGATIVE_CACHE_TTL_SECONDS=0)
+
+    import httpx
+    from sqlalchemy import event
+    from app import api
+    from app.main import app, data_access, async_data_access
+    from app.bootstrap import init_database
+    from app.limits import ConcurrencyLimiter
+
+    init_database(data_access)
+    nationals = seed_synthetic(data_access.engine, 2000, inactive_ratio=0)
+    delay = args.query_ms / 1000
+
+    @event.listens_for(data_access.engine, "before_cursor_execute")
+    def _slow(*_):
+        time.sleep(delay)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for clients in args.clients:
+            for mode in ("off", "adaptive"):
+                api._db_limiter = ConcurrencyLimiter(
+                    args.workers if mode == "adaptive" else 0,
+                    max_limit=args.workers * 4, target_latency=args.target_ms / 1000)
+                r = await _level(client, nationals, clients, args.seconds, args.slo_ms, args.backoff_ms / 1000)
+                r["mode"] = mode
+                r["final_limit"] = round(api._db_limiter.limit, 1)
+                results.append(r)
+    async_data_access.shutdown()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, nargs="+", default=[16, 64, 256, 512])
+    ap.add_argument("--seconds", type=float, default=5.0, help="duration of each level")
+    ap.add_argument("--query-ms", type=float, default=20.0, help="artificial latency per SQL statement")
+    ap.add_argument("--workers", type=int, default=16, help="DB_MAX_WORKERS (and pool size)")
+    ap.add_argument("--slo-ms", type=float, default=250.0, help="a 200 slower than this is not goodput")
+    ap.add_argument("--target-ms", type=float, default=100.0, help="DB_LATENCY_TARGET_MS for the adaptive mode")
+    ap.add_argument("--backoff-ms", type=float, default=0.0, help="client pause after a 503 (0 = Retry-After)")
+    ap.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = ap.parse_args()
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"query_ms={args.query_ms} workers={args.workers} slo_ms={args.slo_ms}")
+    print(f"{'clients':>8} {'mode':>9} {'goodput/s':>10} {'ok p50':>9} {'ok p99':>9} {'limit':>6}  codes")
+    for r in results:
+        print(f"{r['clients']:>8} {r['mode']:>9} {r['goodput_rps']:>10.1f} {r['ok']['p50_ms']:>9.1f} "
+              f"{r['ok']['p99_ms']:>9.1f} {r['final_limit']:>6}  {r['codes']}")
+
+
+if __name__ == "__main__":
+    main()
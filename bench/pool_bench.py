@@ -0,0 +1,123 @@
+"""
+Connection-pool load test for POST /api/GetEmpStatus.
+
+Drives the ASGI app in-process at each --clients level with bustCache=true (every
+request hits the DB) while the buffered DB logger writes concurrently, and reports
+latency, the peak number of checked-out connections and the status codes seen.
+
+  python -m bench.pool_bench
+  python -m bench.pool_bench --pool-size 4 --max-overflow 0     # reproduce exhaustion
+
+With DB_POOL_SIZE >= DB_MAX_WORKERS the peak stays at the worker count (plus the
+logger/refresher) and no request waits for a connection; an undersized pool shows
+up as checkout wait and, past DB_POOL_TIMEOUT_SECONDS, as 500s.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from .common import AUTH, configure_env, summarize
+
+
+async def _level(client, clients: int, requests_per_client: int, nationals: list[str]) -> dict:
+    latencies: list[float] = []
+    codes: dict[int, int] = {}
+
+    async def worker(i: int):
+        for j in range(requests_per_client):
+            t0 = time.perf_counter()
+            r = await client.post(
+                "/api/GetEmpStatus?bustCache=true",
+                json={"NationalNumber": nationals[(i * requests_per_client + j) % len(nationals)]},
+                headers=AUTH,
+            )
+            latencies.append((time.perf_counter() - t0) * 1000)
+            codes[r.status_code] = codes.get(r.status_code, 0) + 1
+
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    return {"clients": clients, "api": summarize(latencies), "codes": codes}
+
+
+async def main_async(args) -> dict:
+    configure_env(
+        DB_MAX_WORKERS=args.workers,
+        DB_POOL_SIZE=args.pool_size,
+        DB_MAX_OVERFLOW=args.max_overflow,
+        DB_POOL_TIMEOUT_SECONDS=args.pool_timeout,
+        LOG_TO_DB=1,
+        LOG_FLUSH_INTERVAL_SECONDS=0.05,
+    )
+
+    import httpx
+    from sqlalchemy import event
+    from app.main import app, data_access, async_data_access, db_logger
+    from app.bootstrap import init_database
+    from .common import seed_synthetic
+
+    init_database(data_access)
+    nationals = seed_synthetic(data_access.engine, args.users)
+    delay = args.query_ms / 1000
+    peak = {"now": 0, "max": 0}
+
+    @event.listens_for(data_access.engine, "before_cursor_execute")
+    def _slow(*_):
+        time.sleep(delay)
+
+    @event.listens_for(data_access.engine.pool, "checkout")
+    def _out(*_):
+        peak["now"] += 1
+        peak["max"] = max(peak["max"], peak["now"])
+
+    @event.listens_for(data_access.engine.pool, "checkin")
+    def _in(*_):
+        peak["now"] -= 1
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for clients in args.clients:
+            peak["max"] = peak["now"]
+            res = await _level(client, clients, args.requests, nationals)
+            res["peak_checked_out"] = peak["max"]
+            results.append(res)
+    db_logger.close()
+    async_data_access.shutdown()
+    capacity = args.pool_size + args.max_overflow
+    return {
+        "pool_size": args.pool_size, "max_overflow": args.max_overflow, "workers": args.workers,
+        "capacity": capacity,
+        # reaching capacity means later checkouts queued; 5xx means one timed out
+        "exhausted": any(r["peak_checked_out"] >= capacity or any(c >= 500 for c in r["codes"]) for r in results),
+        "results": results,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clients", type=int, nargs="+", default=[16, 64, 256])
+    ap.add_argument("--requests", type=int, default=10, help="requests per client")
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--query-ms", type=float, default=2.0, help="artificial latency per SQL statement")
+    ap.add_argument("--workers", type=int, default=16, help="DB_MAX_WORKERS")
+    ap.add_argument("--pool-size", type=int, default=16)
+    ap.add_argument("--max-overflow", type=int, default=8)
+    ap.add_argument("--pool-timeout", type=float, default=10)
+    ap.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = ap.parse_args()
+
+    report = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"pool_size={report['pool_size']} max_overflow={report['max_overflow']} "
+          f"workers={report['workers']} capacity={report['capacity']}")
+    print(f"{'clients':>8} {'p50':>9} {'p99':>9} {'peak conns':>11}  codes")
+    for r in report["results"]:
+        print(f"{r['clients']:>8} {r['api']['p50_ms']:>9.2f} {r['api']['p99_ms']:>9.2f} "
+              f"{r['peak_checked_out']:>11}  {r['codes']}")
+    print("pool exhausted" if report["exhausted"] else "no pool exhaustion")
+
+
+if __name__ == "__main__":
+    main()
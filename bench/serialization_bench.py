@@ -0,0 +1,94 @@
+"""
+CPU per cache hit on POST /api/GetEmpStatus: pre-encoded bytes vs. dict + response_model.
+
+Both variants run in-process through the same ASGI stack, dependencies and warm cache;
+"legacy" mounts a copy of the old hit path that returns the cached dict, so FastAPI
+validates it against FlatGetEmpStatusResponse and JSON-encodes it on every hit.
+Requests are driven by a bare ASGI call so client overhead stays out of the numbers.
+
+  python -m bench.serialization_bench --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from .common import asgi_request, configure_env
+
+
+async def _post(app, path: str, body: bytes) -> tuple[int, bytes]:
+    return await asgi_request(app, "POST", path, body)
+
+
+async def _measure(app, path: str, national: str, n: int) -> dict:
+    body = json.dumps({"NationalNumber": national}).encode()
+    for _ in range(200):                                  # warm-up
+        await _post(app, path, body)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for _ in range(n):
+        status, content = await _post(app, path, body)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    assert status == 200, content
+    return {"requests": n, "cpu_us_per_request": round(cpu / n * 1e6, 1),
+            "wall_us_per_request": round(wall / n * 1e6, 1), "body_bytes": len(content)}
+
+
+async def main_async(args) -> dict:
+    configure_env(LOG_TO_DB=0, CACHE_TTL_SECONDS=3600)
+
+    from fastapi import APIRouter, Depends, Query
+    from app.main import app, data_access
+    from app.api import _data_access, _decode, router
+    from app.data_access import AsyncDataAccess
+    from app.metrics import CACHE_LOOKUPS, STAGE_LATENCY
+    from app.bootstrap import init_database
+    from app.schema import FlatGetEmpStatusResponse, GetEmpStatusRequest
+    from app.validator import Validator
+
+    init_database(data_access)
+    national = "NAT1001"
+    status, content = await _post(app, "/api/GetEmpStatus", json.dumps({"NationalNumber": national}).encode())
+    assert status == 200, content
+    legacy_cache = {national: _decode(content)}
+
+    # the pre-change hit path: same dependencies, lookups and logging, but the cached
+    # dict is returned through response_model (validated + JSON-encoded per request)
+    legacy = APIRouter()
+
+    @legacy.post("/legacy/GetEmpStatus", response_model=FlatGetEmpStatusResponse)
+    async def legacy_get(
+        payload: GetEmpStatusRequest,
+        data: AsyncDataAccess = Depends(_data_access),
+        _: None = Depends(Validator.validate_token),
+        bustCache: bool = Query(default=False),
+    ):
+        nat = payload.NationalNumber.strip()
+        with STAGE_LATENCY.time("cache_lookup"):
+            cached = legacy_cache.get(nat)
+        CACHE_LOOKUPS.inc("hit")
+        router.db_logger.log("INFO", "cache_hit", {"nationalNumber": nat})
+        return cached
+
+    app.include_router(legacy)
+    return {
+        "legacy": await _measure(app, "/legacy/GetEmpStatus", national, args.requests),
+        "encoded": await _measure(app, "/api/GetEmpStatus", national, args.requests),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = ap.parse_args()
+    report = asyncio.run(main_async(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for name, r in report.items():
+        print(f"{name:>8}: {r['cpu_us_per_request']:>8.1f} us CPU/request  "
+              f"{r['wall_us_per_request']:>8.1f} us wall/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+Reproducible benchmark suite: synthetic data, HTTP load mixes, components, baselines.
+
+  python -m bench.suite datagen --employees 1000000 --db /tmp/emp1m.db
+  python -m bench.suite run --db /tmp/emp1m.db --target inproc uvicorn \\
+      --concurrency 1 16 64 --hit-ratio 0 0.9 0.99 --out results.json
+  python -m bench.suite run --baseline bench-baseline.json        # fails on regressions
+  python -m bench.suite compare results.json bench-baseline.json
+
+`run` without --db generates a seeded --employees dataset in a temp directory first.
+HTTP scenarios send POST /api/GetEmpStatus from --concurrency closed-loop clients; a
+--hit-ratio share of requests goes to a pre-warmed hot set, the rest are misses
+(`bustCache=true` on a random employee, i.e. always a DB read + computation).
+"inproc" drives the ASGI app directly; "uvicorn" starts `uvicorn app.main:app` with
+--uvicorn-workers and goes over TCP. Component scenarios time the response cache, the
+snapshot query and compute_metrics_cents on their own. Every scenario reports
+throughput and p50/p95/p99 latency; results are written as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .common import AUTH, asgi_request, configure_env, generate_dataset, summarize, synthetic_national
+
+
+def _database_url(args) -> str:
+    if args.database_url:
+        return args.database_url
+    return f"sqlite:///{Path(args.db).resolve()}"
+
+
+# -- datagen --
+
+def cmd_datagen(args) -> dict:
+    from app.data_access import DataAccess
+
+    da = DataAccess(_database_url(args))
+    t0 = time.perf_counter()
+
+    def report(done: int):
+        print(f"{done}/{args.employees} employees", file=sys.stderr)
+
+    salaries = generate_dataset(da.engine, args.employees, months=args.months, seed=args.seed,
+                                chunk_users=args.chunk, progress=report)
+    da.engine.dispose()
+    return {"employees": args.employees, "salaries": salaries, "seconds": round(time.perf_counter() - t0, 1)}
+
+
+# -- HTTP scenarios --
+
+def _workload(seed: int, employees: int, hot: list[str], hit_ratio: float):
+    """Endless (path, body) stream: hot-set hits with probability `hit_ratio`, else forced misses."""
+    rnd = random.Random(seed)
+    while True:
+        if hot and rnd.random() < hit_ratio:
+            yield "/api/GetEmpStatus", json.dumps({"NationalNumber": rnd.choice(hot)}).encode()
+        else:
+            national = synthetic_national(rnd.randrange(employees))
+            yield "/api/GetEmpStatus?bustCache=true", json.dumps({"NationalNumber": national}).encode()
+
+
+async def _drive(send, concurrency: int, requests: int, seed: int, employees: int,
+                 hot: list[str], hit_ratio: float) -> dict:
+    latencies: list[float] = []
+    codes: dict[int, int] = {}
+    remaining = requests
+
+    async def client(i: int):
+        nonlocal remaining
+        for path, body in _workload(seed * 1000 + i, employees, hot, hit_ratio):
+            if remaining <= 0:
+                return
+            remaining -= 1
+            t0 = time.perf_counter()
+            status = await send(path, body)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            codes[status] = codes.get(status, 0) + 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    seconds = time.perf_counter() - t0
+    return {
+        "requests": len(latencies), "seconds": round(seconds, 3),
+        "throughput": round(len(latencies) / seconds, 1),
+        "codes": {str(k): v for k, v in sorted(codes.items())},
+        "errors": sum(v for k, v in codes.items() if k >= 500),
+        "latency_ms": summarize(latencies),
+    }
+
+
+async def _http_scenarios(target: str, send, args, employees: int, warm_passes: int = 1) -> list[dict]:
+    hot = [synthetic_national(i) for i in random.Random(args.seed).sample(range(employees),
+                                                                          min(args.hot_set, employees))]
+    for _ in range(warm_passes):
+        for national in hot:
+            await send("/api/GetEmpStatus", json.dumps({"NationalNumber": national}).encode())
+    results = []
+    for concurrency in args.concurrency:
+        for hit_ratio in args.hit_ratio:
+            r = await _drive(send, concurrency, args.requests, args.seed, employees, hot, hit_ratio)
+            results.append({"name": f"http:{target}:c{concurrency}:h{hit_ratio:g}", "kind": "http",
+                            "target": target, "concurrency": concurrency, "hit_ratio": hit_ratio, **r})
+            print(f"{results[-1]['name']}: {r['throughput']} req/s p99 {r['latency_ms']['p99_ms']} ms",
+                  file=sys.stderr)
+    return results
+
+
+async def _run_inproc(args, employees: int) -> list[dict]:
+    from app.main import app, lifespan
+
+    async def send(path: str, body: bytes) -> int:
+        return (await asgi_request(app, "POST", path, body))[0]
+
+    async with lifespan(app):
+        return await _http_scenarios("inproc", send, args, employees)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _run_uvicorn(args, employees: int) -> list[dict]:
+    import httpx
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.uvicorn_workers), "--log-level", "warning", "--no-access-log"],
+        env=dict(os.environ),
+    )
+    try:
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    if (await client.get("/healthz")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.2)
+
+            async def send(path: str, body: bytes) -> int:
+                r = await client.post(path, content=body,
+                                      headers={**AUTH, "Content-Type": "application/json"})
+                return r.status_code
+
+            # per-worker memory caches: warm often enough that every worker likely saw the hot set
+            return await _http_scenarios("uvicorn", send, args, employees, warm_passes=2 * args.uvicorn_workers)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# -- component scenarios --
+
+def _timed(name: str, fn, inputs: list) -> dict:
+    for x in inputs[:100]:                                # warm-up
+        fn(x)
+    latencies = []
+    t0 = time.perf_counter()
+    for x in inputs:
+        t = time.perf_counter()
+        fn(x)
+        latencies.append((time.perf_counter() - t) * 1000)
+    seconds = time.perf_counter() - t0
+    return {"name": f"component:{name}", "kind": "component", "requests": len(inputs),
+            "seconds": round(seconds, 3), "throughput": round(len(inputs) / seconds, 1),
+            "errors": 0, "latency_ms": summarize(latencies)}
+
+
+def _components(args, employees: int) -> list[dict]:
+    from app.cache import TTLCache
+    from app.data_access import DataAccess
+    from app.process_status import ProcessStatus
+
+    rnd = random.Random(args.seed)
+    n = args.component_ops
+    cache = TTLCache(ttl_seconds=3600, max_entries=100_000)
+    keys = [f"empstatus:{synthetic_national(i)}" for i in range(min(employees, 100_000))]
+    body = b'{"EmployeeName":"syn1","NationalNumber":"SYN00000000","HighestSalary":1600.0}'
+    for k in keys:
+        cache.set(k, body)
+    da = DataAccess(_database_url(args))
+    salaries = [[(m, rnd.randint(50_000, 900_000)) for m in range(1, 13)] for _ in range(1000)]
+    results = [
+        _timed("cache_get", cache.get, [rnd.choice(keys) for _ in range(n)]),
+        _timed("snapshot_fetch", da.get_employee_snapshot,
+               [synthetic_national(rnd.randrange(employees)) for _ in range(min(n, 20_000))]),
+        _timed("compute_metrics_cents", ProcessStatus.compute_metrics_cents, [rnd.choice(salaries) for _ in range(n)]),
+    ]
+    da.engine.dispose()
+    for r in results:
+        print(f"{r['name']}: {r['throughput']} ops/s p99 {r['latency_ms']['p99_ms']} ms", file=sys.stderr)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def cmd_run(args) -> dict:
+    generate = not args.db and not args.database_url
+    if generate:
+        args.db = str(Path(tempfile.mkdtemp(prefix="empstatus-suite-")) / "suite.db")
+    # settings are read when app.* is first imported, so the environment goes first
+    configure_env(Path(args.db) if args.db else None, LOG_TO_DB=int(args.log_to_db),
+                  CACHE_TTL_SECONDS=3600, RATE_LIMIT_PER_SECOND=0)
+    url = _database_url(args)
+    os.environ["DATABASE_URL"] = url
+    if generate:
+        print(f"generating {args.employees} employees in {args.db}", file=sys.stderr)
+        cmd_datagen(args)
+
+    from sqlalchemy import create_engine, text
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        employees = conn.execute(text("SELECT COUNT(*) FROM users WHERE national_number LIKE 'SYN%'")).scalar()
+    engine.dispose()
+    if not employees:
+        raise SystemExit("no synthetic employees in the database; run `python -m bench.suite datagen` first")
+
+    results = []
+    if not args.skip_components:
+        results += _components(args, employees)
+    for target in args.target:
+        runner = _run_inproc if target == "inproc" else _run_uvicorn
+        results += asyncio.run(runner(args, employees))
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "employees": employees, "seed": args.seed,
+            "requests_per_scenario": args.requests, "hot_set": args.hot_set,
+        },
+        "results": results,
+    }
+
+
+# -- baseline comparison --
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10, latency_tolerance: float = 0.25) -> dict:
+    """Scenario-by-scenario change vs. `baseline`; a regression is a throughput drop or p99 rise past tolerance."""
+    base = {r["name"]: r for r in baseline["results"]}
+    rows, regressions = [], []
+    for r in current["results"]:
+        b = base.get(r["name"])
+        if b is None:
+            continue
+        throughput = r["throughput"] / b["throughput"] - 1 if b["throughput"] else 0.0
+        p99 = r["latency_ms"]["p99_ms"] / b["latency_ms"]["p99_ms"] - 1 if b["latency_ms"]["p99_ms"] else 0.0
+        row = {"name": r["name"], "throughput_change": round(throughput, 4), "p99_change": round(p99, 4),
+               "regressed": throughput < -tolerance or p99 > latency_tolerance}
+        rows.append(row)
+        if row["regressed"]:
+            regressions.append(r["name"])
+    return {"scenarios": rows, "regressions": regressions,
+            "missing": sorted(set(base) - {r["name"] for r in current["results"]})}
+
+
+def _print_comparison(report: dict):
+    print(f"{'scenario':<36} {'throughput':>11} {'p99':>9}")
+    for row in report["scenarios"]:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        print(f"{row['name']:<36} {row['throughput_change']:>+10.1%} {row['p99_change']:>+8.1%}{flag}")
+    if report["missing"]:
+        print(f"not run: {', '.join(report['missing'])}")
+
+
+def cmd_compare(args) -> int:
+    current = json.loads(Path(args.current).read_text())
+    baseline = json.loads(Path(args.baseline).read_text())
+    report = compare(current, baseline, args.tolerance, args.latency_tolerance)
+    _print_comparison(report)
+    return 1 if report["regressions"] else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def data_options(p):
+        p.add_argument("--db", help="SQLite file holding the dataset")
+        p.add_argument("--database-url", help="any SQLAlchemy URL instead of --db")
+        p.add_argument("--employees", type=int, default=10_000)
+        p.add_argument("--months", type=int, default=12)
+        p.add_argument("--seed", type=int, default=7)
+        p.add_argument("--chunk", type=int, default=20_000, help="employees per insert transaction")
+
+    p = sub.add_parser("datagen", help="write a synthetic dataset")
+    data_options(p)
+
+    p = sub.add_parser("run", help="run the scenarios and write JSON results")
+    data_options(p)
+    p.add_argument("--target", nargs="+", choices=("inproc", "uvicorn"), default=["inproc"])
+    p.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    p.add_argument("--hit-ratio", type=float, nargs="+", default=[0.0, 0.9, 0.99])
+    p.add_argument("--requests", type=int, default=2000, help="requests per HTTP scenario")
+    p.add_argument("--hot-set", type=int, default=1000, help="pre-warmed employees serving the hits")
+    p.add_argument("--uvicorn-workers", type=int, default=1)
+    p.add_argument("--component-ops", type=int, default=100_000)
+    p.add_argument("--skip-components", action="store_true")
+    p.add_argument("--log-to-db", action="store_true", help="keep DB request logging on")
+    p.add_argument("--out", help="write results here (default: stdout)")
+    p.add_argument("--baseline", help="compare against this results file; exit 1 on regressions")
+    p.add_argument("--tolerance", type=float, default=0.10, help="allowed throughput drop")
+    p.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed p99 increase")
+
+    p = sub.add_parser("compare", help="compare two results files")
+    p.add_argument("current")
+    p.add_argument("baseline")
+    p.add_argument("--tolerance", type=float, default=0.10, help="allowed throughput drop")
+    p.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed p99 increase")
+
+    args = ap.parse_args(argv)
+    if args.command == "datagen":
+        if not args.db and not args.database_url:
+            ap.error("datagen needs --db or --database-url")
+        print(json.dumps(cmd_datagen(args)))
+        return 0
+    if args.command == "compare":
+        return cmd_compare(args)
+
+    report = cmd_run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        comparison = compare(report, json.loads(Path(args.baseline).read_text()),
+                             args.tolerance, args.latency_tolerance)
+        _print_comparison(comparison)
+        return 1 if comparison["regressions"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
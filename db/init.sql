@@ -22,4 +22,56 @@ CREATE TABLE IF NOT EXISTS logs (
   message VARCHAR(255) NOT NULL,
   context_json VARCHAR(2000)
 );
-CREATE INDEX IF NOT EXISTS idx_salaries_user ON salaries(user_id);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_logs_created_at ON logs(created_at);
+
+-- per-minute counts of logs rows past raw retention (app.log_retention)
+CREATE TABLE IF NOT EXISTS log_rollups (
+  minute TIMESTAMPTZ NOT NULL,
+  level VARCHAR(10) NOT NULL,
+  message VARCHAR(255) NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT '',
+  count INTEGER NOT NULL,
+  PRIMARY KEY (minute, level, message, status)
+);
+CREATE TABLE IF NOT EXISTS employee_status (
+  user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  count INTEGER NOT NULL,
+  highest NUMERIC(14,2) NOT NULL,
+  sum NUMERIC(14,2) NOT NULL,
+  sum_after_tax NUMERIC(14,2) NOT NULL,
+  average_after_tax NUMERIC(14,2) NOT NULL,
+  status VARCHAR(10) NOT NULL,
+  computed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- users whose salaries/user row changed since the last employee_status refresh
+CREATE TABLE IF NOT EXISTS salary_changes (
+  id SERIAL PRIMARY KEY,
+  user_id INTEGER NOT NULL,
+  changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_salary_changes_user_id ON salary_changes(user_id);
+
+-- progress of app.importer jobs, committed together with each imported chunk
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+  job VARCHAR(255) PRIMARY KEY,
+  rows_done INTEGER NOT NULL DEFAULT 0,
+  finished BOOLEAN NOT NULL DEFAULT FALSE,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+-- content digest + first-seen time per employee: LastUpdated / ETag of GetEmpStatus
+CREATE TABLE IF NOT EXISTS response_versions (
+  national_number VARCHAR(50) PRIMARY KEY,
+  digest VARCHAR(32) NOT NULL,
+  first_seen TIMESTAMPTZ NOT NULL
+);
+-- one runner per background job across workers/hosts (app.leases)
+CREATE TABLE IF NOT EXISTS job_leases (
+  job VARCHAR(64) PRIMARY KEY,
+  holder VARCHAR(128) NOT NULL,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Covering index for the employee snapshot query: user_id prefix serves the join,
+-- INCLUDE keeps amount in the index so salaries heap pages are not touched.
+CREATE INDEX IF NOT EXISTS idx_salaries_user_year_month ON salaries(user_id, year, month) INCLUDE (amount);
\ No newline at end of file
@@ -10,6 +10,8 @@ TEST_DB = pathlib.Path("test.db")
 def test_client():
     os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB}"
     os.environ["API_TOKEN"] = "secret123"
+    # tests drive invalidation.ChangeFeed themselves
+    os.environ["CACHE_INVALIDATION_POLL_SECONDS"] = "0"
 
     from app.main import app
     from app.bootstrap import init_database
@@ -40,11 +42,12 @@ def test_client():
     except Exception:
         pass
 
-    # 2) remove the file with a short retry (Windows)
+    # 2) remove the file (and its WAL side files) with a short retry (Windows)
     for _ in range(5):
         try:
-            if TEST_DB.exists():
-                TEST_DB.unlink()
+            for path in (TEST_DB, TEST_DB.with_name(TEST_DB.name + "-wal"), TEST_DB.with_name(TEST_DB.name + "-shm")):
+                if path.exists():
+                    path.unlink()
             break
         except PermissionError:
             time.sleep(0.2)
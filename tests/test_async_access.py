@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+def test_offloaded_calls_do_not_block_event_loop():
+    from app.data_access import AsyncDataAccess
+
+    class SlowDA:
+        engine = None
+        def get_user_by_national(self, national):
+            time.sleep(0.2)
+            return national
+
+    ada = AsyncDataAccess(SlowDA(), max_workers=4)
+
+    async def scenario():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+        t = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        got = await asyncio.gather(*(ada.get_user_by_national(f"N{i}") for i in range(4)))
+        elapsed = time.perf_counter() - start
+        t.cancel()
+        return got, elapsed, ticks
+
+    try:
+        got, elapsed, ticks = asyncio.run(scenario())
+    finally:
+        ada.shutdown()
+    assert got == ["N0", "N1", "N2", "N3"]
+    assert elapsed < 0.6          # 4 x 0.2s ran in parallel, not serially
+    assert ticks >= 10            # loop kept running while queries were in flight
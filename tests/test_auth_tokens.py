@@ -0,0 +1,64 @@
+AUTH = {"Authorization": "Bearer secret123"}
+
+def _post(client, headers):
+    return client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=headers)
+
+def test_hashed_tokens_and_per_token_counters(test_client, monkeypatch):
+    from app.settings import settings
+    from app.validator import hash_token, verifier
+
+    monkeypatch.setattr(settings, "API_TOKEN_HASHES", f"bi-export:{hash_token('t0k-bi')}, {hash_token('anon-tok')}")
+    before = dict(verifier.requests)
+
+    assert _post(test_client, {"Authorization": "Bearer t0k-bi"}).status_code == 200
+    assert _post(test_client, {"Authorization": "Bearer t0k-bi"}).status_code == 200
+    assert _post(test_client, {"Authorization": "Bearer anon-tok"}).status_code == 200
+    assert _post(test_client, AUTH).status_code == 200
+    assert _post(test_client, {"Authorization": "Bearer t0k-bix"}).status_code == 401
+
+    counts = {k: v - before.get(k, 0) for k, v in verifier.requests.items()}
+    assert counts["bi-export"] == 2
+    assert counts[hash_token("anon-tok")[:8]] == 1
+    assert counts["default"] == 1
+
+def test_tokens_file_rotates_without_restart(tmp_path, monkeypatch):
+    import os
+    import pytest
+    from fastapi import HTTPException
+    from app.settings import settings
+    from app.validator import TokenVerifier, hash_token
+
+    path = tmp_path / "tokens"
+    path.write_text(f"# rotated weekly\nold:{hash_token('old-secret')}\n")
+    monkeypatch.setattr(settings, "API_TOKENS_FILE", str(path))
+    v = TokenVerifier(reload_interval=0)
+
+    assert v.verify("Bearer old-secret") == "old"
+    path.write_text(f"new:{hash_token('new-secret')}\n")
+    os.utime(path, (1, 1))                        # make the change visible even within one mtime tick
+    assert v.verify("Bearer new-secret") == "new"
+    with pytest.raises(HTTPException) as exc:
+        v.verify("Bearer old-secret")             # the cached header was dropped on reload
+    assert exc.value.status_code == 401
+
+def test_validated_header_lru_is_bounded():
+    from app.validator import TokenVerifier
+
+    v = TokenVerifier(lru_size=2)
+    for header in ("Bearer secret123", "bearer secret123", "Bearer  secret123 "):
+        assert v.verify(header) == "default"
+    assert list(v._validated) == ["bearer secret123", "Bearer  secret123 "]
+
+def test_malformed_token_entries_are_skipped(tmp_path, monkeypatch):
+    from app.settings import settings
+    from app.validator import TokenVerifier, hash_token
+
+    path = tmp_path / "tokens"
+    path.write_text(f"ops:not-hex\nshort:abcd\nci:{hash_token('ci-secret')}\n")
+    monkeypatch.setattr(settings, "API_TOKENS_FILE", str(path))
+    monkeypatch.setattr(settings, "API_TOKEN_HASHES", "typo:zz")
+    v = TokenVerifier(reload_interval=0)
+
+    assert v.verify("Bearer secret123") == "default"
+    assert v.verify("Bearer ci-secret") == "ci"
+    assert [name for name, _ in v._digests] == ["default", "ci"]
@@ -0,0 +1,41 @@
+AUTH = {"Authorization": "Bearer secret123"}
+
+def test_batch_mixed_results_keep_request_order(test_client):
+    nats = ["NAT1001", "NOPE999", "NAT1003", "NAT1012", "NAT1008", "NAT1001"]
+    r = test_client.post("/api/GetEmpStatus/batch?bustCache=true", json={"NationalNumbers": nats}, headers=AUTH)
+    assert r.status_code == 200
+    results = r.json()["Results"]
+    assert [x["NationalNumber"] for x in results] == nats
+    assert [x["StatusCode"] for x in results] == [200, 404, 406, 422, 200, 200]
+    assert results[1]["error"] == "Invalid National Number"
+    assert results[3]["error"] == "INSUFFICIENT_DATA"
+
+    single = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1008"}, headers=AUTH).json()
+    assert results[4]["Result"]["AverageSalary"] == single["AverageSalary"]
+    assert results[4]["Result"]["Status"] == single["Status"]
+
+def test_batch_uses_set_based_queries(test_client):
+    from sqlalchemy import event
+    import app.api as api
+    from app.main import data_access
+
+    statements = []
+    listener = lambda *a: statements.append(a[2])
+    event.listen(data_access.engine, "before_cursor_execute", listener)
+    try:
+        nats = ["NAT1001", "NAT1002", "NAT1004", "NAT1005", "NAT1007", "NAT1010", "NOPE1", "NOPE2"]
+        api._cache.clear()                       # no kept entries: every version goes to the database
+        r = test_client.post("/api/GetEmpStatus/batch?bustCache=true", json={"NationalNumbers": nats}, headers=AUTH)
+    finally:
+        event.remove(data_access.engine, "before_cursor_execute", listener)
+    assert r.status_code == 200
+    reads = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    # users + salaries; then at most a read, one bulk insert and a read-back of response_versions
+    assert len([s for s in reads if "FROM response_versions" not in s]) == 2
+    assert len([s for s in statements if "response_versions" in s]) <= 3
+
+def test_batch_validation(test_client):
+    r = test_client.post("/api/GetEmpStatus/batch", json={"NationalNumbers": []}, headers=AUTH)
+    assert r.status_code == 422
+    r = test_client.post("/api/GetEmpStatus/batch", json={"NationalNumbers": ["NAT1001"]})
+    assert r.status_code == 401
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+AUTH = {"Authorization": "Bearer secret123"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_half_open():
+    from app.data_access import CircuitBreaker, CircuitOpenError
+
+    clock = FakeClock()
+    b = CircuitBreaker(failure_ratio=0.5, min_calls=4, window=10, open_seconds=5, clock=clock)
+    for ok in (True, True, False):
+        b.allow()
+        b.record(ok)
+    assert b.state == "closed"                 # below min_calls
+    b.allow()
+    b.record(False)
+    assert b.state == "open" and b.opened == 1
+    with pytest.raises(CircuitOpenError) as exc:
+        b.allow()
+    assert exc.value.retry_after == pytest.approx(5)
+
+    clock.now += 5
+    b.allow()                                  # the single half-open probe
+    with pytest.raises(CircuitOpenError):
+        b.allow()
+    b.record(False)
+    assert b.state == "open" and b.opened == 2
+
+    clock.now += 5
+    b.allow()
+    b.record(True)
+    assert b.state == "closed"
+    b.allow()
+
+
+def test_breaker_forgets_failures_outside_the_window():
+    from app.data_access import CircuitBreaker
+
+    clock = FakeClock()
+    b = CircuitBreaker(failure_ratio=0.5, min_calls=4, window=10, clock=clock)
+    for _ in range(3):
+        b.record(False)
+    clock.now += 11
+    b.record(False)
+    assert b.state == "closed"
+
+
+def test_retries_stop_at_the_request_deadline(tmp_path):
+    from sqlalchemy.exc import OperationalError
+    from app.data_access import CircuitBreaker, DataAccess, request_deadline
+
+    # no tables: every read fails
+    da = DataAccess(f"sqlite:///{tmp_path / 'empty.db'}", breaker=CircuitBreaker(min_calls=1, failure_ratio=1))
+    token = request_deadline.set(time.monotonic() + 0.1)
+    try:
+        t0 = time.perf_counter()
+        with pytest.raises(OperationalError):
+            da.get_employee_snapshot("NAT1001")
+        assert time.perf_counter() - t0 < 0.15    # the 0.2s backoff would overrun the deadline
+    finally:
+        request_deadline.reset(token)
+    assert da.breaker.state == "open"
+
+
+def test_open_circuit_serves_expired_cache_or_503(test_client):
+    import app.api as api
+
+    expected = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH).json()
+    api._cache.delete(api._cache_key("NAT1002"))
+    breaker = api.router.data_access.sync.breaker
+    ttl = api._cache.ttl
+    api._cache.ttl = 0                         # every entry reads as expired
+    breaker.state, breaker._opened_at = "open", time.monotonic()
+    try:
+        r = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+        assert r.status_code == 200 and r.json() == expected
+
+        r = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1002"}, headers=AUTH)
+        assert r.status_code == 503 and r.json() == {"error": "Database unavailable"}
+        assert int(r.headers["Retry-After"]) >= 1
+
+        items = test_client.post("/api/GetEmpStatus/batch", json={"NationalNumbers": ["NAT1001", "NAT1002"]},
+                                 headers=AUTH).json()["Results"]
+        assert [i["StatusCode"] for i in items] == [200, 503]
+    finally:
+        api._cache.ttl = ttl
+        breaker.state = "closed"
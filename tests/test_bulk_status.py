@@ -0,0 +1,51 @@
+import random
+from decimal import Decimal
+
+def _decimal_reference(rows):
+    from app.process_status import compute_metrics, status_from_average
+    m = compute_metrics([(month, Decimal(c).scaleb(-2)) for month, c in rows])
+    return m, status_from_average(m["averageAfterTax"])
+
+def test_bulk_matches_compute_metrics_exactly():
+    import numpy as np
+    from app.bulk_status import compute_bulk, to_decimal
+
+    rnd = random.Random(1234)
+    uids, months, cents, per_user = [], [], [], {}
+    for uid in range(1, 2001):
+        rows = []
+        for _ in range(rnd.randint(1, 14)):
+            month = rnd.randint(1, 12)
+            # mix of round amounts, odd cents (half-cent rounding cases) and totals around the 10k tax line
+            c = rnd.choice([rnd.randint(1, 500_000), rnd.randint(150_000, 260_000), rnd.randint(1, 999) * 5])
+            rows.append((month, c))
+            uids.append(uid); months.append(month); cents.append(c)
+        per_user[uid] = rows
+    order = list(range(len(uids)))
+    rnd.shuffle(order)                       # engine must not rely on input order
+    res = compute_bulk(np.array(uids)[order], np.array(months)[order], np.array(cents)[order])
+
+    assert res["user_id"].tolist() == sorted(per_user)
+    for i, uid in enumerate(res["user_id"]):
+        ref, ref_status = _decimal_reference(per_user[int(uid)])
+        assert int(res["count"][i]) == ref["count"]
+        for k in ("highest", "sum", "sumAfterTax", "average", "averageAfterTax"):
+            got = to_decimal(res[k][i])
+            assert got == ref[k] and str(got) == str(ref[k]), (uid, k, got, ref[k])
+        assert res["status"][i] == ref_status
+
+def test_bulk_over_seeded_database(test_client):
+    from app.bulk_status import compute_all, to_decimal
+    from app.data_access import DataAccess
+    from app.settings import settings
+
+    da = DataAccess(settings.DATABASE_URL)
+    res = compute_all(da)
+    by_uid = {int(u): i for i, u in enumerate(res["user_id"])}
+    assert 3 not in by_uid                   # NAT1003 is inactive
+    i = by_uid[8]                            # NAT1008: December row and tax rule
+    snap = da.get_employee_snapshot("NAT1008")
+    from app.process_status import compute_metrics
+    ref = compute_metrics([(m, to_decimal(c)) for m, c in snap.salaries])
+    assert to_decimal(res["averageAfterTax"][i]) == ref["averageAfterTax"]
+    assert to_decimal(res["highest"][i]) == ref["highest"]
@@ -0,0 +1,124 @@
+import time
+
+def test_lru_eviction_respects_entry_budget():
+    from app.cache import TTLCache
+    c = TTLCache(ttl_seconds=60, max_entries=3)
+    for k in "abc":
+        c.set(k, k)
+    assert c.get("a") == "a"          # a becomes most recently used
+    c.set("d", "d")                   # evicts b, the least recently used
+    assert c.get("b") is None
+    assert [c.get(k) for k in "acd"] == ["a", "c", "d"]
+    st = c.stats()
+    assert st["entries"] == 3 and st["evictions"] == 1
+
+def test_byte_budget_and_striping():
+    from app.cache import TTLCache
+    c = TTLCache(ttl_seconds=60, max_entries=0, max_bytes=4000, stripes=4)
+    for i in range(200):
+        c.set(f"k{i}", {"EmployeeName": "x" * 50, "n": i})
+    st = c.stats()
+    assert 0 < st["bytes"] <= 4000
+    assert st["evictions"] == 200 - st["entries"]
+
+def test_expiry_on_read_and_sweep():
+    from app.cache import TTLCache
+    c = TTLCache(ttl_seconds=0.05, sweep_interval=0)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    time.sleep(0.08)
+    assert c.get("a") is None
+    assert c.sweep() == 1             # b was never read again but is still reclaimed
+    st = c.stats()
+    assert st["expirations"] == 2 and st["entries"] == 0
+    assert st["hits"] == 1 and st["misses"] == 1 and st["hit_rate"] == 0.5
+
+def test_stale_window():
+    from app.cache import TTLCache
+    c = TTLCache(ttl_seconds=0.05, stale_ttl=10)
+    c.set("a", 1)
+    time.sleep(0.08)
+    assert c.get("a") is None
+    assert c.get_stale("a") == 1
+
+def test_single_flight_coalesces_hot_key(test_client):
+    import asyncio
+    import httpx
+    from app.main import app
+    from app.api import router, _cache
+
+    real = router.data_access
+    calls = 0
+
+    class Counting:
+        def __getattr__(self, name):
+            return getattr(real, name)
+        async def get_employee_snapshot(self, national):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)       # keep the leader in flight while the others arrive
+            return await real.get_employee_snapshot(national)
+
+    async def stampede():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            return await asyncio.gather(*(
+                client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1004"},
+                            headers={"Authorization": "Bearer secret123"})
+                for _ in range(25)
+            ))
+
+    _cache.delete("empstatus:NAT1004")
+    router.data_access = Counting()
+    try:
+        responses = asyncio.run(stampede())
+    finally:
+        router.data_access = real
+    assert {r.status_code for r in responses} == {200}
+    assert calls == 1
+
+def test_negative_outcomes_are_replayed_from_cache(test_client):
+    from app.api import router, _negative_cache
+
+    real = router.data_access
+    calls = 0
+
+    class Counting:
+        def __getattr__(self, name):
+            return getattr(real, name)
+        async def get_employee_snapshot(self, national):
+            nonlocal calls
+            calls += 1
+            return await real.get_employee_snapshot(national)
+
+    for nat in ("NEG404", "NAT1003", "NAT1012"):
+        _negative_cache.delete(f"empstatus:{nat}")
+    router.data_access = Counting()
+    try:
+        for nat, code, error in [("NEG404", 404, "Invalid National Number"),
+                                 ("NAT1003", 406, "User is not Active"),
+                                 ("NAT1012", 422, "INSUFFICIENT_DATA")]:
+            for _ in range(3):
+                r = test_client.post("/api/GetEmpStatus", json={"NationalNumber": nat},
+                                     headers={"Authorization": "Bearer secret123"})
+                assert r.status_code == code
+                assert r.json() == {"error": error}
+    finally:
+        router.data_access = real
+    assert calls == 3
+
+def test_cache_hit_serves_pre_encoded_bytes(test_client):
+    import re
+    from app.api import _cache
+    AUTH = {"Authorization": "Bearer secret123"}
+
+    miss = test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1005"}, headers=AUTH)
+    hit = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1005"}, headers=AUTH)
+    assert miss.status_code == hit.status_code == 200
+    assert hit.headers["content-type"] == "application/json"
+    assert (hit.content, hit.headers["ETag"]) == (miss.content, miss.headers["ETag"]) == \
+        tuple(_cache.get("empstatus:NAT1005"))[:2]
+    assert re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ", hit.json()["LastUpdated"])
+    assert set(hit.json()) == {"EmployeeName", "NationalNumber", "HighestSalary", "AverageSalary",
+                               "Status", "IsActive", "LastUpdated"}
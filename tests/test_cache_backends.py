@@ -0,0 +1,180 @@
+import json
+import socketserver
+import threading
+import time
+
+import pytest
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisBackend: GET/SET PX/DEL/SCAN/DBSIZE."""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            n = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        store = self.server.store
+        while (args := self._read_command()) is not None:
+            cmd = args[0].upper()
+            now = time.monotonic()
+            for k in [k for k, (_, exp) in store.items() if exp is not None and exp <= now]:
+                del store[k]
+            if cmd == b"GET":
+                entry = store.get(args[1])
+                reply = self._bulk(entry[0] if entry else None)
+            elif cmd == b"SET":
+                ttl = int(args[4]) / 1000 if len(args) > 4 and args[3].upper() == b"PX" else None
+                store[args[1]] = (args[2], now + ttl if ttl else None)
+                reply = b"+OK\r\n"
+            elif cmd == b"DEL":
+                reply = b":%d\r\n" % sum(store.pop(k, None) is not None for k in args[1:])
+            elif cmd == b"SCAN":
+                prefix = args[3].rstrip(b"*")
+                keys = [k for k in store if k.startswith(prefix)]
+                reply = b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(self._bulk(k) for k in keys)
+            elif cmd == b"DBSIZE":
+                reply = b":%d\r\n" % len(store)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def fake_redis():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespHandler)
+    server.daemon_threads = True
+    server.store = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def test_codec_round_trips_bytes():
+    from app.cache import encode_value, decode_value
+    value = {"body": b"\x00{\"a\":1}", "n": [1, 2.5, "x"]}
+    assert decode_value(encode_value(value)) == value
+
+
+def test_sqlite_backend_is_shared_between_workers(tmp_path):
+    from app.cache import TTLCache, SQLiteBackend
+    path = str(tmp_path / "cache.db")
+    worker_a = TTLCache(ttl_seconds=60, backend=SQLiteBackend(path), namespace="ok:")
+    worker_b = TTLCache(ttl_seconds=60, backend=SQLiteBackend(path), namespace="ok:")
+    other_ns = TTLCache(ttl_seconds=60, backend=SQLiteBackend(path), namespace="neg:")
+
+    worker_a.set("empstatus:N1", {"Status": "GREEN"})
+    assert worker_b.get("empstatus:N1") == {"Status": "GREEN"}
+    assert other_ns.get("empstatus:N1") is None
+
+    worker_b.delete("empstatus:N1")          # e.g. bustCache handled by another worker
+    assert worker_a.get("empstatus:N1") is None
+    st = worker_b.stats()
+    assert st["hits"] == 1 and st["entries"] == 0
+
+
+def test_sqlite_backend_expiry_and_stale_window(tmp_path):
+    from app.cache import TTLCache, SQLiteBackend
+    c = TTLCache(ttl_seconds=0.05, stale_ttl=0.2, backend=SQLiteBackend(str(tmp_path / "c.db"), sweep_interval=0))
+    c.set("a", [404, "Employee not found"])
+    time.sleep(0.08)
+    assert c.get("a") is None
+    assert c.get_stale("a") == [404, "Employee not found"]
+    time.sleep(0.2)
+    assert c.get_stale("a") is None
+    assert len(c) == 0
+
+
+def test_blocking_backend_waits_off_the_event_loop(tmp_path):
+    import asyncio
+    import sqlite3
+    from app.cache import TTLCache, SQLiteBackend
+    path = str(tmp_path / "c.db")
+    c = TTLCache(ttl_seconds=60, backend=SQLiteBackend(path, timeout=0.3))
+    c.set("warm", 1)                         # creates the table
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")        # another worker holds the write lock
+
+    async def main():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        await c.run(c.set, "k", 1)           # waits out the busy timeout, then counts an error
+        task.cancel()
+        return ticks
+    try:
+        assert asyncio.run(main()) >= 10     # the loop kept running meanwhile
+    finally:
+        writer.execute("ROLLBACK")
+    assert c.stats()["errors"] == 1
+
+
+def test_redis_backend_against_fake_server(fake_redis):
+    from app.cache import TTLCache, RedisBackend
+    worker_a = TTLCache(ttl_seconds=60, backend=RedisBackend(fake_redis), namespace="ok:")
+    worker_b = TTLCache(ttl_seconds=60, backend=RedisBackend(fake_redis), namespace="ok:")
+
+    worker_a.set("empstatus:N1", {"EmployeeName": "x", "AverageSalary": 2100.5})
+    assert worker_b.get("empstatus:N1") == {"EmployeeName": "x", "AverageSalary": 2100.5}
+    worker_b.delete("empstatus:N1")
+    assert worker_a.get("empstatus:N1") is None
+
+    worker_a.set("k1", 1)
+    worker_a.set("k2", 2)
+    worker_b.clear()
+    assert len(worker_a) == 0
+    assert worker_a.stats()["hits"] == 0 and worker_b.stats()["hits"] == 1
+
+
+def test_redis_backend_unreachable_is_a_miss():
+    from app.cache import TTLCache, RedisBackend
+    c = TTLCache(ttl_seconds=60, backend=RedisBackend("redis://127.0.0.1:1/0", socket_timeout=0.2))
+    c.set("a", 1)
+    assert c.get("a") is None
+    c.clear()                                # e.g. the admin invalidate-all endpoint
+    assert c.keys() == []                    # e.g. the shutdown snapshot
+    assert c.stats()["errors"] == 4
+
+
+def test_redis_backend_drops_the_socket_when_auth_fails(fake_redis):
+    from app.cache import RedisBackend
+    b = RedisBackend(fake_redis.replace("redis://", "redis://:wrong@"))
+    assert b.get("a", 60) is None            # the fake server rejects AUTH
+    assert b._local.sock is None             # so the next call reconnects and authenticates again
+
+
+def test_bust_cache_invalidates_shared_entry(test_client, tmp_path):
+    import app.api as api
+    from app.cache import TTLCache, SQLiteBackend
+    AUTH = {"Authorization": "Bearer secret123"}
+    path = str(tmp_path / "shared.db")
+    original = api._cache
+    api._cache = TTLCache(ttl_seconds=60, backend=SQLiteBackend(path), namespace="ok2:")
+    other_worker = TTLCache(ttl_seconds=60, backend=SQLiteBackend(path), namespace="ok2:")
+    try:
+        other_worker.set("empstatus:NAT1001", (json.dumps({
+            "EmployeeName": "outdated", "NationalNumber": "NAT1001", "HighestSalary": 1.0, "AverageSalary": 1.0,
+            "Status": "RED", "IsActive": True, "LastUpdated": "2020-01-01T00:00:00Z",
+        }).encode(), 'W/"outdated"'))
+        r = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+        assert r.json()["EmployeeName"] == "outdated"       # served from the shared entry
+
+        r = test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+        assert r.status_code == 200 and r.json()["EmployeeName"] != "outdated"
+        assert json.loads(other_worker.get("empstatus:NAT1001")[0])["EmployeeName"] == r.json()["EmployeeName"]
+    finally:
+        api._cache = original
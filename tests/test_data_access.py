@@ -0,0 +1,87 @@
+def test_employee_snapshot_single_round_trip(test_client):
+    from sqlalchemy import event
+    from app.data_access import DataAccess
+    from app.settings import settings
+
+    da = DataAccess(settings.DATABASE_URL)
+    statements = []
+    event.listen(da.engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    snap = da.get_employee_snapshot("NAT1001")
+    assert len(statements) == 1
+    assert snap.username == "jdoe" and snap.national_number == "NAT1001" and snap.is_active is True
+    assert sorted(snap.salaries) == [(1, 120000), (2, 130000), (3, 140000), (5, 150000), (6, 160000)]
+
+def test_employee_snapshot_edge_cases(test_client):
+    from app.data_access import DataAccess
+    from app.settings import settings
+
+    da = DataAccess(settings.DATABASE_URL)
+    assert da.get_employee_snapshot("NOPE999") is None
+    assert da.get_employee_snapshot("NAT1003").is_active is False
+    assert len(da.get_employee_snapshot("NAT1012").salaries) == 0
+
+def test_sqlite_pragmas_and_pool_stats(tmp_path):
+    from sqlalchemy import text
+    from app.data_access import DataAccess
+
+    da = DataAccess(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=1,
+                    sqlite_busy_timeout_ms=1234, sqlite_mmap_size=1 << 20)
+    with da.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1          # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert conn.execute(text("PRAGMA mmap_size")).scalar() == 1 << 20
+        assert da.pool_stats()["checked_out"] == 1
+    assert da.pool_stats() == {"size": 2, "checked_out": 0, "checked_in": 1, "overflow": 0}
+
+    mem = DataAccess("sqlite:///:memory:")
+    assert mem.pool_stats()["size"] == 0
+
+def test_resolve_versions_is_set_based_and_first_writer_wins(tmp_path):
+    import time
+    import pytest
+    from datetime import datetime, timezone
+    from sqlalchemy import event, insert
+    from app.data_access import CircuitBreaker, CircuitOpenError, DataAccess
+    from app.models import ResponseVersion
+
+    da = DataAccess(f"sqlite:///{tmp_path / 'versions.db'}", breaker=CircuitBreaker(min_calls=1, failure_ratio=1))
+    da.create_all()
+    t1, t2 = datetime(2026, 1, 1, tzinfo=timezone.utc), datetime(2026, 2, 1, tzinfo=timezone.utc)
+    with da.engine.begin() as conn:                     # another worker recorded N0 first
+        conn.execute(insert(ResponseVersion).values(national_number="N0", digest="d0", first_seen=t1))
+    statements = []
+    event.listen(da.engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    digests = {f"N{i}": f"d{i}" for i in range(2000)}
+    got = da.resolve_versions(digests, t2)
+    assert len(statements) == 4 + 1          # IN-chunked read and one bulk insert, not a transaction per row
+    assert got["N0"].replace(tzinfo=timezone.utc) == t1 and got["N1999"] == t2
+
+    # a stale view (e.g. a lagging replica) missed N1's row: the bulk insert skips it and the stored time wins
+    won = da._write(lambda conn: da._record_versions(conn, {"N1": "d1"}, {}, datetime(2026, 3, 1)))
+    assert won["N1"].replace(tzinfo=timezone.utc) == t2
+
+    statements.clear()
+    assert da.resolve_versions({"N5": "d5"}, t1)["N5"].replace(tzinfo=timezone.utc) == t2
+    assert len(statements) == 1                        # unchanged: one read, no write
+
+    da.breaker.state, da.breaker._opened_at = "open", time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        da.resolve_versions({"N5": "changed"}, t1)
+
+def test_bootstrap_adds_indexes_missing_from_an_existing_database(tmp_path):
+    from sqlalchemy import inspect, text
+    from app.bootstrap import init_database
+    from app.data_access import DataAccess
+
+    da = DataAccess(f"sqlite:///{tmp_path / 'old.db'}")
+    init_database(da)
+    with da.engine.begin() as conn:                   # a database created before the indexes existed
+        conn.execute(text("DROP INDEX idx_salaries_user_year_month"))
+        conn.execute(text("DROP INDEX idx_logs_created_at"))
+    init_database(da)
+    inspector = inspect(da.engine)
+    assert "idx_salaries_user_year_month" in {ix["name"] for ix in inspector.get_indexes("salaries")}
+    assert "idx_logs_created_at" in {ix["name"] for ix in inspector.get_indexes("logs")}
@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+AUTH = {"Authorization": "Bearer secret123"}
+
+def _status(client, national, **headers):
+    return client.post("/api/GetEmpStatus", json={"NationalNumber": national}, headers={**AUTH, **headers})
+
+def test_if_none_match_gets_bodiless_304(test_client):
+    first = _status(test_client, "NAT1007")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    r = _status(test_client, "NAT1007", **{"If-None-Match": etag})
+    assert r.status_code == 304 and r.content == b"" and r.headers["ETag"] == etag
+    assert _status(test_client, "NAT1007", **{"If-None-Match": f'"other", {etag.removeprefix("W/")}'}).status_code == 304
+    assert _status(test_client, "NAT1007", **{"If-None-Match": '"other"'}).status_code == 200
+
+def test_last_updated_and_etag_change_only_with_the_data(test_client, monkeypatch):
+    import app.api as api
+    from app.data_access import DataAccess
+    from app.models import Salary
+    from app.settings import settings
+
+    before = _status(test_client, "NAT1007")
+    monkeypatch.setattr(api, "_now", lambda: datetime(2099, 1, 1, tzinfo=timezone.utc))
+
+    # recomputed from the database, same data: same bytes, so a conditional request still matches
+    again = test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1007"},
+                             headers={**AUTH, "If-None-Match": before.headers["ETag"]})
+    assert again.status_code == 304
+    assert _status(test_client, "NAT1007").json()["LastUpdated"] == before.json()["LastUpdated"]
+
+    da = DataAccess(settings.DATABASE_URL)
+    with da.SessionLocal() as s:
+        s.add(Salary(user_id=7, year=2031, month=1, amount=99999))
+        s.commit()
+    try:
+        changed = _status(test_client, "NAT1007", **{"If-None-Match": before.headers["ETag"]})
+        assert changed.status_code == 200 and changed.headers["ETag"] != before.headers["ETag"]
+        assert changed.json()["LastUpdated"] == "2099-01-01T00:00:00Z"
+    finally:
+        with da.SessionLocal() as s:
+            s.query(Salary).filter_by(user_id=7, year=2031).delete()
+            s.commit()
+
+def test_etag_survives_a_worker_without_the_version_row(test_client, monkeypatch):
+    import app.api as api
+    from sqlalchemy import delete
+    from app.models import ResponseVersion
+
+    before = _status(test_client, "NAT1008")
+    # another worker: nothing cached, and the first-seen row is gone (or never reached it)
+    api._cache.delete(api._cache_key("NAT1008"))
+    with api.router.data_access.sync.engine.begin() as conn:
+        conn.execute(delete(ResponseVersion).where(ResponseVersion.national_number == "NAT1008"))
+    monkeypatch.setattr(api, "_now", lambda: datetime(2099, 1, 1, tzinfo=timezone.utc))
+
+    r = _status(test_client, "NAT1008", **{"If-None-Match": before.headers["ETag"]})
+    assert r.status_code == 304 and r.headers["ETag"] == before.headers["ETag"]
+    assert _status(test_client, "NAT1008").json()["LastUpdated"] == "2099-01-01T00:00:00Z"
+
+def test_expired_entry_with_the_same_etag_skips_the_version_lookup(test_client):
+    import app.api as api
+    from sqlalchemy import event
+
+    before = _status(test_client, "NAT1004")
+    engine = api.router.data_access.sync.engine
+    statements = []
+    listener = lambda *a: statements.append(a[2])
+    ttl = api._cache.ttl
+    api._cache.ttl = 0                         # the entry reads as expired but is still kept
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        again = _status(test_client, "NAT1004")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        api._cache.ttl = ttl
+    assert again.headers["ETag"] == before.headers["ETag"] and again.json() == before.json()
+    assert statements and not [s for s in statements if "response_versions" in s]
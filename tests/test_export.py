@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+
+AUTH = {"Authorization": "Bearer secret123"}
+
+def _ndjson(r):
+    return [json.loads(line) for line in r.text.splitlines()]
+
+def test_export_ndjson_matches_single_lookups(test_client):
+    r = test_client.get("/api/EmpStatus/export", headers=AUTH)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    records = _ndjson(r)
+    ids = [rec["UserId"] for rec in records]
+    assert ids == sorted(ids) and len(ids) == len(set(ids))
+    # inactive (NAT1003) and insufficient-data (NAT1012) employees are not exported
+    assert not {"NAT1003", "NAT1012"} & {rec["NationalNumber"] for rec in records}
+
+    for rec in records:
+        single = test_client.post("/api/GetEmpStatus?bustCache=true",
+                                  json={"NationalNumber": rec["NationalNumber"]}, headers=AUTH).json()
+        for k in ("EmployeeName", "HighestSalary", "AverageSalary", "Status", "IsActive"):
+            assert rec[k] == single[k]
+
+def test_export_resumes_after_user_id(test_client):
+    full = _ndjson(test_client.get("/api/EmpStatus/export", headers=AUTH))
+    cut = full[1]["UserId"]
+    rest = _ndjson(test_client.get(f"/api/EmpStatus/export?after_user_id={cut}", headers=AUTH))
+    assert [r["UserId"] for r in rest] == [r["UserId"] for r in full[2:]]
+
+def test_export_csv(test_client):
+    r = test_client.get("/api/EmpStatus/export?format=csv", headers=AUTH)
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    assert rows and list(rows[0]) == ["UserId", "EmployeeName", "NationalNumber", "HighestSalary",
+                                      "AverageSalary", "Status", "IsActive", "LastUpdated"]
+    assert test_client.get("/api/EmpStatus/export").status_code == 401
+
+def test_snapshot_stream_batches_in_user_order(test_client):
+    from app.data_access import DataAccess
+    from app.settings import settings
+
+    batches = list(DataAccess(settings.DATABASE_URL).iter_active_snapshots(batch_size=2, fetch_size=3))
+    assert all(len(b) <= 2 for b in batches)
+    snaps = [s for b in batches for s in b]
+    assert [s.user_id for s in snaps] == sorted({s.user_id for s in snaps})
+    assert sorted(next(s for s in snaps if s.national_number == "NAT1001").salaries) == \
+        [(1, 120000), (2, 130000), (3, 140000), (5, 150000), (6, 160000)]
+
+def test_export_cap_and_open_circuit_get_503(test_client, monkeypatch):
+    import time
+    import app.api as api
+    from app.settings import settings
+
+    monkeypatch.setattr(settings, "EXPORT_MAX_CONCURRENT", 1)
+    monkeypatch.setattr(api, "_exports_running", 1)          # one export already streaming
+    r = test_client.get("/api/EmpStatus/export", headers=AUTH)
+    assert r.status_code == 503 and r.headers["Retry-After"]
+
+    monkeypatch.setattr(api, "_exports_running", 0)
+    assert test_client.get("/api/EmpStatus/export", headers=AUTH).status_code == 200
+    assert api._exports_running == 0                          # the slot is freed when the stream ends
+
+    breaker = api.router.data_access.sync.breaker
+    breaker.state, breaker._opened_at = "open", time.monotonic()
+    try:
+        r = test_client.get("/api/EmpStatus/export", headers=AUTH)
+        assert r.status_code == 503 and r.json() == {"error": "Database unavailable"}
+        assert api._exports_running == 0
+    finally:
+        breaker.state = "closed"
+
+def test_export_last_updated_matches_single_lookup(test_client):
+    single = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH).json()
+    rec = next(r for r in _ndjson(test_client.get("/api/EmpStatus/export", headers=AUTH))
+               if r["NationalNumber"] == "NAT1001")
+    assert rec["LastUpdated"] == single["LastUpdated"]
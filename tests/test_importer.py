@@ -0,0 +1,81 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+def _da(tmp_path):
+    from app.data_access import DataAccess
+    da = DataAccess(f"sqlite:///{tmp_path / 'import.db'}")
+    da.create_all()
+    return da
+
+def _write_users(path, n):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["username", "national_number", "email", "phone", "is_active"])
+        for i in range(n):
+            w.writerow([f"u{i}", f"IMP{i:05d}", f"u{i}@example.com", "", "0" if i % 10 == 0 else "1"])
+
+def test_streams_users_and_salaries(tmp_path):
+    from sqlalchemy import func, inspect, select
+    from app.importer import import_file
+    from app.models import Salary, User
+
+    da = _da(tmp_path)
+    _write_users(tmp_path / "users.csv", 250)
+    with gzip.open(tmp_path / "salaries.jsonl.gz", "wt", encoding="utf-8") as f:
+        for i in range(250):
+            for m in (1, 2, 3):
+                f.write(json.dumps({"national_number": f"IMP{i:05d}", "year": 2025, "month": m, "amount": "1000.50"}) + "\n")
+
+    progress = []
+    users = import_file(da, "users", tmp_path / "users.csv", chunk_size=100, progress=progress.append)
+    salaries = import_file(da, "salaries", tmp_path / "salaries.jsonl.gz", chunk_size=200)
+    assert users["rows"] == 250 and salaries["rows"] == 750
+    assert [p["total"] for p in progress] == [100, 200, 250]
+    assert salaries["rows_per_sec"] > 0
+
+    with da.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(User)).scalar() == 250
+        assert conn.execute(select(func.count()).where(User.is_active.is_(False))).scalar() == 25
+        assert conn.execute(select(func.sum(Salary.amount))).scalar() == 750 * 1000.50
+    # the deferred secondary index is back
+    names = {ix["name"] for ix in inspect(da.engine).get_indexes("salaries")}
+    assert "idx_salaries_user_year_month" in names
+    assert da.get_employee_snapshot("IMP00007").salaries == [(1, 100050), (2, 100050), (3, 100050)]
+
+def test_resumes_after_interruption(tmp_path):
+    from sqlalchemy import func, inspect, select
+    from app.importer import import_file
+    from app.models import User
+
+    da = _da(tmp_path)
+    path = tmp_path / "users.csv"
+    _write_users(path, 300)
+    good = path.read_text().splitlines()
+    broken = good[:]
+    broken[251] = "u250,IMP00250,,,1"          # record 251 has no email
+    path.write_text("\n".join(broken) + "\n")
+
+    with pytest.raises(ValueError, match="record 251: missing email"):
+        import_file(da, "users", path, chunk_size=100, job="roster")
+    with da.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(User)).scalar() == 200   # two chunks committed
+    assert "idx_salaries_user_year_month" in {ix["name"] for ix in inspect(da.engine).get_indexes("salaries")}
+
+    path.write_text("\n".join(good) + "\n")
+    stats = import_file(da, "users", path, chunk_size=100, job="roster")
+    assert stats["skipped"] == 200 and stats["rows"] == 100
+    with da.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(User)).scalar() == 300
+    assert import_file(da, "users", path, job="roster")["already_finished"] is True
+
+def test_rejects_salary_for_unknown_employee(tmp_path):
+    from app.importer import import_file
+
+    da = _da(tmp_path)
+    p = tmp_path / "s.jsonl"
+    p.write_text(json.dumps({"national_number": "NOPE", "year": 2025, "month": 1, "amount": 1}) + "\n")
+    with pytest.raises(ValueError, match="unknown national_number: NOPE"):
+        import_file(da, "salaries", p)
@@ -0,0 +1,129 @@
+AUTH = {"Authorization": "Bearer secret123"}
+
+def _da():
+    from app.data_access import DataAccess
+    from app.settings import settings
+    return DataAccess(settings.DATABASE_URL)
+
+def _status(client, national):
+    return client.post("/api/GetEmpStatus", json={"NationalNumber": national}, headers=AUTH)
+
+def test_committed_salary_write_evicts_cached_response(test_client):
+    from app.api import _cache
+    from app.models import Salary
+
+    before = _status(test_client, "NAT1010").json()
+    assert _cache.get("empstatus:NAT1010") is not None
+
+    da = _da()
+    with da.SessionLocal() as s:
+        s.add(Salary(user_id=10, year=2031, month=1, amount=99999))
+        s.flush()
+        assert _cache.get("empstatus:NAT1010") is not None     # nothing happens before commit
+        s.commit()
+    assert _cache.get("empstatus:NAT1010") is None
+    assert _status(test_client, "NAT1010").json()["HighestSalary"] == 99999.0
+
+    with da.SessionLocal() as s:
+        s.query(Salary).filter_by(user_id=10, year=2031).delete()     # bulk delete path
+        s.commit()
+    assert _cache.get("empstatus:NAT1010") is None
+    assert _status(test_client, "NAT1010").json()["HighestSalary"] == before["HighestSalary"]
+
+def test_rolled_back_write_keeps_cache(test_client):
+    from app.api import _cache
+    from app.models import Salary
+
+    _status(test_client, "NAT1010")
+    with _da().SessionLocal() as s:
+        s.add(Salary(user_id=10, year=2032, month=1, amount=1))
+        s.flush()
+        s.rollback()
+    assert _cache.get("empstatus:NAT1010") is not None
+
+def test_admin_invalidate_endpoint(test_client):
+    from app.api import _cache, _negative_cache
+
+    _status(test_client, "NAT1002")
+    assert _status(test_client, "NAT9999").status_code == 404
+    assert _cache.get("empstatus:NAT1002") is not None
+    assert _negative_cache.get("empstatus:NAT9999") is not None
+
+    r = test_client.post("/api/admin/cache/invalidate", json={"NationalNumbers": ["NAT1002", "NAT9999"]}, headers=AUTH)
+    assert r.status_code == 200 and r.json() == {"Invalidated": 2}
+    assert _cache.get("empstatus:NAT1002") is None
+    assert _negative_cache.get("empstatus:NAT9999") is None
+
+    _status(test_client, "NAT1002")
+    r = test_client.post("/api/admin/cache/invalidate", json={"All": True}, headers=AUTH)
+    assert r.status_code == 200 and r.json()["Invalidated"] >= 1
+    assert len(_cache) == 0
+
+    r = test_client.post("/api/admin/cache/invalidate", json={"All": True})
+    assert r.status_code == 401
+
+def test_admin_invalidate_requires_admin_token(test_client, monkeypatch):
+    from app.settings import settings
+    from app.validator import hash_token
+
+    monkeypatch.setattr(settings, "API_TOKEN_HASHES", f"dashboard:{hash_token('dash-tok')}")
+    dash = {"Authorization": "Bearer dash-tok"}
+    assert _status(test_client, "NAT1002").status_code == 200
+    r = test_client.post("/api/admin/cache/invalidate", json={"All": True}, headers=dash)
+    assert r.status_code == 403 and r.json() == {"error": "Forbidden"}
+
+    monkeypatch.setattr(settings, "ADMIN_TOKEN_IDS", "default, dashboard")
+    assert test_client.post("/api/admin/cache/invalidate", json={"All": True}, headers=dash).status_code == 200
+
+def test_change_feed_evicts_writes_logged_by_other_processes(test_client):
+    import asyncio
+    from datetime import datetime, timezone
+    from sqlalchemy import insert
+    from app.api import _cache, evict, router
+    from app.invalidation import ChangeFeed
+    from app.models import SalaryChange
+
+    feed = ChangeFeed(router.data_access, evict)
+    asyncio.run(feed.poll())                # starts at the current end of the log
+    _status(test_client, "NAT1005")
+    _status(test_client, "NAT1007")
+    start = feed.after_id
+
+    def log_change(**row):
+        # a plain connection: none of this process's ORM listeners run, as for another worker
+        with _da().engine.begin() as conn:
+            conn.execute(insert(SalaryChange).values(changed_at=datetime.now(timezone.utc), **row))
+
+    log_change(user_id=5, id=start + 2)
+    assert _cache.get("empstatus:NAT1005") is not None
+    assert asyncio.run(feed.poll()) == 1
+    assert _cache.get("empstatus:NAT1005") is None
+    assert feed.after_id == start + 2 and list(feed.gaps) == [start + 1]
+
+    log_change(user_id=7, id=start + 1)      # committed after a higher id: found through the gap
+    assert asyncio.run(feed.poll()) == 1
+    assert _cache.get("empstatus:NAT1007") is None
+    assert feed.gaps == {}
+
+def test_load_overlapping_an_invalidation_is_not_cached(test_client):
+    from app.api import _cache, invalidate, router
+
+    real = router.data_access
+
+    class Racing:
+        def __getattr__(self, name):
+            return getattr(real, name)
+        async def get_employee_snapshot(self, national):
+            snap = await real.get_employee_snapshot(national)
+            invalidate([national])          # a write lands after the read
+            return snap
+
+    _cache.delete("empstatus:NAT1008")
+    router.data_access = Racing()
+    try:
+        assert _status(test_client, "NAT1008").status_code == 200
+    finally:
+        router.data_access = real
+    assert _cache.get("empstatus:NAT1008") is None
+    assert _status(test_client, "NAT1008").status_code == 200
+    assert _cache.get("empstatus:NAT1008") is not None
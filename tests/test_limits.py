@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+AUTH = {"Authorization": "Bearer secret123"}
+
+
+class _Clock:
+    def __init__(self, t: float = 1000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_token_bucket_burst_then_refill():
+    from app.limits import RateLimiter
+    clock = _Clock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+
+    assert [limiter.check("a") for _ in range(3)] == [0, 0, 0]
+    assert limiter.check("a") == pytest.approx(0.5)
+    assert limiter.check("b") == 0                       # buckets are per token
+    clock.t += 0.5
+    assert limiter.check("a") == 0
+    assert limiter.check("a") > 0
+    clock.t += 10                                         # refills up to the burst, not beyond
+    assert [limiter.check("a") for _ in range(4)][-1] > 0
+
+
+def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    from app.limits import RateLimiter, SQLiteBucketStore
+    clock = _Clock()
+    path = str(tmp_path / "limits.db")
+    worker_a = RateLimiter(rate=1, burst=2, store=SQLiteBucketStore(path), clock=clock)
+    worker_b = RateLimiter(rate=1, burst=2, store=SQLiteBucketStore(path), clock=clock)
+
+    assert worker_a.check("t") == 0
+    assert worker_b.check("t") == 0
+    assert worker_a.check("t") > 0 and worker_b.check("t") > 0
+
+
+def test_unreachable_shared_store_fails_open():
+    from app.limits import open_rate_limiter
+    limiter = open_rate_limiter(1, 1, "redis", "redis://127.0.0.1:1/0")
+    assert limiter.check("t") == 0 and limiter.check("t") == 0
+    assert limiter.errors == 2
+
+
+def test_locked_shared_store_is_waited_for_off_the_event_loop(tmp_path):
+    import sqlite3
+    from app.limits import RateLimiter, SQLiteBucketStore
+    path = str(tmp_path / "limits.db")
+    limiter = RateLimiter(rate=1, burst=1, store=SQLiteBucketStore(path, timeout=0.3))
+    limiter.check("warm")                                 # creates the table
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")                     # another worker holds the write lock
+
+    async def main():
+        ticks = 0
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+        ticker = asyncio.create_task(tick())
+        wait = await limiter.acheck("t")
+        ticker.cancel()
+        return wait, ticks
+
+    try:
+        wait, ticks = asyncio.run(main())
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert wait == 0 and limiter.errors == 1             # failed open after the busy timeout
+    assert ticks >= 10                                    # the loop kept running meanwhile
+
+
+def test_concurrency_limit_shrinks_on_slow_calls_and_grows_when_busy():
+    from app.limits import ConcurrencyLimiter
+    clock = _Clock()
+    limiter = ConcurrencyLimiter(4, max_limit=8, target_latency=0.1, clock=clock)
+
+    assert all(limiter.try_acquire() for _ in range(4))
+    assert not limiter.try_acquire() and limiter.rejected == 1
+    limiter.release(0.5)                                  # slow: multiplicative decrease
+    limiter.release(0.5)                                  # same window: no second decrease
+    assert limiter.limit == pytest.approx(3.6)
+
+    limiter.release(0.01)
+    limiter.release(0.01)
+    assert limiter.limit == pytest.approx(3.6)            # not busy: no growth
+    for _ in range(20):                                   # fast calls while at the limit grow it
+        while limiter.try_acquire():
+            pass
+        while limiter.in_flight:
+            limiter.release(0.01)
+    assert 4 < limiter.limit <= 8
+
+
+def test_slot_sheds_when_full():
+    from app.limits import ConcurrencyLimiter, Overloaded
+
+    async def run():
+        limiter = ConcurrencyLimiter(1)
+        async with limiter.slot():
+            with pytest.raises(Overloaded):
+                async with limiter.slot():
+                    pass
+        async with limiter.slot():                        # freed again
+            pass
+
+    asyncio.run(run())
+
+
+def test_rate_limited_requests_get_429(test_client, monkeypatch):
+    import app.api as api
+    from app.limits import RateLimiter
+    monkeypatch.setattr(api, "_rate_limiter", RateLimiter(rate=0.01, burst=2))
+
+    codes = [test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+             for _ in range(3)]
+    assert [r.status_code for r in codes] == [200, 200, 429]
+    assert codes[-1].json() == {"error": "Too Many Requests"}
+    assert int(codes[-1].headers["Retry-After"]) >= 1
+    # unauthenticated callers are rejected before they can drain a bucket
+    assert test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}).status_code == 401
+
+
+def test_db_work_is_shed_but_cache_hits_are_served(test_client, monkeypatch):
+    import app.api as api
+    from app.limits import ConcurrencyLimiter
+    assert test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH).status_code == 200
+    limiter = ConcurrencyLimiter(1)
+    limiter.in_flight = 1                                 # every DB slot busy
+    monkeypatch.setattr(api, "_db_limiter", limiter)
+
+    hit = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+    assert hit.status_code == 200
+    r = test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+    assert r.status_code == 503
+    assert r.json() == {"error": "Service overloaded"} and r.headers["Retry-After"] == "1"
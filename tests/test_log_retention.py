@@ -0,0 +1,79 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+
+def _logs_db(tmp_path):
+    from app.data_access import DataAccess
+    da = DataAccess(f"sqlite:///{tmp_path / 'logs.db'}")
+    da.create_all()
+    return da
+
+
+def test_rollup_and_prune_folds_old_rows_into_minutes(tmp_path):
+    from sqlalchemy import func, insert, select
+    from app.log_retention import rollup_and_prune
+    from app.models import Log, LogRollup
+
+    da = _logs_db(tmp_path)
+    now = datetime(2026, 10, 18, 12, 0, 30, tzinfo=timezone.utc)
+    old = datetime(2026, 10, 17, 9, 15, 5, tzinfo=timezone.utc)
+    rows = [{"created_at": old + timedelta(seconds=i), "level": "INFO", "message": "success",
+             "context_json": json.dumps({"status": "GREEN"})} for i in range(5)]
+    rows += [{"created_at": old, "level": "INFO", "message": "cache_hit",
+              "context_json": json.dumps({"sampleRate": 0.25})}] * 2
+    rows += [{"created_at": old, "level": "WARN", "message": "user_not_found", "context_json": None}]
+    rows += [{"created_at": now - timedelta(hours=1), "level": "INFO", "message": "success", "context_json": None}]
+    with da.engine.begin() as conn:
+        conn.execute(insert(Log), rows)
+
+    # small batches: the rows of one minute are merged across transactions
+    assert rollup_and_prune(da, raw_retention_hours=24, batch_size=3, now=now) == {"rolled_up": 8, "rollups_expired": 0}
+    with da.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(Log)).scalar() == 1
+        counts = {(r.message, r.status): r.count for r in conn.execute(select(LogRollup))}
+    assert counts == {("success", "GREEN"): 5, ("cache_hit", ""): 8, ("user_not_found", ""): 1}
+
+    # two days later the remaining raw row is rolled up too, and every rollup has expired
+    assert rollup_and_prune(da, rollup_retention_days=1, now=now + timedelta(days=2)) == {"rolled_up": 1, "rollups_expired": 4}
+
+
+def test_logger_samples_configured_messages(tmp_path):
+    from sqlalchemy import select
+    from app.logger import DBLogger
+    from app.models import Log
+
+    da = _logs_db(tmp_path)
+    lg = DBLogger(da.get_session_factory(), sample_rates={"cache_hit": 0.0, "success": 1.0})
+    for _ in range(10):
+        lg.log("info", "cache_hit", {"nationalNumber": "NAT1001"})
+        lg.log("info", "success", {"nationalNumber": "NAT1001"})
+    lg.close()
+    assert lg.stats()["sampled_out"] == 10 and lg.stats()["written"] == 10
+    with da.engine.connect() as conn:
+        contexts = conn.execute(select(Log.context_json)).scalars().all()
+    assert set(contexts) == {'{"nationalNumber":"NAT1001"}'}
+
+
+def test_concurrent_rollups_count_each_row_once(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from sqlalchemy import func, insert, select
+    from app.leases import acquire, release
+    from app.log_retention import rollup_and_prune
+    from app.models import Log, LogRollup
+
+    da = _logs_db(tmp_path)
+    old = datetime(2026, 10, 17, 9, 15, tzinfo=timezone.utc)
+    with da.engine.begin() as conn:
+        conn.execute(insert(Log), [{"created_at": old, "level": "INFO", "message": "success",
+                                    "context_json": None}] * 500)
+    now = old + timedelta(days=2)
+    assert acquire(da.engine, "logs_rollup", "other-worker", ttl=60)
+    assert rollup_and_prune(da, now=now) == {"rolled_up": 0, "rollups_expired": 0, "skipped": True}
+    release(da.engine, "logs_rollup", "other-worker")
+
+    with ThreadPoolExecutor(2) as pool:
+        results = list(pool.map(lambda _: rollup_and_prune(da, batch_size=10, now=now), range(2)))
+
+    assert sum(r["rolled_up"] for r in results) == 500
+    with da.engine.connect() as conn:
+        assert conn.execute(select(func.sum(LogRollup.count))).scalar() == 500
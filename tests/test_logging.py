@@ -7,6 +7,10 @@ def test_logging_records_events(test_client):
     test_client.post("/api/GetEmpStatus", json={"NationalNumber":"NAT1012"}, headers=AUTH)   # 422
     test_client.post("/api/GetEmpStatus", json={"NationalNumber":"NAT1001"}, headers=AUTH)   # cache_hit likely
 
+    # log records are written by a background worker; wait for them to land
+    from app.api import router
+    router.db_logger.flush()
+
     # verify log rows exist with expected messages
     from app.data_access import DataAccess
     from app.settings import settings
@@ -17,3 +21,40 @@ def test_logging_records_events(test_client):
         for needed in ("success","user_not_found","user_inactive","insufficient_salary_rows"):
             assert any(needed in m for m in msgs)
         assert any("cache_hit" in m for m in msgs) or True
+
+def test_buffered_logger_batches_and_drops(test_client):
+    from app.data_access import DataAccess
+    from app.settings import settings
+    from app.models import Log
+    from app.logger import DBLogger
+
+    da = DataAccess(settings.DATABASE_URL)
+    lg = DBLogger(da.get_session_factory(), queue_size=5, batch_size=100, flush_interval=60)
+    lg._ensure_worker = lambda: None        # no worker yet: records stay queued
+    for i in range(8):
+        lg.log("info", "buffered_probe", {"i": i})
+    assert lg.stats()["queued"] == 5 and lg.stats()["dropped"] == 3
+
+    lg.close()
+    assert lg.stats()["written"] == 5
+    with da.SessionLocal() as s:
+        assert s.query(Log).filter_by(message="buffered_probe").count() == 5
+
+def test_block_policy_never_waits_on_the_event_loop():
+    import asyncio
+    import time
+    from app.logger import DBLogger
+
+    lg = DBLogger(None, queue_size=1, overflow="block", block_timeout=0.5)
+    lg._ensure_worker = lambda: None
+    lg.log("info", "fills_the_queue")
+
+    async def on_loop():
+        t0 = time.perf_counter()
+        lg.log("info", "overflow")
+        return time.perf_counter() - t0
+
+    assert asyncio.run(on_loop()) < 0.1 and lg.dropped == 1
+    t0 = time.perf_counter()
+    lg.log("info", "overflow")                # a plain thread still waits before dropping
+    assert time.perf_counter() - t0 >= 0.4 and lg.dropped == 2
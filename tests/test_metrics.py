@@ -0,0 +1,42 @@
+AUTH = {"Authorization": "Bearer secret123"}
+
+def test_metrics_endpoint_exposes_stages_and_outcomes(test_client):
+    test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+    test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1001"}, headers=AUTH)
+    test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NOPE_METRICS"}, headers=AUTH)
+
+    r = test_client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    for stage in ("cache_lookup", "db_fetch", "compute_metrics", "log"):
+        assert f'empstatus_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'empstatus_cache_lookups_total{result="hit"}' in text
+    assert 'empstatus_http_requests_total{route="/api/GetEmpStatus",code="200"}' in text
+    assert 'empstatus_http_requests_total{route="/api/GetEmpStatus",code="404"}' in text
+    assert "empstatus_db_pool_checkout_seconds_count" in text
+    assert "empstatus_cache_entries " in text
+
+def test_retries_are_counted(monkeypatch):
+    import pytest
+    from tenacity import wait_none
+    from app.data_access import DataAccess
+    from app.metrics import DB_RETRIES
+
+    da = DataAccess("sqlite://")            # no tables: every attempt fails
+    before = DB_RETRIES.value("get_employee_snapshot")
+    monkeypatch.setattr(DataAccess.get_employee_snapshot.retry, "wait", wait_none())
+    with pytest.raises(Exception):
+        da.get_employee_snapshot("X")
+    assert DB_RETRIES.value("get_employee_snapshot") - before == 2
+
+def test_histogram_render_is_cumulative():
+    from app.metrics import Histogram
+    h = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5):
+        h.observe(v, "x")
+    lines = list(h.render())
+    assert 't_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="x",le="1.0"} 2' in lines
+    assert 't_seconds_bucket{stage="x",le="+Inf"} 3' in lines
+    assert 't_seconds_count{stage="x"} 3' in lines
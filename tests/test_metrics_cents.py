@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from hypothesis import given, settings as hsettings, strategies as st
+
+from app.process_status import compute_metrics, compute_metrics_cents, from_cents
+
+months = st.integers(min_value=1, max_value=12)
+cents = st.one_of(
+    st.integers(min_value=0, max_value=10**10),
+    st.integers(min_value=150_000, max_value=260_000),      # totals straddling the 10,000 tax line
+    st.integers(min_value=-10**6, max_value=10**6),
+)
+rows = st.lists(st.tuples(months, cents), max_size=30)
+
+def _same(a: dict, b: dict):
+    assert a.keys() == b.keys()
+    for k in a:
+        assert a[k] == b[k] and str(a[k]) == str(b[k]), (k, a[k], b[k])
+
+@hsettings(max_examples=1000, deadline=None)
+@given(rows)
+def test_cents_path_is_bit_for_bit_decimal_path(month_cents):
+    expected = compute_metrics([(m, Decimal(c).scaleb(-2)) for m, c in month_cents])
+    _same(compute_metrics_cents(month_cents), expected)
+
+@given(st.integers(min_value=-10**12, max_value=10**12))
+def test_from_cents_matches_quantized_decimal(c):
+    from decimal import ROUND_HALF_UP
+    d = from_cents(c)
+    assert str(d) == str((Decimal(c) / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+def test_endpoint_identical_under_both_engines(test_client, monkeypatch):
+    from app.settings import settings
+    bodies = {}
+    for engine in ("decimal", "cents"):
+        monkeypatch.setattr(settings, "METRICS_ENGINE", engine)
+        r = test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1008"},
+                             headers={"Authorization": "Bearer secret123"})
+        bodies[engine] = {k: v for k, v in r.json().items() if k != "LastUpdated"}
+    assert bodies["decimal"] == bodies["cents"]
@@ -0,0 +1,83 @@
+import shutil
+import time
+
+def _primary_and_replicas(tmp_path, n):
+    from sqlalchemy import text
+    from app.bootstrap import init_database
+    from app.data_access import DataAccess
+
+    primary = tmp_path / "primary.db"
+    seed = DataAccess(f"sqlite:///{primary}")
+    init_database(seed)
+    seed.engine.dispose()           # closing the last connection checkpoints the WAL into the file
+    urls = []
+    for i in range(n):
+        path = tmp_path / f"replica{i}.db"
+        shutil.copy(primary, path)
+        # tag each copy so the test can tell which database answered
+        with DataAccess(f"sqlite:///{path}").engine.begin() as conn:
+            conn.execute(text("UPDATE users SET username = :u WHERE national_number = 'NAT1001'"), {"u": f"replica{i}"})
+        urls.append(f"sqlite:///{path}")
+    return f"sqlite:///{primary}", urls
+
+def test_reads_round_robin_over_replicas(tmp_path):
+    from app.data_access import DataAccess
+
+    primary, replicas = _primary_and_replicas(tmp_path, 2)
+    da = DataAccess(primary, replica_urls=replicas)
+    seen = {da.get_user_by_national("NAT1001").username for _ in range(4)}
+    assert seen == {"replica0", "replica1"}
+    assert da.get_employee_snapshot("NAT1001").username.startswith("replica")
+    assert len(da.get_salaries_for_user(1)) == 5
+    assert da.replica_health() == {"replica0": True, "replica1": True}
+
+def test_failed_replica_falls_back_to_primary_and_recovers(tmp_path):
+    from app.data_access import DataAccess
+
+    primary, replicas = _primary_and_replicas(tmp_path, 1)
+    broken = f"sqlite:///{tmp_path / 'missing-dir' / 'replica.db'}"
+    da = DataAccess(primary, replica_urls=[broken, *replicas], replica_retry_seconds=0.05)
+
+    names = [da.get_user_by_national("NAT1001").username for _ in range(4)]
+    assert "jdoe" not in names[1:]                 # after the first failure only the healthy replica is used
+    assert set(names) <= {"jdoe", "replica0"}
+    assert da.replica_health() == {"replica0": False, "replica1": True}
+    assert da.check_replicas() == {"replica0": False, "replica1": True}
+
+    (tmp_path / "missing-dir").mkdir()
+    shutil.copy(tmp_path / "replica0.db", tmp_path / "missing-dir" / "replica.db")
+    time.sleep(0.06)
+    assert da.check_replicas() == {"replica0": True, "replica1": True}
+
+def test_all_replicas_down_reads_primary(tmp_path):
+    from app.data_access import DataAccess
+
+    primary, _ = _primary_and_replicas(tmp_path, 0)
+    da = DataAccess(primary, replica_urls=[f"sqlite:///{tmp_path / 'nope' / 'r.db'}"])
+    assert da.get_user_by_national("NAT1001").username == "jdoe"
+    assert da.get_employee_snapshots(["NAT1001"])["NAT1001"].username == "jdoe"
+
+def test_writes_stay_on_primary(tmp_path):
+    from app.data_access import DataAccess
+    from app.models import Log
+
+    primary, replicas = _primary_and_replicas(tmp_path, 1)
+    da = DataAccess(primary, replica_urls=replicas)
+    with da.SessionLocal() as s:
+        s.add(Log(level="INFO", message="hello"))
+        s.commit()
+    with DataAccess(primary).SessionLocal() as s:
+        assert s.query(Log).count() == 1
+    with DataAccess(replicas[0]).SessionLocal() as s:
+        assert s.query(Log).count() == 0
+
+def test_healthz_probes_the_replicas(test_client, tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from app import main
+    from app.data_access import _Replica
+
+    broken = _Replica("replica0", create_engine(f"sqlite:///{tmp_path / 'nope' / 'r.db'}"), retry_after=5)
+    monkeypatch.setattr(main.data_access, "replicas", [broken])
+    r = test_client.get("/healthz")
+    assert r.status_code == 200                      # reads fall back to the primary
+    assert r.json() == {"ok": True, "replicas": {"replica0": False}}
@@ -0,0 +1,128 @@
+AUTH = {"Authorization": "Bearer secret123"}
+
+def _da():
+    from app.data_access import DataAccess
+    from app.settings import settings
+    return DataAccess(settings.DATABASE_URL)
+
+def test_orm_writes_are_tracked_and_refreshed_incrementally(test_client, monkeypatch):
+    from app.models import Salary, SalaryChange, EmployeeStatus
+    from app.status_refresh import refresh_employee_status
+
+    monkeypatch.setattr("app.status_refresh.CONSUME_AFTER_SECONDS", 0)
+    da = _da()
+    refresh_employee_status(da, full=True)
+    with da.SessionLocal() as s:
+        assert s.query(SalaryChange).count() == 0
+        assert s.get(EmployeeStatus, 1).status == "RED"        # NAT1001
+        assert s.get(EmployeeStatus, 3) is None                # inactive
+        assert da.get_materialized_status("NAT1001").count == 5
+
+        s.add(Salary(user_id=1, year=2025, month=7, amount=90000))
+        s.commit()
+        assert [c.user_id for c in s.query(SalaryChange)] == [1]
+    assert da.get_materialized_status("NAT1001") is None        # stale until refreshed
+
+    stats = refresh_employee_status(da)
+    assert stats == {"full": False, "changes": 1, "recomputed": 1, "materialized": 1}
+    row = da.get_materialized_status("NAT1001")
+    assert row.status == "GREEN" and row.count == 6
+
+    with da.SessionLocal() as s:
+        s.query(Salary).filter_by(user_id=1, month=7, year=2025).delete()
+        s.commit()
+        assert [c.user_id for c in s.query(SalaryChange)] == [1]
+    refresh_employee_status(da)
+    assert da.get_materialized_status("NAT1001").status == "RED"
+
+def test_refresh_leaves_recent_changes_for_the_cache_followers(test_client, monkeypatch):
+    from app.models import Salary, SalaryChange
+    from app.status_refresh import refresh_employee_status
+
+    da = _da()
+    with da.SessionLocal() as s:
+        s.add(Salary(user_id=2, year=2025, month=8, amount=1000))
+        s.commit()
+    assert refresh_employee_status(da)["changes"] == 0
+    with da.SessionLocal() as s:
+        assert 2 in {c.user_id for c in s.query(SalaryChange)}
+        s.query(Salary).filter_by(user_id=2, year=2025, month=8).delete()
+        s.commit()
+    monkeypatch.setattr("app.status_refresh.CONSUME_AFTER_SECONDS", 0)
+    assert refresh_employee_status(da)["changes"] >= 2
+    with da.SessionLocal() as s:
+        assert s.query(SalaryChange).count() == 0
+
+def test_endpoint_serves_materialized_row(test_client, monkeypatch):
+    from app.settings import settings
+    from app.api import _cache
+    from app.status_refresh import refresh_employee_status
+
+    da = _da()
+    refresh_employee_status(da, full=True)
+    live = test_client.post("/api/GetEmpStatus?bustCache=true", json={"NationalNumber": "NAT1008"}, headers=AUTH).json()
+
+    monkeypatch.setattr(settings, "STATUS_TABLE_ENABLED", True)
+    get_snapshot = type(da).get_employee_snapshot
+    monkeypatch.setattr(type(da), "get_employee_snapshot", lambda *a: (_ for _ in ()).throw(AssertionError("raw path")))
+    try:
+        _cache.delete("empstatus:NAT1008")
+        r = test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1008"}, headers=AUTH)
+    finally:
+        monkeypatch.setattr(type(da), "get_employee_snapshot", get_snapshot)
+    assert r.status_code == 200
+    body = r.json()
+    for k in ("EmployeeName", "HighestSalary", "AverageSalary", "Status", "IsActive"):
+        assert body[k] == live[k]
+
+def test_refresh_skips_while_another_process_holds_the_lease(test_client):
+    from app.leases import acquire, release
+    from app.status_refresh import refresh_employee_status
+
+    da = _da()
+    assert acquire(da.engine, "employee_status_refresh", "other-worker", ttl=60)
+    assert not acquire(da.engine, "employee_status_refresh", "third-worker", ttl=60)
+    try:
+        assert refresh_employee_status(da, full=True)["skipped"] is True
+    finally:
+        release(da.engine, "employee_status_refresh", "other-worker")
+    assert "skipped" not in refresh_employee_status(da, full=True)
+    assert acquire(da.engine, "employee_status_refresh", "expired", ttl=-1)
+    assert acquire(da.engine, "employee_status_refresh", "next-worker", ttl=60)     # the expired lease is taken over
+    release(da.engine, "employee_status_refresh", "next-worker")
+
+def test_refresh_that_lost_its_lease_writes_nothing(test_client, monkeypatch):
+    from app.models import Salary, SalaryChange
+    from app.status_refresh import refresh_employee_status
+
+    monkeypatch.setattr("app.status_refresh.CONSUME_AFTER_SECONDS", 0)
+    da = _da()
+    refresh_employee_status(da, full=True)
+    with da.SessionLocal() as s:
+        s.add(Salary(user_id=1, year=2026, month=1, amount=90000))
+        s.commit()
+    monkeypatch.setattr("app.status_refresh.acquire", lambda *a: False)     # taken over mid-run
+    assert refresh_employee_status(da)["skipped"] is True
+    with da.SessionLocal() as s:
+        assert [c.user_id for c in s.query(SalaryChange)] == [1]
+        s.query(Salary).filter_by(user_id=1, year=2026).delete()
+        s.commit()
+    monkeypatch.undo()
+    monkeypatch.setattr("app.status_refresh.CONSUME_AFTER_SECONDS", 0)
+    refresh_employee_status(da)
+
+def test_changes_are_pruned_once_the_followers_had_time_to_read_them(test_client):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import insert
+    from app.models import SalaryChange
+    from app.status_refresh import prune_changes
+
+    da = _da()
+    now = datetime.now(timezone.utc)
+    with da.engine.begin() as conn:
+        conn.execute(insert(SalaryChange), [{"user_id": 2, "changed_at": now - timedelta(minutes=5)},
+                                            {"user_id": 4, "changed_at": now}])
+    assert prune_changes(da) == 1
+    with da.SessionLocal() as s:
+        assert [c.user_id for c in s.query(SalaryChange)] == [4]
+    assert prune_changes(da, older_than=-1) == 1
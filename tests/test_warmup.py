@@ -0,0 +1,69 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+AUTH = {"Authorization": "Bearer secret123"}
+
+
+def test_top_requested_nationals_counts_recent_lookups(tmp_path):
+    from sqlalchemy import insert
+    from app.data_access import DataAccess
+    from app.models import Log
+
+    da = DataAccess(f"sqlite:///{tmp_path / 'logs.db'}")
+    da.create_all()
+    now = datetime.now(timezone.utc)
+    rows = []
+    for national, n in (("A", 3), ("B", 5), ("C", 1)):
+        rows += [{"created_at": now, "level": "INFO", "message": "cache_hit",
+                  "context_json": json.dumps({"nationalNumber": national})}] * n
+    rows += [{"created_at": now - timedelta(days=3), "level": "INFO", "message": "success",
+              "context_json": json.dumps({"nationalNumber": "OLD"})}] * 10
+    rows += [{"created_at": now, "level": "WARN", "message": "user_not_found",
+              "context_json": json.dumps({"nationalNumber": "MISSING"})}] * 10
+    rows += [{"created_at": now, "level": "INFO", "message": "success", "context_json": None}]
+    with da.engine.begin() as conn:
+        conn.execute(insert(Log), rows)
+
+    assert da.top_requested_nationals(2, now - timedelta(hours=1)) == ["B", "A"]
+
+
+def test_snapshot_round_trip(tmp_path):
+    from app.warmup import dump_snapshot, load_snapshot
+    path = tmp_path / "cache.json"
+    assert load_snapshot(path) == []
+    assert dump_snapshot(path, ["NAT1001", "NAT1002"]) == 2
+    assert load_snapshot(path) == ["NAT1001", "NAT1002"]
+    assert list(tmp_path.iterdir()) == [path]             # no temp file left behind
+
+
+def test_warm_up_preloads_snapshot_and_reports_readiness(test_client, tmp_path):
+    import app.api as api
+    from app import warmup
+
+    test_client.post("/api/GetEmpStatus", json={"NationalNumber": "NAT1004"}, headers=AUTH)
+    assert "NAT1004" in api.cached_nationals()
+
+    path = tmp_path / "cache.json"
+    warmup.dump_snapshot(path, ["NAT1001", "NAT1002", "NAT1012", "NOPE"])
+    api._cache.clear()
+    api._negative_cache.clear()
+
+    warmup.state.ready = False
+    r = test_client.get("/healthz")
+    assert r.status_code == 503 and r.json()["warming"] is True
+
+    result = asyncio.run(warmup.warm_up(api.router.data_access, api._quiet_logger, snapshot_path=str(path)))
+    assert result["snapshot"] == 4 and result["loaded"] == 2
+    assert sorted(api.cached_nationals()) == ["NAT1001", "NAT1002"]
+    assert api._negative_cache.get(api._cache_key("NOPE")) == (404, "Invalid National Number")
+    assert test_client.get("/healthz").json() == {"ok": True}
+
+
+def test_failed_shutdown_snapshot_is_logged_not_raised(test_client, tmp_path, monkeypatch):
+    from app import main
+
+    logged = []
+    monkeypatch.setattr(main.db_logger, "log", lambda level, message, ctx=None: logged.append((level, message)))
+    asyncio.run(main._save_snapshot(str(tmp_path / "missing" / "snapshot.json")))
+    assert logged == [("ERROR", "cache_snapshot_failed")]